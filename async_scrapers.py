@@ -0,0 +1,595 @@
+import asyncio
+import os
+import time
+from urllib.parse import quote_plus
+
+from dotenv import load_dotenv
+from playwright.async_api import async_playwright
+
+from browser_setup import async_launch_browser, log_network_stats
+from session import async_open_logged_in_context
+from profile_cache import get_profile_cache, log_cache_stats
+from work_queue import log_work_queue_stats
+from metrics import timed_stage, record_task, count_retry, log_metrics
+from extraction import (async_extract_fields, async_extract_community_urls, async_read_fields, parse_profile_fields,
+                        parse_community_metadata, add_member_usernames)
+from fetchers import async_get_fetcher, log_fetch_stats
+from readiness import async_wait_for_ready, async_wait_for_more_items, log_wait_stats
+from rate_control import get_rate_controller, is_network_error, log_rate_stats
+from stages import KeywordStage, ProfileStage, CommunityStage, MemberStage, TabCommunities, members_url, member_page_windows
+from pipeline import StageQueue, DurableQueue
+from config import (BASE_URL, SELECTORS, BULK_EXTRACTION, FETCH_MODE, MEMBERS_PAGINATION, MEMBER_PAGE_WORKERS, SEARCH_URL_TEMPLATE,
+                    MAX_RETRIES, ASYNC_CONCURRENCY, PIPELINE_QUEUE_DIR)
+
+# ==========================
+# Scheduler
+# ==========================
+
+# Async scraping engine: browser context, bounded workers, rate control
+class AsyncScrapingEngine:
+    """
+    Run scraping tasks on up to `concurrency` pages of one (logged-in) browser context.
+    Every navigation is one request of the shared rate controller (token of the target host, concurrency
+    slot; see rate_control.RateController): the adaptive limit may hold back workers when the site slows down.
+    """
+    def __init__(self, context, concurrency=ASYNC_CONCURRENCY):
+        self.context = context
+        self.concurrency = concurrency
+        self.rate_controller = get_rate_controller()
+
+    async def goto(self, page, url):
+        async with self.rate_controller.async_request(url):
+            await page.goto(url)
+
+    async def reload(self, page):
+        async with self.rate_controller.async_request(page.url):
+            await page.reload()
+
+    async def run_with_retries(self, page, label, task):
+        """
+        Run `await task(page)` and retry it if it fails (up to MAX_RETRIES), same as helpers.run_with_retries.
+        Return a tuple (result, error_message); error_message is None if the task succeeded.
+        """
+        error_message = None
+
+        for attempt in range(MAX_RETRIES):
+            start = time.monotonic()
+            try:
+                result = await task(page)
+            except Exception as e:  # unexpected error occurs
+                error_message = str(e).lower()
+                record_task(time.monotonic() - start)
+                print(f"Error processing '{label}' (attempt {attempt + 1}/{MAX_RETRIES}): {error_message}")
+                if attempt + 1 == MAX_RETRIES:
+                    break  # no backoff or reload after the last attempt
+                count_retry()
+                if is_network_error(error_message):
+                    print(f"Network issue {error_message} for {label}. Reconnecting...")
+
+                # Back off before the next attempt (exponential with jitter)
+                await asyncio.sleep(self.rate_controller.retry_delay(attempt))
+                try:
+                    await self.reload(page)
+                    await async_wait_for_ready(page, "reload")
+                except Exception as reload_error:
+                    error_message = str(reload_error).lower()
+            else:
+                record_task(time.monotonic() - start)
+                return result, None
+
+        return None, error_message
+
+    async def run_ordered(self, items, task, on_result, stream=False):
+        """
+        Run `await task(page, item)` for every item with at most `concurrency` tasks in flight (one page each).
+        `items` may be any iterable (e.g. WorkQueue.track): a worker takes the next item only when it is free.
+        With `stream` the iterable may block (e.g. it reads a pipeline queue): items are taken in a worker thread.
+        Call on_result(item, result, error_message) in input order, so checkpoints always contain a prefix of
+        the items and a resumed run continues after the last committed item.
+        If the run is cancelled, in-flight items are dropped (never half-committed) and the exception is re-raised.
+        """
+        items = enumerate(items)  # shared by the workers: every item is taken once
+        take_lock = asyncio.Lock()
+
+        async def take():
+            # Next (index, item) or None at the end
+            if not stream:
+                return next(items, None)  # never awaits
+            async with take_lock:  # one thread at a time in the iterable
+                return await asyncio.to_thread(next, items, None)
+
+        finished = {}  # results which arrived before the previous items are done {index: (item, result, error)}
+        next_index = 0
+
+        def commit():
+            nonlocal next_index
+            while next_index in finished:
+                on_result(*finished.pop(next_index))
+                next_index += 1
+
+        async def worker():
+            page = None  # opened with the first item of the worker
+            try:
+                while (next_item := await take()) is not None:
+                    index, item = next_item
+                    if page is None:
+                        page = await self.context.new_page()
+                    result, error_message = await self.run_with_retries(page, item, lambda current_page: task(current_page, item))
+                    finished[index] = (item, result, error_message)
+                    commit()
+            finally:
+                if page is not None:
+                    await page.close()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker_task in workers:
+                worker_task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+# ==========================
+# Entry point
+# ==========================
+
+# Run the whole scraping pipeline with the async engine
+def run_async_engine(keywords_csv, categories, usernames_json, usernames_limit, general_profiles_json,
+                     unique_communities_json, post_limit, members_by_comm_json, pagination_limit, profiles_by_comm_json,
+                     only_failed=False, pipeline=False, stream_usernames=False):
+    """
+    Synchronous entry point (used by main.py): launch a browser, log in and run the four scraping stages
+    on the async engine. Output files are the same as with the sync scrapers.
+    `only_failed`: reprocess only the items that failed before (see work_queue.py);
+    `pipeline`: all stages at the same time (see async_run_pipeline);
+    `stream_usernames`: scrape the profiles of new usernames while the keyword search is still running.
+    """
+    asyncio.run(_run_async_engine(keywords_csv, categories, usernames_json, usernames_limit, general_profiles_json,
+                                  unique_communities_json, post_limit, members_by_comm_json, pagination_limit, profiles_by_comm_json,
+                                  only_failed, pipeline, stream_usernames))
+
+async def _run_async_engine(keywords_csv, categories, usernames_json, usernames_limit, general_profiles_json,
+                            unique_communities_json, post_limit, members_by_comm_json, pagination_limit, profiles_by_comm_json,
+                            only_failed, pipeline, stream_usernames):
+    async with async_playwright() as p:
+        browser = await async_launch_browser(p)
+        try:
+            # Reuse saved session or log in
+            context, engine = await async_open_logged_in_context(browser, AsyncScrapingEngine, async_login)
+
+            if pipeline and not only_failed:
+                await async_run_pipeline(engine, keywords_csv, categories, usernames_json, usernames_limit, general_profiles_json,
+                                         unique_communities_json, post_limit, members_by_comm_json, pagination_limit, profiles_by_comm_json)
+                return
+
+            #  1) General Patterns
+            if stream_usernames and not only_failed:
+                # Profiles of new usernames are scraped while the keyword search is still running
+                username_queue = StageQueue(maxsize=0)  # unbounded: put() must never block the event loop
+                await asyncio.gather(
+                    _async_run_stage("keyword search",
+                                     async_scrape_usernames_by_keyword(engine, keywords_csv, categories, usernames_json, usernames_limit,
+                                                                       username_queue=username_queue),
+                                     None, username_queue),
+                    _async_run_stage("general profiles",
+                                     async_scrape_user_profiles(engine, usernames_json, general_profiles_json, unique_communities_json,
+                                                                post_limit, username_queue=username_queue),
+                                     username_queue, None))
+            else:
+                await async_scrape_usernames_by_keyword(engine, keywords_csv, categories, usernames_json, usernames_limit,
+                                                        only_failed=only_failed)
+                await async_scrape_user_profiles(engine, usernames_json, general_profiles_json, unique_communities_json, post_limit,
+                                                 only_failed=only_failed)
+
+            # 2) Community-specific Patterns
+            await async_scrape_community_members(engine, unique_communities_json, members_by_comm_json, pagination_limit,
+                                                 only_failed=only_failed)
+            await async_scrape_member_profiles(engine, members_by_comm_json, profiles_by_comm_json, only_failed=only_failed)
+        finally:
+            log_wait_stats()
+            log_cache_stats()
+            log_network_stats()
+            log_fetch_stats()
+            log_rate_stats()
+            log_work_queue_stats()
+            log_metrics()
+            await browser.close()
+
+# Helper: run a stage of the async pipeline and close its queues when it ends
+async def _async_run_stage(name, stage, input_queue, output_queue):
+    """
+    Await the stage (a coroutine). Return True if it finished without error.
+    """
+    try:
+        await stage
+        print(f"Pipeline stage '{name}' finished.")
+        return True
+    except Exception as e:
+        print(f"Pipeline stage '{name}' failed: {e}")
+        return False
+    finally:
+        if output_queue is not None:
+            output_queue.close()  # downstream stage stops after the remaining items
+        if input_queue is not None:
+            input_queue.abandon()  # upstream stage must not wait for this stage anymore
+
+# Run the four scraping stages as a pipeline on the async engine
+async def async_run_pipeline(engine, keywords_csv, categories, usernames_json, usernames_limit, general_profiles_json,
+                             unique_communities_json, post_limit, members_by_comm_json, pagination_limit, profiles_by_comm_json,
+                             queue_dir=PIPELINE_QUEUE_DIR):
+    """
+    Async version of pipeline.run_pipeline: the stages run as tasks on the same engine, connected by durable queues
+    (same checkpoints). The queues are unbounded, as a blocked put() would stop the event loop; the rate controller's
+    concurrency limit keeps the stages from overloading the site.
+    Return True if all stages finished without error.
+    """
+    os.makedirs(queue_dir, exist_ok=True)
+    usernames_queue = DurableQueue(os.path.join(queue_dir, "usernames.jsonl"), maxsize=0)
+    communities_queue = DurableQueue(os.path.join(queue_dir, "communities.jsonl"), maxsize=0)
+    members_queue = DurableQueue(os.path.join(queue_dir, "members.jsonl"), maxsize=0)
+    queues = [usernames_queue, communities_queue, members_queue]
+
+    stages = [
+        ("keyword search", None, usernames_queue,
+         async_scrape_usernames_by_keyword(engine, keywords_csv, categories, usernames_json, usernames_limit, username_queue=usernames_queue)),
+        ("general profiles", usernames_queue, communities_queue,
+         async_scrape_user_profiles(engine, usernames_json, general_profiles_json, unique_communities_json, post_limit,
+                                    username_queue=usernames_queue, community_queue=communities_queue)),
+        ("community members", communities_queue, members_queue,
+         async_scrape_community_members(engine, unique_communities_json, members_by_comm_json, pagination_limit,
+                                        community_queue=communities_queue, members_queue=members_queue)),
+        ("member profiles", members_queue, None,
+         async_scrape_member_profiles(engine, members_by_comm_json, profiles_by_comm_json, members_queue=members_queue)),
+    ]
+    results = await asyncio.gather(*(_async_run_stage(name, stage, input_queue, output_queue)
+                                     for name, input_queue, output_queue, stage in stages))
+
+    if not all(results):
+        failed = [name for (name, _, _, _), finished in zip(stages, results) if not finished]
+        print(f"Pipeline stopped with errors in: {failed}. Queue checkpoints kept in {queue_dir}.")
+        return False
+
+    for stage_queue in queues:
+        stage_queue.remove()  # complete run: next run starts from scratch
+    return True
+
+# Login
+async def async_login(engine, page):
+    """
+    Accept cookies and log in a user using credentials from environment variables (EMAIL, PASSWORD).
+    """
+    load_dotenv()
+    EMAIL = os.getenv("EMAIL")
+    PASSWORD = os.getenv("PASSWORD")
+
+    await engine.goto(page, f"{BASE_URL}/login")
+
+    await page.click("#ccc-notify-accept")
+    await async_wait_for_ready(page, "login")
+
+    await page.fill(SELECTORS["login_email"], EMAIL)
+    await page.fill(SELECTORS["login_password"], PASSWORD)
+
+    await page.wait_for_selector(SELECTORS["login_button"], timeout=5000)
+    await page.click(SELECTORS["login_button"])
+    await async_wait_for_ready(page, "after_login")
+
+    print("Login successful.")
+
+# ==========================
+# Scrapers (thin drivers of the shared stages, see stages.py)
+# ==========================
+
+# Perform global search by keywords (in parallel) and gather usernames
+@timed_stage("keywords")
+async def async_scrape_usernames_by_keyword(engine, keywords_csv, categories, output_json, usernames_limit, username_queue=None,
+                                            only_failed=False):
+    """
+    Async version of scrapers.scrape_usernames_by_keyword: keywords are searched in parallel,
+    results are committed in the order of categories and keywords (see stages.KeywordStage).
+    """
+    stage = KeywordStage(keywords_csv, categories, output_json, username_queue, only_failed)
+    if not stage.valid_categories:
+        return
+
+    async def search(page, item):
+        category, keyword = item
+        print(f"-------- Keyword: {keyword} (Category: {category}) --------")
+        return await async_search_keyword(engine, page, keyword, usernames_limit)
+
+    try:
+        await engine.run_ordered(stage.items(), search, stage.commit)
+    finally:
+        stage.close()
+
+# Helper: Global search on HU using a keyword
+async def async_search_keyword(engine, page, keyword, usernames_limit):
+    """
+    Search a keyword and collect usernames (with their post count) from the result pages.
+    """
+    user_post_count = {}
+
+    results_shown = False
+    if SEARCH_URL_TEMPLATE:
+        await engine.goto(page, SEARCH_URL_TEMPLATE.format(keyword=quote_plus(keyword)))
+        results_shown = await async_wait_for_ready(page, "search")
+    if not results_shown:
+        await engine.goto(page, f"{BASE_URL}/")
+        await page.fill(SELECTORS["search_input"], keyword)
+        async with engine.rate_controller.async_request(page.url):
+            await page.keyboard.press("Enter")
+        await async_wait_for_ready(page, "search")
+
+    while True:
+        for post in await page.locator(SELECTORS["post_items_search_results"]).all():
+            username = (await post.text_content()).strip()
+            if username:
+                user_post_count[username] = user_post_count.get(username, 0) + 1
+
+        if len(user_post_count) >= usernames_limit or not await async_pagination(engine, page, SELECTORS["next_page_button"]):
+            break
+
+    return user_post_count
+
+# Collect users' profile information (in parallel)
+@timed_stage("usernames")
+async def async_scrape_user_profiles(engine, input_json, output_json, unique_communities_json, post_limit, username_queue=None,
+                                     community_queue=None, only_failed=False):
+    """
+    Async version of scrapers.scrape_user_profiles. Profiles are scraped in parallel and
+    committed in input order, so the output (and the "usernames" work queue) is the same as in the sync version.
+    """
+    stage = ProfileStage(input_json, output_json, unique_communities_json, username_queue, community_queue, only_failed)
+    cache = get_profile_cache()
+
+    async def scrape(page, username):
+        cached_data = cache.get(username, require_communities=True)
+        if cached_data:
+            print(f"username: {username} found in profile cache")
+            return cached_data
+
+        profile_data = await async_scrape_profile_data(engine, page, username)
+        if profile_data:
+            communities = await async_collect_communities_of_user(engine, page, username, post_limit)
+            profile_data["communities"] = list(communities)
+            cache.put(username, profile_data)
+        return profile_data
+
+    try:
+        await engine.run_ordered(stage.items(), scrape, stage.commit, stream=username_queue is not None)
+    finally:
+        stage.close()
+
+# Collect profile information of communities' members (in parallel)
+@timed_stage("members")
+async def async_scrape_member_profiles(engine, members_by_comm_json, profiles_by_comm_json, members_queue=None, only_failed=False):
+    """
+    Async version of scrapers.scrape_member_profiles. Members of all communities are scraped in parallel
+    and committed in the order of communities and members (see stages.MemberStage).
+    """
+    stage = MemberStage(members_by_comm_json, profiles_by_comm_json, members_queue, only_failed)
+    cache = get_profile_cache()
+
+    async def scrape(page, item):
+        _, member = item
+        cached_data = cache.get(member)
+        if cached_data:
+            print(f"username: {member} found in profile cache")
+            cached_data.pop("communities", None)  # community-specific files only hold tags, demographics, bio
+            return cached_data
+
+        profile_data = await async_scrape_profile_data(engine, page, member)
+        cache.put(member, profile_data)
+        return profile_data
+
+    try:
+        await engine.run_ordered(stage.items(), scrape, stage.commit, stream=members_queue is not None)
+    finally:
+        stage.close()
+
+# Collect usernames and metadata from community pages (in parallel)
+@timed_stage("communities")
+async def async_scrape_community_members(engine, unqiue_communities_json, members_by_comm_json, pagination_limit=None,
+                                         community_queue=None, members_queue=None, only_failed=False):
+    """
+    Async version of scrapers.scrape_community_members. Communities not done in the "communities" work queue
+    are scraped in parallel (see stages.CommunityStage).
+    """
+    stage = CommunityStage(unqiue_communities_json, members_by_comm_json, community_queue, members_queue, only_failed)
+
+    async def scrape(page, comm_url):
+        print(f"\nProcessing community: {comm_url}")
+        metadata = await async_extract_community_metadata(engine, page, comm_url)
+
+        if MEMBERS_PAGINATION == "url" or FETCH_MODE == "http":  # pages fetched by URL (no page to click on over HTTP)
+            # In browser mode the page already shows page 1 (see async_extract_community_metadata)
+            first_page = (await async_extract_fields(page, "members"))["usernames"] if FETCH_MODE != "http" else None
+            return metadata, await async_fetch_member_usernames(engine, comm_url, pagination_limit, first_page)
+
+        usernames = []
+        pages_scraped = 0
+        while True:
+            add_member_usernames(usernames, [(await element.inner_text()).strip()
+                                             for element in await page.locator(SELECTORS["community_card_username"]).all()])
+
+            pages_scraped += 1
+            if pagination_limit is not None and pages_scraped >= pagination_limit:
+                break
+
+            if not await async_pagination(engine, page, SELECTORS["next_page_button"]):
+                break
+
+        return metadata, usernames
+
+    try:
+        await engine.run_ordered(stage.items(), scrape, stage.commit, stream=community_queue is not None)
+    finally:
+        stage.close()
+
+# ==========================
+# Helpers (async versions of the helpers in scrapers.py / helpers.py)
+# ==========================
+
+# Helper: Pagination
+async def async_pagination(engine, page, next_button_selector):
+    """
+    Async version of helpers.pagination: click 'Next page' or 'Show more posts' (with retries).
+    Return True if pagination occurred, False otherwise.
+    """
+    next_button = page.locator(next_button_selector)
+    is_show_more_btn = next_button_selector == SELECTORS["show_more_posts_button"]
+    retries = 0
+
+    while retries < MAX_RETRIES:
+        try:
+            post_items_before = await page.locator(SELECTORS["post_items"]).count() if is_show_more_btn else None
+
+            if retries > 0:
+                print(f"Retrying pagination ({retries}/{MAX_RETRIES})... Reloading page.")
+                await engine.reload(page)
+                await async_wait_for_ready(page, "reload")
+
+            if await next_button.count() > 0 and await next_button.is_visible():
+                async with engine.rate_controller.async_request(page.url):
+                    await next_button.click()
+
+                if is_show_more_btn:
+                    if not await async_wait_for_more_items(page, SELECTORS["post_items"], post_items_before):  # problem with HU
+                        print("No new posts loaded after clicking 'Show more posts'. Stopping pagination.")
+                        return False
+                else:
+                    await async_wait_for_ready(page, "next_page")
+
+                return True
+            else:  # btn is missing
+                retries += 1
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error during pagination attempt {retries + 1}: {str(e)}")
+            retries += 1
+
+    return False
+
+# Helper: Show more posts
+async def async_show_more_posts(page, count_before):
+    """
+    Async version of helpers.show_more_posts: click 'Show more posts' and wait for new post items.
+    Return True if new posts were loaded (False without a button: end of the list).
+    """
+    show_more_button = page.locator(SELECTORS["show_more_posts_button"]).first
+    if await show_more_button.count() == 0 or not await show_more_button.is_visible():
+        return False
+
+    async with get_rate_controller().async_request(page.url):
+        await show_more_button.click()
+    return await async_wait_for_more_items(page, SELECTORS["post_items"], count_before)
+
+# Helper: Collect usernames of a community's most active members by page URL
+async def async_fetch_member_usernames(engine, comm_url, pagination_limit=None, first_page=None, workers=MEMBER_PAGE_WORKERS):
+    """
+    Async version of scrapers.fetch_member_usernames. The pages after `first_page` (username texts of page 1
+    if already loaded) are fetched in windows of `workers` pages at once (HTTP or new pages of the context,
+    see FETCH_MODE); no window is requested after the first page without new usernames.
+    """
+    fetcher = await async_get_fetcher(engine)  # no page: every browser fetch on its own page
+
+    usernames = []
+    if first_page is not None and add_member_usernames(usernames, first_page) == 0:
+        return usernames
+    for page_numbers in member_page_windows(1 if first_page is None else 2, pagination_limit, workers):
+        pages = await asyncio.gather(*(fetcher.fetch(members_url(comm_url, page_number), "members") for page_number in page_numbers))
+        for fields in pages:
+            if add_member_usernames(usernames, fields["usernames"]) == 0:  # empty page (or the last page repeated): no more members
+                return usernames
+    return usernames
+
+# Helper: Collect metadata (number of posts and members) of a community
+async def async_extract_community_metadata(engine, page, comm_url):
+    """
+    Async version of scrapers.extract_community_metadata. In browser mode the page is left on the first 'Members' page.
+    """
+    fetcher = await async_get_fetcher(engine, page)  # HTTP or browser page (see FETCH_MODE)
+    about_comm = (await fetcher.fetch(f"{BASE_URL}{comm_url}/about", "about"))["about_comm"]
+
+    active_members_url = members_url(comm_url, 1)
+    metadata = (await fetcher.fetch(active_members_url, "members"))["metadata"]
+    return parse_community_metadata(about_comm, metadata, active_members_url)
+
+# Helper: Scrape User Profile Data
+async def async_scrape_profile_data(engine, page, username):
+    """
+    Async version of scrapers.scrape_profile_data (tags, demographics, bio).
+    """
+    profile_url = f"{BASE_URL}/user/{username}"
+
+    if BULK_EXTRACTION or FETCH_MODE == "http":
+        fields = await (await async_get_fetcher(engine, page)).fetch(profile_url, "profile")
+    else:
+        await engine.goto(page, profile_url)
+        await async_wait_for_ready(page, "profile")
+        fields = await async_read_fields(page, "profile")  # one locator call per element
+
+    try:
+        profile_data = parse_profile_fields(fields)
+        print(f"username: {username} has tags {profile_data['tags']}")
+        return profile_data
+    except Exception as e:
+        print(f"Error collecting user's profile data for {username}: {e}")
+        return None
+
+# Helper: collect communities' URLs from 'Posts' and 'Replies' tabs on a user's profile
+async def async_collect_communities_of_user(engine, page, username, post_limit):
+    """
+    Async version of scrapers.collect_communities_of_user.
+    """
+    all_communities = set()
+    for tab_url in [f"{BASE_URL}/user/{username}/posts", f"{BASE_URL}/user/{username}/replies"]:
+        all_communities.update(await async_process_tab(engine, page, tab_url, post_limit))
+    return all_communities
+
+# Helper: Process a single tab ('Posts' / 'Replies')
+async def async_process_tab(engine, page, tab_url, post_limit):
+    """
+    Async version of scrapers.process_tab (see stages.TabCommunities). Return a set of communities' URLs.
+    """
+    tab = TabCommunities(tab_url, post_limit)
+    await engine.goto(page, tab_url)
+    await async_wait_for_ready(page, "posts_tab")
+
+    start_index = 0
+    while not tab.full():
+        post_items = page.locator(SELECTORS["post_items"])
+        community_urls = await async_extract_community_urls(page, start_index) if BULK_EXTRACTION else None
+        post_count_current = start_index + len(community_urls) if BULK_EXTRACTION else await post_items.count()
+
+        for i in range(start_index, post_count_current):
+            if tab.full():
+                break
+            if BULK_EXTRACTION:
+                tab.add(community_urls[i - start_index])
+            else:
+                tab.add(await async_extract_community_url(post_items.nth(i)))
+
+        start_index = post_count_current
+
+        if not tab.load_more() or not await async_show_more_posts(page, post_count_current):
+            break
+
+    return tab.communities
+
+# Helper: Extract a community's link from a user's post item
+async def async_extract_community_url(post_item):
+    """
+    Async version of scrapers.extract_community_url.
+    """
+    all_links = post_item.locator(SELECTORS["meta_text_wrapper"]).locator("a[href^='/']")
+    if await all_links.count() >= 2:
+        community_link = all_links.nth(1)  # 'Posts' tab: the first link is the user
+    else:
+        community_link = post_item.locator(SELECTORS["replies_tab"])  # 'Replies' tab
+
+    if await community_link.count() > 0:
+        return await community_link.get_attribute("href")
+    return None
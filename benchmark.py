@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from mock_site import MockSite, MockData, TAGS
+
+# Run the four scraping stages end to end against the mock site
+def run_benchmark(site, workdir, keywords=3, usernames_limit=20, post_limit=20, pagination_limit=2,
+                  profile_workers=1, keyword_workers=1, engine="sync", rate=0):
+    """
+    Scrape the mock site with the usual scrapers (sync or async engine) into `workdir` and return a report:
+    wall time per stage, page loads and requests per second, profiles per minute and the run metrics.
+    The scrapers read BASE_URL and all relative paths at import time, so they are imported here,
+    after HU_BASE_URL points to the mock site and the working directory is `workdir`.
+    `rate` is the max requests per second to the mock site (0 -> no limit): the default token bucket of the site
+    (HOST_REQUESTS_PER_SECOND) would otherwise cap the throughput and hide the effect of the workers.
+    """
+    os.environ["HU_BASE_URL"] = site.url
+    os.environ["HU_REQUESTS_PER_SECOND"] = str(rate)
+    os.environ.setdefault("EMAIL", "benchmark@example.com")  # any credentials are accepted by the mock site
+    os.environ.setdefault("PASSWORD", "benchmark")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # output files, work queues, profile cache, saved session and logs of this run only
+
+    keywords_csv = os.path.join(workdir, "keywords.csv")
+    with open(keywords_csv, mode="w", encoding="utf-8") as file:
+        file.write("category,keyword\n")
+        for keyword in TAGS[:keywords]:
+            file.write(f"Benchmark,{keyword}\n")
+    paths = {name: os.path.join(workdir, f"{name}.json")
+             for name in ["usernames_by_keyword", "general_profiles", "unique_communities", "members_by_comm", "profiles_by_comm"]}
+
+    import metrics
+    from playwright.sync_api import sync_playwright
+    from browser_setup import launch_browser
+    from session import open_logged_in_page
+    from scrapers import scrape_usernames_by_keyword, scrape_user_profiles, scrape_community_members, scrape_member_profiles
+    from async_scrapers import run_async_engine
+
+    stage_seconds = {}
+    start = time.perf_counter()
+    if engine == "async":
+        run_async_engine(keywords_csv, ["Benchmark"], paths["usernames_by_keyword"], usernames_limit, paths["general_profiles"],
+                         paths["unique_communities"], post_limit, paths["members_by_comm"], pagination_limit, paths["profiles_by_comm"])
+    else:
+        stages = [
+            ("keywords", lambda page: scrape_usernames_by_keyword(page, keywords_csv, ["Benchmark"], paths["usernames_by_keyword"],
+                                                                  usernames_limit, keyword_workers)),
+            ("usernames", lambda page: scrape_user_profiles(page, paths["usernames_by_keyword"], paths["general_profiles"],
+                                                            paths["unique_communities"], post_limit, profile_workers)),
+            ("communities", lambda page: scrape_community_members(page, paths["unique_communities"], paths["members_by_comm"],
+                                                                  pagination_limit)),
+            ("members", lambda page: scrape_member_profiles(page, paths["members_by_comm"], paths["profiles_by_comm"], profile_workers)),
+        ]
+        with sync_playwright() as p:
+            browser = launch_browser(p)
+            try:
+                page = open_logged_in_page(browser)
+                for stage, run_stage in stages:
+                    stage_start = time.perf_counter()
+                    run_stage(page)
+                    stage_seconds[stage] = round(time.perf_counter() - stage_start, 2)
+            finally:
+                browser.close()
+    seconds = time.perf_counter() - start
+
+    run_metrics = metrics.collect_metrics()
+    page_loads = sum(page_metrics["count"] for page_metrics in run_metrics["pages"].values())
+    profiles = sum(run_metrics["stages"].get(stage, {}).get("done", 0) for stage in ["usernames", "members"])
+
+    return {
+        "seconds": round(seconds, 2),
+        "stage_seconds": stage_seconds or {stage: values["seconds"] for stage, values in run_metrics["stages"].items()},
+        "page_loads": page_loads,
+        "pages_per_second": round(page_loads / seconds, 2),
+        "requests": site.stats["requests"],
+        "requests_per_second": round(site.stats["requests"] / seconds, 2),
+        "injected_failures": site.stats["failures"],
+        "profiles": profiles,
+        "profiles_per_minute": round(profiles / (seconds / 60), 2),
+        "metrics": run_metrics,
+    }
+
+
+if __name__ == "__main__":
+    # python benchmark.py --latency 300 --profile-workers 4  -> scraping throughput against the local mock site
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers end to end against the local mock site (mock_site.py).")
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync")
+    parser.add_argument("--profile-workers", type=int, default=1, help="browser contexts for profile scraping (sync engine)")
+    parser.add_argument("--keyword-workers", type=int, default=1, help="browser contexts for keyword search (sync engine)")
+    parser.add_argument("--rate", type=float, default=0, help="max requests per second to the mock site (0 -> no limit)")
+    parser.add_argument("--keywords", type=int, default=3)
+    parser.add_argument("--usernames-limit", type=int, default=20, help="distinct usernames per keyword")
+    parser.add_argument("--post-limit", type=int, default=20, help="posts per 'Posts' / 'Replies' tab")
+    parser.add_argument("--pagination-limit", type=int, default=2, help="'Most contribution' pages per community")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--communities", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=100, help="mean delay of a response (ms)")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-mode", choices=["status", "drop"], default="status")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="directory for the scraped files (default: new temporary directory)")
+    parser.add_argument("--output", default=None, help="JSON report (default: benchmark_<time>.json in the current directory)")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="hu_benchmark_"))
+
+    site = MockSite(latency_ms=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, failure_mode=args.failure_mode,
+                    data=MockData(users=args.users, communities=args.communities, seed=args.seed), seed=args.seed).start()
+    try:
+        report = run_benchmark(site, workdir, args.keywords, args.usernames_limit, args.post_limit, args.pagination_limit,
+                               args.profile_workers, args.keyword_workers, args.engine, args.rate)
+    finally:
+        site.stop()
+
+    report["settings"] = vars(args)
+    with open(output, mode="w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+
+    print(f"\nBenchmark ({args.engine} engine, latency {args.latency} ms, failure rate {args.failure_rate}):")
+    for stage, seconds in report["stage_seconds"].items():
+        print(f"-{stage}: {seconds} s")
+    print(f"Total: {report['seconds']} s, {report['pages_per_second']} pages/s ({report['requests_per_second']} requests/s), "
+          f"{report['profiles_per_minute']} profiles/min")
+    print(f"Report saved in {output} (scraped files in {workdir})")
@@ -0,0 +1,135 @@
+import queue
+import threading
+from itertools import chain
+
+from playwright.sync_api import sync_playwright
+
+from helpers import run_with_retries
+from browser_setup import launch_browser, setup_context
+from metrics import current_stage, set_stage
+
+_NO_ITEM = object()  # end of an item stream
+
+# Scrape items (e.g. usernames) serially or spread across a pool of browser contexts
+def scrape_in_pool(page, items, task, workers=1, storage_state=None):
+    """
+    Run task(page, item) for each item and yield tuples (item, result, error_message) in the order of the items.
+    With workers <= 1 every item is scraped on the given (logged-in) page one by one.
+    Otherwise items are spread across N isolated browser contexts, each running in its own thread
+    with its own Playwright instance (the sync API is not thread-safe) and reusing the logged-in
+    session of the given page (cookies and local storage) or the given `storage_state`.
+    Without a page (e.g. when called from a background thread) the pool is always used.
+    `items` may be a stream (e.g. usernames arriving from a queue): items are handed to the workers as they come.
+    Results are yielded in input order, so the caller writes exactly the same output as in serial mode.
+    """
+    if page is not None and (workers is None or workers <= 1):
+        for item in items:
+            result, error_message = run_with_retries(page, item, lambda current_page: task(current_page, item))
+            yield item, result, error_message
+        return
+
+    if storage_state is None:
+        storage_state = page.context.storage_state()  # logged-in session shared with every context
+    workers = max(1, workers or 1)
+    if isinstance(items, (list, tuple)):
+        workers = min(workers, len(items))
+        if workers == 0:
+            return
+    else:
+        # Stream: start the pool only once the first item arrives (no browsers for an empty stream)
+        items = iter(items)
+        first_item = next(items, _NO_ITEM)
+        if first_item is _NO_ITEM:
+            return
+        items = chain([first_item], items)
+
+    tasks = queue.Queue(maxsize=workers)  # bounded: the next item is taken (e.g. marked in flight) only when a worker is about to be free
+    results = queue.Queue()
+    fed = []  # items handed to the workers (in input order)
+    feeding_done = threading.Event()
+    stage = current_stage()  # retries of the workers count for the stage of the caller
+    threads = [
+        threading.Thread(target=_pool_worker, args=(worker_id, storage_state, tasks, results, task, stage), daemon=True)
+        for worker_id in range(1, workers + 1)
+    ]
+
+    # Helper: wait for room in the task queue; give up if all workers died
+    def put_task(next_task):
+        while True:
+            try:
+                tasks.put(next_task, timeout=1)
+                return True
+            except queue.Full:
+                if not any(thread.is_alive() for thread in threads):
+                    return False
+
+    # Feed items to the workers as they arrive, then one stop signal (None) per worker
+    def feed():
+        try:
+            for index, item in enumerate(items):
+                fed.append(item)
+                if not put_task((index, item)):
+                    break
+        finally:
+            feeding_done.set()
+            for _ in range(workers):
+                if not put_task(None):
+                    break
+
+    for thread in threads:
+        thread.start()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    print(f"Started pool of {workers} browser contexts.")
+
+    finished = {}  # results which arrived before the previous items are done {index: (item, result, error)}
+    next_index = 0
+    while not (feeding_done.is_set() and next_index >= len(fed)):
+        try:
+            index, item, result, error_message = results.get(timeout=5)
+            finished[index] = (item, result, error_message)
+        except queue.Empty:
+            # All workers died (e.g. browser could not be launched): report remaining items as failed
+            if feeding_done.is_set() and not any(thread.is_alive() for thread in threads) and results.empty():
+                for index in range(next_index, len(fed)):
+                    if index not in finished:
+                        finished[index] = (fed[index], None, "browser pool stopped")
+
+        # Yield in input order
+        while next_index in finished:
+            yield finished.pop(next_index)
+            next_index += 1
+
+    for thread in threads:
+        thread.join()
+
+# Helper: a single worker of the pool (own Playwright instance, browser and context)
+def _pool_worker(worker_id, storage_state, tasks, results, task, stage=None):
+    """
+    Take items from the task queue until the stop signal (None) and put (index, item, result, error_message)
+    into the result queue. Each item is scraped with the usual retry mechanism.
+    """
+    set_stage(stage)
+    try:
+        with sync_playwright() as p:
+            browser = launch_browser(p)
+            try:
+                context = setup_context(browser.new_context(storage_state=storage_state))  # reuse logged-in session
+                page = context.new_page()
+
+                while True:
+                    next_task = tasks.get()
+                    if next_task is None:
+                        break  # no more items
+                    index, item = next_task
+
+                    print(f"[worker {worker_id}] Processing: {item}")
+                    try:
+                        result, error_message = run_with_retries(page, item, lambda current_page: task(current_page, item))
+                    except Exception as e:  # e.g. reload after a failed attempt failed as well
+                        result, error_message = None, str(e).lower()
+                    results.put((index, item, result, error_message))
+            finally:
+                browser.close()
+    except Exception as e:
+        print(f"[worker {worker_id}] Browser context failed: {e}")
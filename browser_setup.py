@@ -0,0 +1,118 @@
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from config import (RESOURCE_BLOCKING, ALLOWED_RESOURCE_TYPES, ALLOWED_DOMAINS, FIREFOX_USER_PREFS, HEADLESS,
+                    STATS_LOG_FILE)
+
+# Network statistics of a run (shared by all contexts, sync and async)
+network_stats = {
+    "allowed_requests": defaultdict(int),  # {resource_type: count}
+    "blocked_requests": defaultdict(int),  # {resource_type: count}
+    "bytes_loaded": defaultdict(int),  # bytes of responses by resource type (Content-Length) {resource_type: bytes}
+}
+_stats_lock = threading.Lock()  # pool workers count from several threads
+
+# Helper: decide whether a request is loaded
+def is_allowed(resource_type, url):
+    """
+    Allow a request only if its resource type is in ALLOWED_RESOURCE_TYPES
+    and its host is one of ALLOWED_DOMAINS (or a subdomain of one).
+    """
+    if resource_type not in ALLOWED_RESOURCE_TYPES:
+        return False
+    host = urlsplit(url).hostname
+    if host is None:  # e.g. data: URLs
+        return True
+    return any(host == domain or host.endswith("." + domain) for domain in ALLOWED_DOMAINS)
+
+# Helper: count a request
+def _count_request(resource_type, allowed):
+    with _stats_lock:
+        network_stats["allowed_requests" if allowed else "blocked_requests"][resource_type] += 1
+
+# Helper: count the bytes of a response
+def _count_response(response):
+    size = response.headers.get("content-length")
+    if size and size.isdigit():
+        with _stats_lock:
+            network_stats["bytes_loaded"][response.request.resource_type] += int(size)
+
+# Launch Firefox with a lightweight profile (sync API)
+def launch_browser(playwright):
+    """
+    Launch Firefox with FIREFOX_USER_PREFS (no images, media autoplay, disk cache, prefetching).
+    """
+    return playwright.firefox.launch(headless=HEADLESS, firefox_user_prefs=FIREFOX_USER_PREFS)
+
+# Apply request blocking to all pages of a context (sync API)
+def setup_context(context):
+    """
+    Intercept every request of the context: load only allowed resource types and domains
+    (see is_allowed), abort the rest. Count requests and loaded bytes for log_network_stats().
+    """
+    context.on("response", _count_response)
+    if not RESOURCE_BLOCKING:
+        context.on("request", lambda request: _count_request(request.resource_type, True))
+        return context
+
+    def handle_route(route):
+        request = route.request
+        allowed = is_allowed(request.resource_type, request.url)
+        _count_request(request.resource_type, allowed)
+        if allowed:
+            route.continue_()
+        else:
+            route.abort()
+
+    context.route("**/*", handle_route)
+    return context
+
+# Launch Firefox with a lightweight profile (async API)
+async def async_launch_browser(playwright):
+    """
+    Async version of launch_browser.
+    """
+    return await playwright.firefox.launch(headless=HEADLESS, firefox_user_prefs=FIREFOX_USER_PREFS)
+
+# Apply request blocking to all pages of a context (async API)
+async def async_setup_context(context):
+    """
+    Async version of setup_context.
+    """
+    context.on("response", _count_response)
+    if not RESOURCE_BLOCKING:
+        context.on("request", lambda request: _count_request(request.resource_type, True))
+        return context
+
+    async def handle_route(route):
+        request = route.request
+        allowed = is_allowed(request.resource_type, request.url)
+        _count_request(request.resource_type, allowed)
+        if allowed:
+            await route.continue_()
+        else:
+            await route.abort()
+
+    await context.route("**/*", handle_route)
+    return context
+
+# Log network statistics
+def log_network_stats():
+    """
+    Append allowed/blocked requests per resource type and the loaded bytes to STATS_LOG_FILE.
+    """
+    resource_types = sorted(set(network_stats["allowed_requests"]) | set(network_stats["blocked_requests"]))
+    if not resource_types:
+        return
+
+    with open(STATS_LOG_FILE, "a") as log_file:
+        log_file.write(f"\nNetwork requests (resource blocking {'on' if RESOURCE_BLOCKING else 'off'}):\n")
+        for resource_type in resource_types:
+            log_file.write(f"-{resource_type}: {network_stats['allowed_requests'][resource_type]} loaded "
+                           f"({network_stats['bytes_loaded'][resource_type] / 1e6:.1f} MB), "
+                           f"{network_stats['blocked_requests'][resource_type]} blocked\n")
+        log_file.write(f"Total loaded: {sum(network_stats['allowed_requests'].values())} requests, "
+                       f"{sum(network_stats['bytes_loaded'].values()) / 1e6:.1f} MB; "
+                       f"total blocked: {sum(network_stats['blocked_requests'].values())} requests\n")
+    print(f"Statistics logged in {STATS_LOG_FILE}")
@@ -1,4 +1,5 @@
 import os
+from urllib.parse import urlsplit
 
 # ==========================
 # Directories
@@ -8,6 +9,11 @@ DATA_OUTPUT_DIR = "data_output"  # directory for output data
 os.makedirs(DATA_INPUT_DIR, exist_ok=True)  # ensure input directory with keywords exists
 os.makedirs(DATA_OUTPUT_DIR, exist_ok=True)  # ensure output directory exists
 
+# ==========================
+# Site
+# ==========================
+BASE_URL = os.getenv("HU_BASE_URL", "https://healthunlocked.com")  # site to scrape (e.g. HU_BASE_URL=http://127.0.0.1:8000 for mock_site.py)
+
 # ==========================
 # Limits for scraping
 # ==========================
@@ -16,8 +22,147 @@ USERNAMES_BY_KEYWORD_LIMIT = 100  # (set to -> 100) number of unqiue usernames w
 USER_PROFILE_LIMIT = 6  # Optinal: limit number of user's profile to collect info from (now: hard coded)
 #
 POSTS_BY_USER_LIMIT = 50  # number of posts to go through to collect communities' names and links when on user profile
+COMMUNITY_SATURATION_WINDOW = 15  # stop reading a 'Posts' / 'Replies' tab after this many posts in a row without a new community (None -> read up to POSTS_BY_USER_LIMIT)
 PAGINATION_LIMIT = 10  # (set to -> 10) number of pages to consider when collecting the most active users of a community ('Members'->'Most contribution'). Decided to set at 10.
+MEMBERS_PAGINATION = "url"  # "url" (fetch member pages by URL: page=1..PAGINATION_LIMIT, stop at the first empty page) or "click" ('Next page' button)
+MEMBER_PAGE_WORKERS = 4  # member pages fetched in parallel ("url" pagination; threads over HTTP, extra pages with the async engine)
 MAX_RETRIES = 2  # number of attempts to load a page when a certain element (e.g. 'Next Page', 'Show more posts', search bar) is not found
+NETWORK_ERRORS = ["ns_error", "timeout", "connection", "network", "reset", "refused", "aborted", "failed"]  # substrings of error messages treated as network issues
+
+# ==========================
+# Parallel scraping
+# ==========================
+PROFILE_WORKERS = 1  # number of isolated browser contexts to scrape profiles with (1 -> serial scraping on the main page)
+KEYWORD_WORKERS = 1  # number of browser contexts searching keywords in parallel
+STREAM_USERNAMES = False  # start scraping profiles of new usernames while the keyword search is still running (search runs on its own browser contexts)
+SEARCH_URL_TEMPLATE = None  # search results of a keyword opened by URL, e.g. BASE_URL + "/search/posts?query={keyword}" (scheme of mock_site.py, not confirmed on the live site); None -> type into the search box
+PIPELINE = False  # run all four stages at the same time, connected by bounded queues (see pipeline.py)
+PIPELINE_QUEUE_SIZE = 200  # max items waiting between two stages (backpressure on the faster stage)
+PIPELINE_QUEUE_DIR = os.path.join(DATA_OUTPUT_DIR, "pipeline_queues")  # checkpoints of the queues (removed after a complete run)
+SCRAPING_ENGINE = "sync"  # "sync" (playwright.sync_api, one page) or "async" (playwright.async_api, many pages in flight)
+ASYNC_CONCURRENCY = 8  # max number of pages loading in parallel with the async engine
+
+# ==========================
+# Rate control (shared by the sync scrapers, the HTTP fetcher and the async engine)
+# ==========================
+HOST_REQUESTS_PER_SECOND = float(os.getenv("HU_REQUESTS_PER_SECOND", "2.0"))  # max requests per second to one host (token bucket), 0 -> no limit
+RATE_LIMIT_BURST = 4  # max requests started at once after an idle period
+BACKOFF_BASE = 2.0  # (s) backoff before the first retry; doubles with every retry (random jitter between 0 and the value)
+BACKOFF_MAX = 60  # (s) max backoff before a retry
+CIRCUIT_FAILURE_THRESHOLD = 5  # network errors in a row that pause all requests
+CIRCUIT_COOLDOWN = 60  # (s) pause after the circuit breaker opened
+ADAPTIVE_CONCURRENCY = True  # lower the number of parallel requests on slow responses or network errors (AIMD)
+CONCURRENCY_MIN = 1  # min number of parallel requests
+CONCURRENCY_MAX = ASYNC_CONCURRENCY  # max number of parallel requests
+LATENCY_TARGET = 5  # (s) duration of one request (navigation until load, HTTP GET) above which the number of parallel requests is halved
+
+# ==========================
+# Browser and resource blocking
+# ==========================
+HEADLESS = True  # False -> show the browser window
+RESOURCE_BLOCKING = True  # abort requests that are not needed for scraping (see ALLOWED_RESOURCE_TYPES, ALLOWED_DOMAINS)
+ALLOWED_RESOURCE_TYPES = ["document", "script", "xhr", "fetch", "stylesheet"]  # loaded resource types (blocked e.g.: image, media, font, websocket)
+ALLOWED_DOMAINS = [urlsplit(BASE_URL).hostname]  # loaded hosts incl. subdomains (blocked e.g.: analytics, ads)
+FIREFOX_USER_PREFS = {
+    "permissions.default.image": 2,  # do not load images
+    "media.autoplay.default": 5,  # no autoplay of audio/video
+    "browser.cache.disk.enable": False,  # memory cache only (smaller profile per context)
+    "network.prefetch-next": False,  # no link prefetching
+    "network.dns.disablePrefetch": True,
+}
+
+# ==========================
+# Login session
+# ==========================
+REUSE_SESSION = True  # save the logged-in session and reuse it in later runs (log in again only when it has expired)
+STORAGE_STATE_FILE = ".session_state.json"  # cookies and local storage of the logged-in session (keep private, not committed)
+
+# ==========================
+# Page readiness (instead of fixed sleeps)
+# ==========================
+# Element (key in SELECTORS) that marks a page type as loaded; page types without a selector wait for network idle
+READY_SELECTORS = {
+    "login": "login_email",
+    "search": "post_items_search_results",
+    "profile": "profile_demographics_joined",
+    "posts_tab": "post_items",
+    "about": "about_comm",
+    "members": "community_metadata",
+}
+READY_MIN_TIMEOUT = 2000  # (ms) lower bound of the adaptive timeout; also used to settle on network idle after a missed selector
+READY_MAX_TIMEOUT = 15000  # (ms) upper bound of the adaptive timeout; used until enough waits are observed
+READY_TIMEOUT_FACTOR = 3  # adaptive timeout = factor * 95th percentile of the observed waits of a page type
+READY_MIN_SAMPLES = 20  # number of observed waits of a page type before the timeout adapts
+
+# ==========================
+# DOM extraction and fetching
+# ==========================
+BULK_EXTRACTION = True  # read all fields of a profile / all post items of a tab in one page.evaluate (False -> one locator call per element)
+FETCH_MODE = "browser"  # "browser" (Playwright page) or "http" (pooled HTTP client parsing server-rendered HTML, browser page as fallback)
+HTTP_POOL_SIZE = 10  # max keep-alive connections of the HTTP client
+HTTP_TIMEOUT = 15  # (s) timeout of an HTTP request
+
+# ==========================
+# Storage of scraped data
+# ==========================
+STORAGE_BACKEND = "jsonl"  # "jsonl" (append one record per entity, compact into JSON at the end), "sqlite" (indexed tables, export to JSON) or "json" (rewrite whole JSON file per record)
+STORAGE_FSYNC_EVERY = 50  # fsync the append-only log after this many records
+SQLITE_DB = os.path.join(DATA_OUTPUT_DIR, "scrape_store.sqlite3")  # database of the "sqlite" backend
+
+# ==========================
+# Work queues (per-item state of keywords, usernames, communities and members)
+# ==========================
+WORK_QUEUE_DIR = os.path.join(DATA_OUTPUT_DIR, "work_queues")  # one file per stage: state, attempts and last error of every item
+WORK_QUEUE_MAX_ATTEMPTS = 3  # runs that retry a failed item automatically ("python main.py retry" retries failed items regardless)
+
+# ==========================
+# Profile cache (profiles shared across keywords and communities)
+# ==========================
+PROFILE_CACHE_ENABLED = True  # look up profiles in the cache before loading a profile page
+PROFILE_CACHE_FILE = os.path.join(DATA_OUTPUT_DIR, "profile_cache.json")  # cached profiles {username: {"scraped_at", "data"}}; seeded from GENERAL_PROFILES_DATA
+PROFILE_CACHE_TTL_DAYS = 30  # days a cached profile stays fresh (None -> never expire)
+
+# ==========================
+# Metrics (timing and throughput of a run)
+# ==========================
+METRICS_DIR = os.path.join(DATA_OUTPUT_DIR, "metrics")  # one JSON file per run: latency per page type, waits vs. work, retries, items per minute
+PROGRESS_LINE = True  # print a progress line (items done / failed, items per minute) while a stage runs
+PROGRESS_INTERVAL = 30  # (s) min time between two progress lines of a stage
+
+# ==========================
+# Co-occurrence networks (projection of user-cluster bipartite networks)
+# ==========================
+BIPARTITE_NETWORK_DIR = os.path.join("data", "bipartite_network")  # edge lists of the cluster-cluster networks (see 'jupyter notebooks/bipartite_network.ipynb')
+TAG_TO_CLUSTER_MAPPING = os.path.join("data", "tag_clustering", "tag_to_cluster_mapping.json")  # {tag: cluster} of the 23 tag clusters
+GENERAL_PROFILES_WITH_CLUSTERS = os.path.join(BIPARTITE_NETWORK_DIR, "general_patterns", "general_profiles_data_with_tag_clusters.json")  # general profiles with "tag_clusters"
+PROFILES_BY_COMM_WITH_CLUSTERS = os.path.join(BIPARTITE_NETWORK_DIR, "community-specific_patterns", "profiles_by_comm_data_with_tag_clusters.json")  # profiles by community with "tag_clusters"
+COOCCURRENCE_STORE_FILE = os.path.join(BIPARTITE_NETWORK_DIR, "cooccurrence_store.json")  # clusters and groups of every projected profile (incremental updates, see cooccurrence_store.py)
+PROJECTION_WORKERS = 1  # processes projecting chunks of profiles (1 -> project in this process)
+PROJECTION_CHUNK_SIZE = 5000  # profiles per chunk of a projection worker
+NETWORK_METRICS_FILE = os.path.join(BIPARTITE_NETWORK_DIR, "network_metrics.json")  # stats of all networks {group: [stats per network]} (see network_analysis.py)
+NETWORK_ANALYSIS_WORKERS = None  # processes analyzing the networks (None -> number of CPUs)
+NETWORK_ANALYSIS_SEED = 42  # random state of the Louvain algorithm (same stats for the same edge files)
+GRAPH_STORE_FILE = os.path.join(BIPARTITE_NETWORK_DIR, "cluster_networks.npy")  # weights of all networks in one memory-mappable array (index: '<file>.json', see graph_store.py)
+
+# ==========================
+# Tag resolution (mapping of new tags to the tag clusters)
+# ==========================
+TAG_LEMMATIZE = True  # normalize tags to their WordNet lemmas (NLTK) before the lookup
+TAG_CACHE_SIZE = 100_000  # resolved tags kept in memory (LRU)
+TAG_EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # SentenceTransformer model of the tag embeddings (name or local path)
+TAG_CENTROIDS_FILE = os.path.join("data", "tag_clustering", "cluster_centroids.npy")  # mean embedding per cluster (index: '<file>.json', see tag_resolver.py)
+TAG_SIMILARITY_THRESHOLD = 0.5  # min cosine similarity of an unknown tag to its nearest cluster centroid (else "N/A")
+
+# ==========================
+# Tag embeddings (cache of encoded tags for clustering experiments)
+# ==========================
+ALL_TAGS_FILE = os.path.join("data", "tag_clustering", "all_tags.json")  # all scraped tags {tag: frequency}
+EMBEDDING_CACHE_DIR = os.path.join("data", "tag_clustering", "embedding_cache")  # one memory-mappable vector file + index per model
+EMBEDDING_BATCH_SIZE = 256  # tags per call of the encoder
+EMBEDDING_MODELS = {  # name -> (backend, model name or local path); a local path works offline
+    "bert": ("sentence-transformers", TAG_EMBEDDING_MODEL),
+    "glove": ("gensim", "glove-wiki-gigaword-100"),
+}
 
 # ==========================
 # Paths and filenames
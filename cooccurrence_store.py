@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+from collections import defaultdict
+from itertools import combinations
+
+from helpers import read_json, write_to_json
+from storage import JsonlStore
+from projection import (load_json, load_tag_to_cluster, profile_clusters, general_partitions, community_partitions, community_records,
+                        save_edges)
+from config import (COOCCURRENCE_STORE_FILE, BIPARTITE_NETWORK_DIR, TAG_TO_CLUSTER_MAPPING, GENERAL_PROFILES_WITH_CLUSTERS,
+                    PROFILES_BY_COMM_WITH_CLUSTERS)
+
+# Running cluster-pair counts of all co-occurrence networks
+class CoOccurrenceStore:
+    """
+    Keep the cluster-pair counts of every network (group of a partition, see projection.Partition: global,
+    demographic subgroups, communities) and update them per profile: put() adds or updates a profile,
+    remove() takes it out. A change only touches the pairs of the profile's own clusters (O(k²)) in its own groups,
+    and only the edge files of changed groups are rewritten by save().
+    Profiles are keyed by (community URL, username); the community is None for general profiles.
+    The clusters and groups of every profile are persisted as an append-only log (see storage.JsonlStore) in
+    COOCCURRENCE_STORE_FILE and the counts in '<path>.counts' by save(). A store saved without later changes
+    loads its counts as they are; after an interrupted run (records in the log) they are summed up from the profiles.
+    """
+    def __init__(self, path=COOCCURRENCE_STORE_FILE, tag_to_cluster=None, output_dir=BIPARTITE_NETWORK_DIR):
+        self.path = path
+        self.tag_to_cluster = tag_to_cluster if tag_to_cluster is not None else load_tag_to_cluster()
+        self.output_dir = output_dir
+        self.partitions = {False: general_partitions(output_dir), True: community_partitions()}  # {is community member: partitions}
+        self.paths = {partition.name: partition for partitions in self.partitions.values() for partition in partitions}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.counts_path = path + ".counts"
+        log_path = path + ".jsonl"
+        saved = not os.path.exists(log_path) or os.path.getsize(log_path) == 0  # no record since the last save()
+        self.store = JsonlStore()
+        self.entries = self.store.load(self.path)  # {record key: {"clusters": [...], "groups": [[partition, group], ...]} or None}
+        self.counts = defaultdict(lambda: defaultdict(int))  # {(partition, group): {(cluster, cluster): users}}
+        self.changed = set()  # groups whose edge file is out of date
+
+        saved_counts = read_json(self.counts_path) if saved and os.path.exists(self.counts_path) else None
+        if saved_counts is not None and saved_counts["entries"] == len(self.entries):
+            for partition, group, pairs in saved_counts["counts"]:
+                self.counts[(partition, group)] = defaultdict(int, {(source, target): weight for source, target, weight in pairs})
+        else:
+            for entry in self.entries.values():
+                if entry is not None:
+                    self._apply(entry, +1)
+            self.changed.clear()
+
+    # Helper: key of a record
+    @staticmethod
+    def _key(username, community=None):
+        return json.dumps([community, username])
+
+    # Helper: add (+1) or subtract (-1) the cluster pairs of a profile in its groups
+    def _apply(self, entry, sign):
+        pairs = list(combinations(entry["clusters"], 2))
+        for partition, group in entry["groups"]:
+            key = (partition, group)
+            counts = self.counts[key]
+            for pair in pairs:
+                counts[pair] += sign
+                if counts[pair] == 0:
+                    del counts[pair]
+            self.changed.add(key)
+
+    def _entry(self, username, profile, community):
+        clusters = sorted(set(profile_clusters(profile, self.tag_to_cluster)))
+        if not clusters:
+            return None  # no user-cluster edge: in no network (like in the notebook)
+        if community is not None:
+            profile = {**profile, "community": community}
+        groups = [[partition.name, group] for partition in self.partitions[community is not None]
+                  for group in partition.groups(username, profile)]
+        return {"clusters": clusters, "groups": groups}
+
+    def put(self, username, profile, community=None):
+        """
+        Add a new profile or update a changed one (general profile or member of `community`).
+        Return True if the counts changed.
+        """
+        key = self._key(username, community)
+        old_entry = self.entries.get(key)
+        new_entry = self._entry(username, profile, community)
+        if new_entry == old_entry:
+            return False
+
+        if old_entry is not None:
+            self._apply(old_entry, -1)
+        if new_entry is not None:
+            self._apply(new_entry, +1)
+        self.store.put(self.path, [key], new_entry)
+        return True
+
+    def remove(self, username, community=None):
+        """
+        Remove a profile (general profile or member of `community`). Return True if the counts changed.
+        """
+        key = self._key(username, community)
+        old_entry = self.entries.get(key)
+        if old_entry is None:
+            return False
+
+        self._apply(old_entry, -1)
+        self.store.put(self.path, [key], None)
+        return True
+
+    def apply(self, profiles=None, community_profiles=None, removed=()):
+        """
+        Apply a delta: put() the added or changed profiles of {username: profile} and {community_url: {username: profile}}
+        and remove() the profiles `removed` [[community_url or None, username], ...].
+        Return the number of (added or updated, removed) profiles.
+        """
+        changed = 0
+        for username, profile in (profiles or {}).items():
+            changed += self.put(username, profile)
+        for username, profile in community_records((community_profiles or {}).items()):
+            changed += self.put(username, profile, profile["community"])
+        return changed, sum(self.remove(username, community) for community, username in removed)
+
+    def sync(self, profiles, community_profiles=None):
+        """
+        Bring the store in line with complete profile files: put() every profile of {username: profile} and
+        {community_url: {username: profile}} (unchanged profiles cost no count update) and remove() stored profiles
+        that are missing (None -> file not given, its profiles are kept). Return the number of (added or updated, removed) profiles.
+        """
+        seen = set()
+        changed = 0
+        records = []
+        if profiles is not None:
+            records += [(username, profile, None) for username, profile in profiles.items()]
+        if community_profiles is not None:
+            records += [(username, profile, profile["community"]) for username, profile in community_records(community_profiles.items())]
+        for username, profile, community in records:
+            seen.add(self._key(username, community))
+            changed += self.put(username, profile, community)
+
+        removed = 0
+        for key in [key for key, entry in self.entries.items() if entry is not None and key not in seen]:
+            community, username = json.loads(key)
+            if (community is None and profiles is None) or (community is not None and community_profiles is None):
+                continue
+            removed += self.remove(username, community)
+        return changed, removed
+
+    def edges(self, partition, group):
+        """
+        Return the current edges of a network in the format of 'cluster_co-occurrence_edges.json'.
+        """
+        return [{"source": source, "target": target, "weight": weight}
+                for (source, target), weight in sorted(self.counts.get((partition, group), {}).items())]
+
+    def save(self):
+        """
+        Rewrite the edge files of the networks changed since the last save (an empty edge list if a network
+        lost all its users), save the counts and compact the log. Return the number of files written.
+        Networks of partitions that are no longer configured (e.g. a country group without its
+        'pms_matched_user_ids.json') are skipped.
+        """
+        written = 0
+        for partition, group in sorted(self.changed):
+            if partition not in self.paths:
+                print(f"Skipping network '{group}' of partition '{partition}': partition not configured.")
+                continue
+            save_edges(self.edges(partition, group), self.paths[partition].path(group, self.output_dir))
+            written += 1
+        self.changed.clear()
+
+        # Counts first: if the run stops before the log is compacted, the next load sums them up again
+        write_to_json(self.counts_path, {
+            "entries": len(self.entries),
+            "counts": [[partition, group, [[source, target, weight] for (source, target), weight in sorted(pairs.items())]]
+                       for (partition, group), pairs in sorted(self.counts.items()) if pairs],
+        })
+        self.store.compact(self.path)
+        return written
+
+
+if __name__ == "__main__":
+    # python cooccurrence_store.py                               -> sync the stored counts with the full profile files
+    # python cooccurrence_store.py --changed new_profiles.json    -> apply only a delta (added / changed / removed profiles)
+    parser = argparse.ArgumentParser(description="Update the cluster co-occurrence networks with the profiles that changed since the last run.")
+    parser.add_argument("--profiles", default=GENERAL_PROFILES_WITH_CLUSTERS, help="general profiles {username: profile}")
+    parser.add_argument("--profiles-by-comm", default=PROFILES_BY_COMM_WITH_CLUSTERS, help="profiles by community {community_url: {username: profile}}")
+    parser.add_argument("--tag-to-cluster", default=TAG_TO_CLUSTER_MAPPING, help="mapping for profiles without 'tag_clusters'")
+    parser.add_argument("--changed", default=None, help="delta: added or changed general profiles {username: profile}")
+    parser.add_argument("--changed-by-comm", default=None, help="delta: added or changed profiles {community_url: {username: profile}}")
+    parser.add_argument("--removed", default=None, help="delta: removed profiles [[community_url or null, username], ...]")
+    parser.add_argument("--store", default=COOCCURRENCE_STORE_FILE)
+    parser.add_argument("--output-dir", default=BIPARTITE_NETWORK_DIR)
+    args = parser.parse_args()
+
+    store = CoOccurrenceStore(args.store, load_tag_to_cluster(args.tag_to_cluster), args.output_dir)
+    if args.changed or args.changed_by_comm or args.removed:
+        changed, removed = store.apply(load_json(args.changed) if args.changed else None,
+                                       load_json(args.changed_by_comm) if args.changed_by_comm else None,
+                                       load_json(args.removed) if args.removed else ())
+    else:
+        profiles = load_json(args.profiles) if os.path.exists(args.profiles) else None
+        community_profiles = load_json(args.profiles_by_comm) if os.path.exists(args.profiles_by_comm) else None
+        changed, removed = store.sync(profiles, community_profiles)
+    print(f"Profiles added or updated: {changed}, removed: {removed}")
+    print(f"Edge files rewritten: {store.save()}")
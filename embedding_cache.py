@@ -0,0 +1,181 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+
+import numpy as np
+
+from config import (ALL_TAGS_FILE, EMBEDDING_CACHE_DIR, EMBEDDING_BATCH_SIZE, EMBEDDING_MODELS, TAG_EMBEDDING_MODEL)
+
+# Clean a tag (as in the tags_clustering notebook)
+def clean_tag(tag):
+    """
+    Remove special characters, lowercase and collapse whitespace: the text that is embedded.
+    """
+    return " ".join(re.sub(r"[^a-zA-Z0-9 ]", "", tag).lower().split())
+
+# Helper: SentenceTransformer encoder (optional dependency, loaded on first use)
+def load_sentence_encoder(model=TAG_EMBEDDING_MODEL):
+    """
+    Return a function encoding a list of texts into an array of L2-normalized embeddings
+    (`model`: SentenceTransformer name or local path).
+    """
+    from sentence_transformers import SentenceTransformer
+    transformer = SentenceTransformer(model)
+    return lambda texts: transformer.encode(list(texts), convert_to_numpy=True, normalize_embeddings=True)
+
+# Helper: gensim word vectors encoder (optional dependency, loaded on first use)
+def load_gensim_encoder(model):
+    """
+    Return a function encoding a list of texts into the mean word vectors of their words
+    (`model`: gensim-data name such as "glove-wiki-gigaword-100" or a local KeyedVectors file).
+    Texts without any known word get a zero vector (the notebook skipped such tags).
+    """
+    from gensim.models import KeyedVectors
+    if os.path.exists(model):
+        vectors = KeyedVectors.load(model)
+    else:
+        from gensim.downloader import load
+        vectors = load(model)
+
+    def encode(texts):
+        embeddings = np.zeros((len(texts), vectors.vector_size), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [word for word in text.split() if word in vectors]
+            if words:
+                embeddings[row] = np.mean([vectors[word] for word in words], axis=0)
+        return embeddings
+    return encode
+
+ENCODERS = {"sentence-transformers": load_sentence_encoder, "gensim": load_gensim_encoder}
+
+# Cache of tag embeddings of one model
+class EmbeddingCache:
+    """
+    Keep the embeddings of one model in '<cache_dir>/<model id>/': 'vectors.f32' (float32 rows, appended and read
+    memory-mapped) and 'index.json' ({"model", "backend", "dim", "rows": {key: row}}). A key is the SHA-1 of
+    (model, cleaned tag), so every tag is encoded once per model; embed() only encodes unseen tags, in batches.
+    The encoder (see ENCODERS) is loaded on the first unseen tag, so cached tags need neither the model nor a network.
+    `model_path` is a local copy of `model` to load the encoder from (offline); the cache stays keyed by `model`.
+    """
+    def __init__(self, model=TAG_EMBEDDING_MODEL, backend="sentence-transformers", cache_dir=EMBEDDING_CACHE_DIR,
+                 batch_size=EMBEDDING_BATCH_SIZE, encode=None, model_path=None):
+        self.model = model
+        self.model_path = model_path
+        self.backend = backend
+        self.batch_size = batch_size
+        self.encode = encode
+        self.dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9._-]+", "_", f"{backend}_{model}"))
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.index_path = os.path.join(self.dir, "index.json")
+        self.stats = {"hits": 0, "encoded": 0}
+
+        self.dim = None
+        self.rows = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            self.dim = index["dim"]
+            self.rows = index["rows"]
+        self.vectors = self._map()
+
+    def _key(self, text):
+        return hashlib.sha1(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _map(self):
+        # Memory-map the rows of the index (rows of an interrupted append after them are ignored)
+        if not self.rows:
+            return None
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.rows), self.dim))
+
+    def _append(self, texts):
+        # Encode texts in batches, append their vectors and save the index (after the vectors)
+        if self.encode is None:
+            self.encode = ENCODERS[self.backend](self.model_path or self.model)
+
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self.vectors_path, "r+b" if os.path.exists(self.vectors_path) else "wb") as file:
+            file.truncate(len(self.rows) * 4 * (self.dim or 0))  # drop rows of an interrupted append
+            file.seek(0, os.SEEK_END)
+            for start in range(0, len(texts), self.batch_size):
+                batch = texts[start:start + self.batch_size]
+                embeddings = np.asarray(self.encode(batch), dtype=np.float32)
+                self.dim = embeddings.shape[1]
+                file.write(embeddings.tobytes())
+                for text in batch:
+                    self.rows[self._key(text)] = len(self.rows)
+            file.flush()
+            os.fsync(file.fileno())
+
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"model": self.model, "backend": self.backend, "dim": self.dim, "rows": self.rows}, file)
+        os.replace(temp_path, self.index_path)
+        self.vectors = self._map()
+
+    def embed(self, tags):
+        """
+        Return the embeddings of tags (array len(tags) x dim, rows in the order of `tags`).
+        """
+        texts = [clean_tag(tag) for tag in tags]
+        unseen = [text for text in dict.fromkeys(texts) if self._key(text) not in self.rows]
+        self.stats["hits"] += len(texts) - len(unseen)
+        self.stats["encoded"] += len(unseen)
+        if unseen:
+            self._append(unseen)
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.asarray(self.vectors[[self.rows[self._key(text)] for text in texts]])
+
+    def __call__(self, tags):
+        return self.embed(tags)
+
+# Cluster the tags with KMeans (as in the tags_clustering notebook)
+def kmeans_clusters(tags, embeddings, num_clusters, seed=42):
+    """
+    Scale the embeddings, run KMeans and return {cluster label: [tags]} (tags with a zero vector are skipped).
+    The clusters differ from those of the notebook, which embedded the cleaned tags without L2 normalization
+    (BERT), looked up whole tags instead of averaging word vectors (GloVe, word2vec) and listed the cleaned tags.
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    known = np.any(embeddings, axis=1)
+    tags = [tag for tag, is_known in zip(tags, known) if is_known]
+    scaled = StandardScaler().fit_transform(embeddings[known])
+    labels = KMeans(n_clusters=num_clusters, random_state=seed, n_init=10).fit(scaled).labels_
+
+    clusters = defaultdict(list)
+    for tag, label in zip(tags, labels):
+        clusters[str(label)].append(tag)
+    return dict(clusters)
+
+
+if __name__ == "__main__":
+    # python embedding_cache.py --model bert                 -> encode the tags not cached yet
+    # python embedding_cache.py --model glove --kmeans 20    -> cluster from the cache ('word-embeddings_kmeans/glove_kmeans_clusters_cached.json')
+    parser = argparse.ArgumentParser(description="Cache the embeddings of all tags and optionally cluster them with KMeans.")
+    parser.add_argument("--model", choices=sorted(EMBEDDING_MODELS), default="bert")
+    parser.add_argument("--model-path", default=None, help="local model (offline) instead of the configured name")
+    parser.add_argument("--tags", default=ALL_TAGS_FILE, help="tags {tag: frequency} or [tag, ...]")
+    parser.add_argument("--kmeans", type=int, default=None, metavar="K", help="number of KMeans clusters")
+    parser.add_argument("--output", default=None, help="clusters (default: '<model>_kmeans_clusters_cached.json' next to the "
+                                                       "notebook results, which were embedded differently and are kept)")
+    args = parser.parse_args()
+
+    backend, model = EMBEDDING_MODELS[args.model]
+    cache = EmbeddingCache(model, backend, model_path=args.model_path)
+    with open(args.tags, "r", encoding="utf-8") as file:
+        tags = list(json.load(file))
+
+    embeddings = cache.embed(tags)
+    print(f"{len(tags)} tags embedded with {cache.model}: {cache.stats['hits']} cached, {cache.stats['encoded']} encoded")
+
+    if args.kmeans:
+        output = args.output or os.path.join(os.path.dirname(args.tags), "word-embeddings_kmeans", f"{args.model}_kmeans_clusters_cached.json")
+        clusters = kmeans_clusters(tags, embeddings, args.kmeans)
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(clusters, file, indent=4)
+        print(f"{len(clusters)} clusters saved to: {output}")
@@ -0,0 +1,197 @@
+from datetime import datetime
+import re
+
+from config import SELECTORS
+
+# Fields extracted per page type: {page_type: {field: (kind, key in SELECTORS)}}
+# kind "text": text of the first matching element (None if missing); "texts": texts of all matching elements;
+# "inner_texts": rendered texts of all matching elements (line breaks between blocks, e.g. username and badge)
+PAGE_FIELDS = {
+    "profile": {
+        "tags": ("texts", "profile_tags"),
+        "joined": ("text", "profile_demographics_joined"),
+        "age": ("text", "profile_demographics_age"),
+        "gender": ("text", "profile_demographics_gender"),
+        "country": ("text", "profile_demographics_country"),
+        "ethnicity": ("text", "profile_demographics_ethnicity"),
+        "bio": ("text", "profile_bio"),
+    },
+    "about": {
+        "about_comm": ("text", "about_comm"),
+    },
+    "members": {
+        "metadata": ("text", "community_metadata"),
+        "usernames": ("inner_texts", "community_card_username"),
+    },
+}
+
+# Read all fields of a page type in the browser (one round trip)
+EXTRACT_FIELDS_JS = """
+(fields) => {
+    const result = {};
+    for (const [field, [kind, selector]] of Object.entries(fields)) {
+        if (kind === "texts") {
+            result[field] = Array.from(document.querySelectorAll(selector), (element) => element.textContent.trim());
+        } else if (kind === "inner_texts") {
+            result[field] = Array.from(document.querySelectorAll(selector), (element) => element.innerText.trim());
+        } else {
+            const element = document.querySelector(selector);
+            result[field] = element ? element.textContent.trim() : null;
+        }
+    }
+    return result;
+}
+"""
+
+# Read the community link of every post item from an index on (one round trip), same rules as extract_community_url
+EXTRACT_COMMUNITY_URLS_JS = """
+([postItemSelector, metaSelector, repliesSelector, startIndex]) => {
+    const postItems = Array.from(document.querySelectorAll(postItemSelector)).slice(startIndex);
+    return postItems.map((postItem) => {
+        // 'Posts' tab: 2 links (user and community); 'Replies' tab: only the community link
+        const links = postItem.querySelectorAll(`${metaSelector} a[href^='/']`);
+        const communityLink = links.length >= 2 ? links[1] : postItem.querySelector(repliesSelector);
+        return communityLink ? communityLink.getAttribute("href") : null;
+    });
+}
+"""
+
+# Helper: resolve the selectors of a page type
+def _fields_arg(page_type):
+    return {field: [kind, SELECTORS[selector_key]] for field, (kind, selector_key) in PAGE_FIELDS[page_type].items()}
+
+# Extract all fields of a page type with a single page.evaluate (sync API)
+def extract_fields(page, page_type):
+    """
+    Return a dict {field: text or list of texts} with every field of the page type (PAGE_FIELDS).
+    Missing elements give None (or an empty list).
+    """
+    return page.evaluate(EXTRACT_FIELDS_JS, _fields_arg(page_type))
+
+# Extract the community URLs of post items with a single page.evaluate (sync API)
+def extract_community_urls(page, start_index=0):
+    """
+    Return the community URL (or None) of every post item on the page, starting at `start_index`.
+    """
+    return page.evaluate(EXTRACT_COMMUNITY_URLS_JS,
+                         [SELECTORS["post_items"], SELECTORS["meta_text_wrapper"], SELECTORS["replies_tab"], start_index])
+
+# Async version of extract_fields
+async def async_extract_fields(page, page_type):
+    """
+    Async version of extract_fields.
+    """
+    return await page.evaluate(EXTRACT_FIELDS_JS, _fields_arg(page_type))
+
+# Async version of extract_community_urls
+async def async_extract_community_urls(page, start_index=0):
+    """
+    Async version of extract_community_urls.
+    """
+    return await page.evaluate(EXTRACT_COMMUNITY_URLS_JS,
+                               [SELECTORS["post_items"], SELECTORS["meta_text_wrapper"], SELECTORS["replies_tab"], start_index])
+
+# Read the fields of a page type with one locator call per element (sync API; BULK_EXTRACTION off)
+def read_fields(page, page_type):
+    """
+    Same result as extract_fields, read element by element (one round trip each).
+    """
+    fields = {}
+    for field, (kind, selector_key) in PAGE_FIELDS[page_type].items():
+        locator = page.locator(SELECTORS[selector_key])
+        if kind == "texts":
+            fields[field] = [element.text_content().strip() for element in locator.all()]
+        elif kind == "inner_texts":
+            fields[field] = [element.inner_text().strip() for element in locator.all()]
+        else:
+            fields[field] = locator.first.text_content().strip() if locator.count() > 0 else None
+    return fields
+
+# Async version of read_fields
+async def async_read_fields(page, page_type):
+    """
+    Async version of read_fields.
+    """
+    fields = {}
+    for field, (kind, selector_key) in PAGE_FIELDS[page_type].items():
+        locator = page.locator(SELECTORS[selector_key])
+        if kind == "texts":
+            fields[field] = [(await element.text_content()).strip() for element in await locator.all()]
+        elif kind == "inner_texts":
+            fields[field] = [(await element.inner_text()).strip() for element in await locator.all()]
+        else:
+            fields[field] = (await locator.first.text_content()).strip() if await locator.count() > 0 else None
+    return fields
+
+# Build the profile data from the extracted fields
+def parse_profile_fields(fields):
+    """
+    Convert the fields of a profile page into the profile data written by the scrapers:
+    {"tags": [...], "demographics": {"joined": "YYYY-MM-DD", "age", "gender", "country", "ethnicity"}, "bio": ...}.
+    Missing values are "N/A".
+    """
+    tags = [tag for tag in fields["tags"] if tag] or ["N/A"]
+
+    demographics = {}
+    for key in ["joined", "age", "gender", "country", "ethnicity"]:
+        value = fields[key]
+        if value is None:
+            demographics[key] = "N/A"
+        elif key == "joined":
+            demographics[key] = datetime.strptime(value, "%B %d, %Y").strftime("%Y-%m-%d")  # YYYY-MM-DD
+        else:
+            demographics[key] = value
+
+    bio = fields["bio"]
+    bio = bio.replace("Read more", "").replace("Read less", "").strip() if bio is not None else "N/A"
+
+    return {
+        "tags": tags,
+        "demographics": demographics,
+        "bio": bio
+    }
+
+# Add the usernames of one 'Most contribution' page
+def add_member_usernames(usernames, texts):
+    """
+    Append the usernames of a members page (card texts "username badge...") to `usernames`, skipping
+    duplicates. Return the number of new usernames (0: empty page, or the last page shown again).
+    """
+    new_usernames = 0
+    for text in texts:
+        username = text.split()[0] if text else None  # extract username, ignore role/badge if there is
+        if username and username not in usernames:
+            usernames.append(username)
+            new_usernames += 1
+    return new_usernames
+
+# Build the community metadata from the 'About' text and the header of the 'Members' page
+def parse_community_metadata(about_comm, metadata, url):
+    """
+    Return {"comm_name", "members_count", "posts_count", "about_comm"} (first 150 characters of 'About');
+    values that cannot be parsed are "N/A". Raise ValueError if the header (`metadata`) of `url` is missing.
+    """
+    # Extract first 150 characters from 'About' section
+    about_comm = about_comm[:150] if about_comm is not None else "N/A"
+
+    # Get metadata details: "Anxiety and Depression Support94,251 members•88,014 posts"
+    if metadata is None:
+        raise ValueError(f"Community metadata not found on {url}")
+
+    # Regex to extract community's name (right before the first digit)
+    match = re.search(r"^(.*?)(?=\d)", metadata)
+    community_name = match.group(1).strip() if match else "N/A"
+
+    # Regex to extract the numbers of members and posts separately
+    # \d{1,3}: matches 1–3 digits
+    # (?:,\d{3})*: matches groups of ,### (e.g., ,251) for thousands separators
+    match = re.search(r"(\d{1,3}(?:,\d{3})*) members•(\d{1,3}(?:,\d{3})*) posts", metadata)
+    members_count = int(match.group(1).replace(",", "")) if match else "N/A"
+    posts_count = int(match.group(2).replace(",", "")) if match else "N/A"
+
+    return {
+        "comm_name": community_name,
+        "members_count": members_count,
+        "posts_count": posts_count,
+        "about_comm": about_comm
+    }
@@ -0,0 +1,241 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from helpers import goto
+from readiness import wait_for_ready, async_wait_for_ready
+from extraction import PAGE_FIELDS, extract_fields, async_extract_fields
+from rate_control import get_rate_controller
+from metrics import page_timer
+from config import SELECTORS, READY_SELECTORS, FETCH_MODE, HTTP_POOL_SIZE, HTTP_TIMEOUT, STATS_LOG_FILE
+
+# Number of pages fetched per backend {"http": count, "browser": count, "http_fallback": count}
+fetch_stats = {"http": 0, "browser": 0, "http_fallback": 0}
+_stats_lock = threading.Lock()
+
+# Helper: count a fetched page
+def _count_fetch(key):
+    with _stats_lock:
+        fetch_stats[key] += 1
+
+# Fetcher interface
+class Fetcher(ABC):
+    """
+    Load a page and return its fields (see extraction.PAGE_FIELDS): {field: text or list of texts}.
+    Return None if the backend cannot produce the data of the page.
+    """
+    @abstractmethod
+    def fetch(self, url, page_type):
+        pass
+
+# Browser backend: a Playwright page
+class BrowserFetcher(Fetcher):
+    """
+    Navigate the (logged-in) page to the URL, wait until it is ready and read all fields in one page.evaluate.
+    Always returns the fields (missing elements give None or an empty list).
+    """
+    def __init__(self, page):
+        self.page = page
+
+    def fetch(self, url, page_type):
+        with page_timer(page_type):
+            goto(self.page, url)
+            wait_for_ready(self.page, page_type)
+        _count_fetch("browser")
+        return extract_fields(self.page, page_type)
+
+# HTTP backend: pooled keep-alive connections, server-rendered HTML parsed with BeautifulSoup
+class HttpFetcher(Fetcher):
+    """
+    GET the URL with a requests.Session per thread (requests does not guarantee that a session is thread-safe;
+    connection pool of HTTP_POOL_SIZE, keep-alive) carrying the cookies and user agent of the logged-in browser context.
+    Parse the fields from the HTML with the same CSS selectors as the browser.
+    Return None if the response is not OK or the element marking the page type as loaded (READY_SELECTORS)
+    is not in the HTML (e.g. the page is rendered on the client).
+    """
+    def __init__(self, cookies=(), user_agent=None, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT):
+        self.cookies = list(cookies)
+        self.user_agent = user_agent
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.local = threading.local()  # session of each thread
+
+    @property
+    def session(self):
+        """
+        Return the session of the calling thread (created on its first request).
+        """
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            if self.user_agent:
+                session.headers["User-Agent"] = self.user_agent
+            for cookie in self.cookies:
+                session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+        return session
+
+    @classmethod
+    def from_page(cls, page):
+        """
+        Create an HTTP fetcher with the session (cookies, user agent) of a logged-in browser page.
+        """
+        return cls(cookies=page.context.cookies(), user_agent=page.evaluate("navigator.userAgent"))
+
+    def fetch(self, url, page_type):
+        try:
+            with page_timer(f"{page_type}_http"), get_rate_controller().request(url):  # shared per-host rate limit
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()  # error statuses (e.g. 429, 503) count as failed requests
+        except requests.RequestException as e:
+            print(f"HTTP fetch failed for {url}: {e}")
+            return None
+        if "html" not in response.headers.get("content-type", ""):
+            return None
+
+        soup = BeautifulSoup(response.text, "html.parser")
+        ready_selector = READY_SELECTORS.get(page_type)
+        if ready_selector and soup.select_one(SELECTORS[ready_selector]) is None:
+            return None  # data is not in the server-rendered HTML
+
+        _count_fetch("http")
+        return parse_fields(soup, page_type)
+
+# HTTP first, browser page only when the HTTP response lacks the data
+class FallbackFetcher(Fetcher):
+    """
+    Try the HTTP backend and fall back to the browser backend if it returns None.
+    """
+    def __init__(self, http_fetcher, browser_fetcher):
+        self.http_fetcher = http_fetcher
+        self.browser_fetcher = browser_fetcher
+
+    def fetch(self, url, page_type):
+        fields = self.http_fetcher.fetch(url, page_type)
+        if fields is None:
+            _count_fetch("http_fallback")
+            fields = self.browser_fetcher.fetch(url, page_type)
+        return fields
+
+# Async browser backend: a page of the async engine (see async_scrapers.AsyncScrapingEngine)
+class AsyncBrowserFetcher:
+    """
+    Async version of BrowserFetcher. Navigations go through the engine (rate control); without a page,
+    every fetch loads the URL on a new page of the engine's context (e.g. several member pages at once).
+    """
+    def __init__(self, engine, page=None):
+        self.engine = engine
+        self.page = page
+
+    async def fetch(self, url, page_type):
+        page = self.page or await self.engine.context.new_page()
+        try:
+            with page_timer(page_type):
+                await self.engine.goto(page, url)
+                await async_wait_for_ready(page, page_type)
+            _count_fetch("browser")
+            return await async_extract_fields(page, page_type)
+        finally:
+            if self.page is None:
+                await page.close()
+
+# Async version of FallbackFetcher (the HTTP request runs in a worker thread)
+class AsyncFallbackFetcher:
+    """
+    Try the HTTP backend (a session per thread) in a worker thread and fall back to the async browser backend if it returns None.
+    """
+    def __init__(self, http_fetcher, browser_fetcher):
+        self.http_fetcher = http_fetcher
+        self.browser_fetcher = browser_fetcher
+
+    async def fetch(self, url, page_type):
+        fields = await asyncio.to_thread(self.http_fetcher.fetch, url, page_type)
+        if fields is None:
+            _count_fetch("http_fallback")
+            fields = await self.browser_fetcher.fetch(url, page_type)
+        return fields
+
+# Helper: read the fields of a page type from parsed HTML (same rules as extraction.EXTRACT_FIELDS_JS)
+def parse_fields(soup, page_type):
+    """
+    Return a dict {field: text or list of texts} with every field of the page type (PAGE_FIELDS).
+    """
+    fields = {}
+    for field, (kind, selector_key) in PAGE_FIELDS[page_type].items():
+        selector = SELECTORS[selector_key]
+        if kind == "texts":
+            fields[field] = [element.get_text().strip() for element in soup.select(selector)]
+        elif kind == "inner_texts":
+            fields[field] = [element.get_text("\n").strip() for element in soup.select(selector)]
+        else:
+            element = soup.select_one(selector)
+            fields[field] = element.get_text().strip() if element is not None else None
+    return fields
+
+# HTTP fetcher shared by all pages of the process (one connection pool)
+_http_fetcher = None
+_http_lock = threading.Lock()
+
+def get_http_fetcher(page):
+    """
+    Return the HTTP fetcher of the process (created with the session of the given page on first use).
+    Unlike a browser page, it can be used from several threads at once.
+    """
+    global _http_fetcher
+    with _http_lock:
+        if _http_fetcher is None:
+            _http_fetcher = HttpFetcher.from_page(page)
+    return _http_fetcher
+
+def get_fetcher(page):
+    """
+    Return the fetcher configured by FETCH_MODE for a browser page:
+    "browser" -> BrowserFetcher; "http" -> HTTP first with the page as fallback.
+    """
+    if FETCH_MODE != "http":
+        return BrowserFetcher(page)
+    return FallbackFetcher(get_http_fetcher(page), BrowserFetcher(page))
+
+async def async_get_http_fetcher(context):
+    """
+    Async version of get_http_fetcher (session of the given browser context; the user agent is read from a temporary page).
+    """
+    global _http_fetcher
+    if _http_fetcher is None:
+        page = await context.new_page()
+        try:
+            cookies, user_agent = await context.cookies(), await page.evaluate("navigator.userAgent")
+        finally:
+            await page.close()
+        with _http_lock:
+            if _http_fetcher is None:
+                _http_fetcher = HttpFetcher(cookies, user_agent)
+    return _http_fetcher
+
+async def async_get_fetcher(engine, page=None):
+    """
+    Async version of get_fetcher for a page of the async engine (None -> a new page per browser fetch).
+    """
+    if FETCH_MODE != "http":
+        return AsyncBrowserFetcher(engine, page)
+    return AsyncFallbackFetcher(await async_get_http_fetcher(engine.context), AsyncBrowserFetcher(engine, page))
+
+# Log fetch statistics
+def log_fetch_stats():
+    """
+    Append the number of pages fetched via HTTP and via the browser to STATS_LOG_FILE.
+    """
+    if not any(fetch_stats.values()):
+        return
+
+    with open(STATS_LOG_FILE, "a") as log_file:
+        log_file.write(f"\nPage fetches (mode: {FETCH_MODE}):\n")
+        log_file.write(f"-http: {fetch_stats['http']}, browser: {fetch_stats['browser']} "
+                       f"(fallbacks from http: {fetch_stats['http_fallback']})\n")
+    print(f"Statistics logged in {STATS_LOG_FILE}")
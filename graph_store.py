@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import time
+
+import networkx as nx
+import numpy as np
+
+from network_analysis import DEFAULT_NETWORKS, edge_files
+from config import GRAPH_STORE_FILE
+
+# Write networks into one array file
+def write_graph_store(networks, path=GRAPH_STORE_FILE, clusters=None):
+    """
+    Store networks [(group, label, edges), ...] (edges as in 'cluster_co-occurrence_edges.json') in
+    - '<path>' (.npy): int32 array networks x clusters x clusters with the symmetric edge weights (0 -> no edge)
+    - '<path>.json': index {"clusters": [...], "networks": [[group, label], ...]} (row i of the array is network i)
+    Clusters are interned as their index in `clusters` (default: all clusters of the networks, sorted).
+    """
+    if clusters is None:
+        clusters = sorted({edge[end] for _, _, edges in networks for edge in edges for end in ("source", "target")})
+    cluster_index = {cluster: index for index, cluster in enumerate(clusters)}
+
+    weights = np.zeros((len(networks), len(clusters), len(clusters)), dtype=np.int32)
+    for network, (_, _, edges) in enumerate(networks):
+        for edge in edges:
+            source, target = cluster_index[edge["source"]], cluster_index[edge["target"]]
+            weights[network, source, target] = weights[network, target, source] = edge["weight"]
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.save(path, weights)
+    with open(path + ".json", "w", encoding="utf-8") as file:
+        json.dump({"clusters": clusters, "networks": [[group, label] for group, label, _ in networks]}, file, indent=2)
+    print(f"{len(networks)} networks ({len(clusters)} clusters) saved to: {path}")
+
+# Convert edge files into the array file
+def build_graph_store(networks=None, path=GRAPH_STORE_FILE):
+    """
+    Read the edge files of {group label: edge file or directory} (default: network_analysis.DEFAULT_NETWORKS;
+    missing paths are skipped) and store them with write_graph_store(). Networks are labelled by file name.
+    """
+    networks = networks if networks is not None else DEFAULT_NETWORKS
+    stored = []
+    for group, group_path in networks.items():
+        if not os.path.exists(group_path):
+            print(f"Skipping {group}: {group_path} not found.")
+            continue
+        for file_path in edge_files(group_path):
+            with open(file_path, "r", encoding="utf-8") as file:
+                stored.append((group, os.path.splitext(os.path.basename(file_path))[0], json.load(file)))
+    write_graph_store(stored, path)
+
+# Read access to the stored networks
+class GraphStore:
+    """
+    Open the array file of write_graph_store() memory-mapped (no network is read before it is used)
+    and return single networks as weight matrices, edge lists or networkx graphs.
+    Edges are in cluster order (the edge files keep the order of the projection), so ties in sorted stats
+    may come out in another order than from the edge files.
+    """
+    def __init__(self, path=GRAPH_STORE_FILE, mmap=True):
+        with open(path + ".json", "r", encoding="utf-8") as file:
+            index = json.load(file)
+        self.path = path
+        self.clusters = index["clusters"]
+        self.networks = [tuple(network) for network in index["networks"]]
+        self.positions = {network: position for position, network in enumerate(self.networks)}
+        self.weights = np.load(path, mmap_mode="r" if mmap else None)
+
+    def __len__(self):
+        return len(self.networks)
+
+    def groups(self):
+        """
+        Return the group labels in stored order.
+        """
+        return list(dict.fromkeys(group for group, _ in self.networks))
+
+    def labels(self, group):
+        """
+        Return the labels of the networks of a group.
+        """
+        return [label for network_group, label in self.networks if network_group == group]
+
+    def matrix(self, group, label):
+        """
+        Return the weight matrix of a network (clusters x clusters, read-only view of the file).
+        """
+        return self.weights[self.positions[(group, label)]]
+
+    def edges(self, group, label):
+        """
+        Return the edges of a network in the format of 'cluster_co-occurrence_edges.json'.
+        """
+        weights = np.asarray(self.matrix(group, label))
+        sources, targets = np.nonzero(np.triu(weights, k=1))
+        return [{"source": self.clusters[source], "target": self.clusters[target], "weight": int(weights[source, target])}
+                for source, target in zip(sources, targets)]
+
+    def graph(self, group, label):
+        """
+        Return a network as weighted networkx graph (like network_analysis.load_graph of its edge file).
+        """
+        G = nx.Graph()
+        G.add_weighted_edges_from((edge["source"], edge["target"], edge["weight"]) for edge in self.edges(group, label))
+        return G
+
+
+if __name__ == "__main__":
+    # python graph_store.py [edge file or directory ...]  -> all networks in one array file (default: all networks of the notebooks)
+    parser = argparse.ArgumentParser(description="Convert the JSON edge files of the cluster-cluster networks into one memory-mappable array file.")
+    parser.add_argument("paths", nargs="*", help="edge files or directories of edge files (default: all networks)")
+    parser.add_argument("--output", default=GRAPH_STORE_FILE)
+    args = parser.parse_args()
+
+    networks = {os.path.basename(os.path.normpath(path)): path for path in args.paths} if args.paths else None
+    build_graph_store(networks, args.output)
+
+    # Read every network from the file and build its graph (memory-mapped views alone read no data)
+    start = time.perf_counter()
+    store = GraphStore(args.output)
+    graphs = [store.graph(group, label) for group, label in store.networks]
+    print(f"Loaded {len(graphs)} networks as graphs in {1000 * (time.perf_counter() - start):.1f} ms")
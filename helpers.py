@@ -1,8 +1,29 @@
 import json
 import os
+import time
 from dotenv import load_dotenv
 
-from config import SELECTORS, MAX_RETRIES
+from config import BASE_URL, SELECTORS, MAX_RETRIES
+from readiness import wait_for_ready, wait_for_more_items
+from rate_control import get_rate_controller, is_network_error
+from metrics import page_timer, record_task, count_retry
+
+# Navigate
+def goto(page, url):
+    """
+    Navigate the page to the URL as one request of the shared rate controller
+    (token of the URL's host, concurrency slot, latency and errors recorded).
+    """
+    with get_rate_controller().request(url):
+        page.goto(url)
+
+# Reload
+def reload(page):
+    """
+    Reload the page as one request of the shared rate controller (see goto).
+    """
+    with get_rate_controller().request(page.url):
+        page.reload()
 
 # Login
 def login(page):
@@ -15,12 +36,11 @@ def login(page):
     PASSWORD = os.getenv("PASSWORD")
 
     # Open the login page
-    page.goto("https://healthunlocked.com/login")
-    page.wait_for_timeout(3000)  # = 1 sec
+    goto(page, f"{BASE_URL}/login")
 
-    # Accept cookies
+    # Accept cookies (click waits for the banner)
     page.click("#ccc-notify-accept")
-    page.wait_for_timeout(2000)
+    wait_for_ready(page, "login")
 
     # Enter login credentials
     page.fill(SELECTORS["login_email"], EMAIL)
@@ -29,7 +49,7 @@ def login(page):
     # Ensure the login button is visible and enabled, then click it
     page.wait_for_selector((SELECTORS["login_button"]), timeout=5000)
     page.click(SELECTORS["login_button"])  
-    page.wait_for_timeout(2000)  # Wait for login to complete
+    wait_for_ready(page, "after_login")  # Wait for login to complete (network idle)
 
     print("Login successful.")
 
@@ -57,25 +77,28 @@ def pagination(page, next_button_selector):
             # Reload page before retrying
             if retries > 0:
                 print(f"Retrying pagination ({retries}/{MAX_RETRIES})... Reloading page.")
-                page.reload()
-                page.wait_for_timeout(2000)
+                reload(page)
+                wait_for_ready(page, "reload")
 
             # Ensure btn exists and is visible
             if next_button.count() > 0 and next_button.is_visible():
                 print("Pagination: Clicking 'Next' or 'Show more posts' button...")
-                next_button.click()  # load new content
-                page.wait_for_timeout(2000)
-
-                # Detect and stop if by clicking on 'Show more posts' nothing happens
-                if is_show_more_btn:
-                    post_items_after = page.locator(SELECTORS["post_items"]).count()
-                    if post_items_before == post_items_after:  # problem with HU
-                        print(f"No new posts loaded after clicking 'Show more posts'. Stopping pagination.")
-                        retries += 1
-                        return False
-                        # if retries > MAX_RETRIES:
-                        #     return False
-                        # continue
+                with page_timer("show_more" if is_show_more_btn else "next_page"), get_rate_controller().request(page.url):
+                    next_button.click()  # load new content
+
+                    # Detect and stop if by clicking on 'Show more posts' nothing happens
+                    if is_show_more_btn:
+                        more_items_loaded = wait_for_more_items(page, SELECTORS["post_items"], post_items_before)
+                    else:
+                        wait_for_ready(page, "next_page")
+
+                if is_show_more_btn and not more_items_loaded:  # problem with HU
+                    print("No new posts loaded after clicking 'Show more posts'. Stopping pagination.")
+                    retries += 1
+                    return False
+                    # if retries > MAX_RETRIES:
+                    #     return False
+                    # continue
             
                 return True
             else:  # btn is missing
@@ -89,6 +112,59 @@ def pagination(page, next_button_selector):
     print("No more pages (or posts) to navigate.")
     return False  # if all retries failed
 
+# Show more posts
+def show_more_posts(page, count_before):
+    """
+    Click 'Show more posts' (the click scrolls it into view) and wait until more than `count_before` post items are shown.
+    Unlike pagination(), a missing button is the end of the list (no reload and retry).
+    Return True if new posts were loaded.
+    """
+    show_more_button = page.locator(SELECTORS["show_more_posts_button"]).first
+    if show_more_button.count() == 0 or not show_more_button.is_visible():
+        return False
+
+    with page_timer("show_more"), get_rate_controller().request(page.url):
+        show_more_button.click()
+        return wait_for_more_items(page, SELECTORS["post_items"], count_before)
+
+# Retry
+def run_with_retries(page, label, task):
+    """
+    Run a scraping task (a function of the page) and retry it if it fails (up to MAX_RETRIES).
+    The requests of the task go through the shared rate controller (see goto); a failed attempt backs off
+    exponentially with jitter and reloads the page before the next attempt (not after the last one).
+    Return a tuple (result, error_message); error_message is None if the task succeeded.
+    """
+    controller = get_rate_controller()
+    error_message = None
+
+    for attempt in range(MAX_RETRIES):
+        start = time.monotonic()
+        try:
+            result = task(page)
+        except Exception as e:  # unexpected error occurs
+            error_message = str(e).lower()
+            record_task(time.monotonic() - start)
+            print(f"Error processing '{label}' (attempt {attempt + 1}/{MAX_RETRIES}): {error_message}")
+            if attempt + 1 == MAX_RETRIES:
+                break  # no backoff or reload after the last attempt
+            count_retry()
+            if is_network_error(error_message):
+                print(f"Network issue {error_message} for {label}. Reconnecting...")
+
+            # Back off before the next attempt (exponential with jitter)
+            page.wait_for_timeout(controller.retry_delay(attempt) * 1000)
+            try:
+                reload(page)
+                wait_for_ready(page, "reload")
+            except Exception as reload_error:
+                error_message = str(reload_error).lower()
+        else:
+            record_task(time.monotonic() - start)
+            return result, None
+
+    return None, error_message
+
 # Read from JSON
 def read_json(file_path):
     """
@@ -102,7 +178,12 @@ def read_json(file_path):
 def write_to_json(file_path, data):
     """
     Write data to a JSON file.
+    Write into a temporary file first and rename it, so a crash mid-write never leaves a corrupted file.
     """
-    with open(file_path, mode="w", encoding="utf-8") as file:
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, mode="w", encoding="utf-8") as file:
         json.dump(data, file, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, file_path)  # atomic
     print(f"Saved to JSON file: {file_path}")
\ No newline at end of file
@@ -1,39 +1,107 @@
+import sys
+import threading
+
 from playwright.sync_api import sync_playwright
 
-from helpers import login
+from session import open_logged_in_page
+from readiness import log_wait_stats
+from profile_cache import log_cache_stats
+from browser_setup import launch_browser, log_network_stats
+from fetchers import log_fetch_stats
+from rate_control import log_rate_stats
+from work_queue import log_work_queue_stats
+from metrics import log_metrics
 from scrapers import scrape_usernames_by_keyword, scrape_user_profiles, scrape_community_members, scrape_member_profiles
+from async_scrapers import run_async_engine
+from pipeline import StageQueue, run_pipeline
 from config import (KEYWORDS_FILE, CATEGORIES_OF_KEYWORDS, USERNAMES_BY_KEYWORD, USERNAMES_BY_KEYWORD_LIMIT, 
                     GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, POSTS_BY_USER_LIMIT, 
                     MEMBERS_BY_COMM, PAGINATION_LIMIT, 
-                    PROFILES_BY_COMM_DATA)
+                    PROFILES_BY_COMM_DATA, PROFILE_WORKERS, KEYWORD_WORKERS, STREAM_USERNAMES, PIPELINE, SCRAPING_ENGINE)
 
 def scrape_general_patterns(page):
+    if STREAM_USERNAMES:
+        scrape_general_patterns_streaming(page)
+        return
+
     # Collect Usernames from Posts using a Keyword
-    scrape_usernames_by_keyword(page, KEYWORDS_FILE, CATEGORIES_OF_KEYWORDS, USERNAMES_BY_KEYWORD, USERNAMES_BY_KEYWORD_LIMIT)
+    scrape_usernames_by_keyword(page, KEYWORDS_FILE, CATEGORIES_OF_KEYWORDS, USERNAMES_BY_KEYWORD, USERNAMES_BY_KEYWORD_LIMIT, KEYWORD_WORKERS)
 
     # Collect User Profiles and Create Unique Community List
-    scrape_user_profiles(page, USERNAMES_BY_KEYWORD, GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, POSTS_BY_USER_LIMIT)    
+    scrape_user_profiles(page, USERNAMES_BY_KEYWORD, GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, POSTS_BY_USER_LIMIT, PROFILE_WORKERS)    
+
+def scrape_general_patterns_streaming(page):
+    # Keyword search in a background thread (own browser contexts), profiles of new usernames scraped meanwhile
+    username_queue = StageQueue(maxsize=0)  # unbounded: the search never waits for profile scraping
+    storage_state = page.context.storage_state()  # logged-in session for the search contexts
+
+    def search_keywords():
+        try:
+            scrape_usernames_by_keyword(None, KEYWORDS_FILE, CATEGORIES_OF_KEYWORDS, USERNAMES_BY_KEYWORD, USERNAMES_BY_KEYWORD_LIMIT,
+                                        KEYWORD_WORKERS, storage_state, username_queue)
+        finally:
+            username_queue.close()  # no more usernames
+
+    search_thread = threading.Thread(target=search_keywords, daemon=True)
+    search_thread.start()
+
+    # Collect User Profiles and Create Unique Community List
+    scrape_user_profiles(page, USERNAMES_BY_KEYWORD, GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, POSTS_BY_USER_LIMIT, PROFILE_WORKERS,
+                         username_queue)
+    search_thread.join()
 
 def scrape_community_patterns(page):
     # Collect Usernames from Communities of the Unique Community List
     scrape_community_members(page, UNIQUE_COMM_LIST, MEMBERS_BY_COMM, PAGINATION_LIMIT)
 
     # Collect User Profiles of Community Members
-    scrape_member_profiles(page, MEMBERS_BY_COMM, PROFILES_BY_COMM_DATA)
+    scrape_member_profiles(page, MEMBERS_BY_COMM, PROFILES_BY_COMM_DATA, PROFILE_WORKERS)
+
+def retry_failed(page):
+    # Reprocess only the items that failed in earlier runs (keywords, usernames, communities, members; see work_queue.py)
+    scrape_usernames_by_keyword(page, KEYWORDS_FILE, CATEGORIES_OF_KEYWORDS, USERNAMES_BY_KEYWORD, USERNAMES_BY_KEYWORD_LIMIT, KEYWORD_WORKERS,
+                                only_failed=True)
+    scrape_user_profiles(page, USERNAMES_BY_KEYWORD, GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, POSTS_BY_USER_LIMIT, PROFILE_WORKERS,
+                         only_failed=True)
+    scrape_community_members(page, UNIQUE_COMM_LIST, MEMBERS_BY_COMM, PAGINATION_LIMIT, only_failed=True)
+    scrape_member_profiles(page, MEMBERS_BY_COMM, PROFILES_BY_COMM_DATA, PROFILE_WORKERS, only_failed=True)
 
 
 if __name__ == "__main__":
-    with sync_playwright() as p:
-        browser = p.firefox.launch(headless=True)  # True - for headless mode
-        page = browser.new_page()
-        try:
-            login(page)
+    # python main.py        -> scrape (continue with the open items of an interrupted run)
+    # python main.py retry  -> scrape only the items that failed before
+    retry = sys.argv[1:] == ["retry"]
 
-            #  1) General Patterns
-            scrape_general_patterns(page)
+    if SCRAPING_ENGINE == "async":
+        # Same stages and output files, many pages in flight (playwright.async_api)
+        run_async_engine(KEYWORDS_FILE, CATEGORIES_OF_KEYWORDS, USERNAMES_BY_KEYWORD, USERNAMES_BY_KEYWORD_LIMIT,
+                         GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, POSTS_BY_USER_LIMIT,
+                         MEMBERS_BY_COMM, PAGINATION_LIMIT, PROFILES_BY_COMM_DATA,
+                         only_failed=retry, pipeline=PIPELINE, stream_usernames=STREAM_USERNAMES)
+    else:
+        with sync_playwright() as p:
+            browser = launch_browser(p)  # lightweight Firefox profile (config: HEADLESS, FIREFOX_USER_PREFS)
+            try:
+                page = open_logged_in_page(browser)  # reuse saved session or log in (resources blocked on all pages)
 
-            # 2) Community-specific Patterns
-            scrape_community_patterns(page)
-            
-        finally:
-            browser.close()
\ No newline at end of file
+                if retry:
+                    retry_failed(page)
+                elif PIPELINE:
+                    # All stages at the same time, connected by durable queues
+                    run_pipeline(page.context.storage_state())
+                else:
+                    #  1) General Patterns
+                    scrape_general_patterns(page)
+
+                    # 2) Community-specific Patterns
+                    scrape_community_patterns(page)
+                
+            finally:
+                log_wait_stats()
+                log_cache_stats()
+                log_network_stats()
+                log_fetch_stats()
+                log_rate_stats()
+                log_work_queue_stats()
+                log_metrics()
+                browser.close()
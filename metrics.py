@@ -0,0 +1,211 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import readiness
+from rate_control import get_rate_controller
+from config import METRICS_DIR, PROGRESS_LINE, PROGRESS_INTERVAL
+
+LATENCY_BUCKETS_MS = [250, 500, 1000, 2000, 4000, 8000, 16000, 32000]  # upper bounds of the histogram buckets (plus one above the last)
+
+# Measurements of this run (shared by all threads)
+run_started = datetime.now()
+page_times = defaultdict(list)  # page loads (navigation until ready) in s {page_type: [s, ...]}
+counters = {"task_seconds": 0.0, "retries": 0}  # time spent in scraping tasks, failed attempts that were retried
+stages = {}  # {stage: {"seconds", "running_since", "done", "failed", "retries", "last_progress"}}
+_lock = threading.Lock()
+_stage = contextvars.ContextVar("stage", default=None)  # stage of the current thread or asyncio task
+
+# Helper: stage of the current thread / task (pool workers take over the stage of the thread that started them)
+def current_stage():
+    return _stage.get()
+
+def set_stage(stage):
+    _stage.set(stage)
+
+def _stage_entry(stage):
+    if stage not in stages:
+        stages[stage] = {"seconds": 0.0, "running_since": None, "done": 0, "failed": 0, "retries": 0, "last_progress": 0.0}
+    return stages[stage]
+
+# Helper: start and stop the clock of a stage
+def _enter_stage(stage):
+    previous = current_stage()
+    set_stage(stage)
+    with _lock:
+        _stage_entry(stage)["running_since"] = time.monotonic()
+    return previous
+
+def _exit_stage(stage, previous):
+    with _lock:
+        entry = stages[stage]
+        entry["seconds"] += time.monotonic() - entry["running_since"]
+        entry["running_since"] = None
+    set_stage(previous)
+
+# Decorator: measure the wall time of a scraping stage (sync or async function)
+def timed_stage(stage):
+    """
+    Measure the wall time of a stage and attribute retries and finished items (see work_queue.WorkQueue.finish)
+    to it. The stage name is the name of its work queue ("keywords", "usernames", "communities", "members").
+    """
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                previous = _enter_stage(stage)
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    _exit_stage(stage, previous)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            previous = _enter_stage(stage)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _exit_stage(stage, previous)
+        return wrapper
+    return decorator
+
+# Measure a page load (navigation until the page is ready)
+@contextmanager
+def page_timer(page_type):
+    """
+    Record the time of the enclosed block as one load of the page type
+    (profile, posts_tab, replies_tab, about, members, search, next_page, ...).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            page_times[page_type].append(elapsed)
+
+# Record the duration of one attempt of a scraping task
+def record_task(seconds):
+    with _lock:
+        counters["task_seconds"] += seconds
+
+# Count a failed attempt that is retried
+def count_retry():
+    with _lock:
+        counters["retries"] += 1
+        stage = current_stage()
+        if stage is not None:
+            _stage_entry(stage)["retries"] += 1
+
+# Count a finished item of a stage (print a progress line every PROGRESS_INTERVAL seconds)
+def count_item(stage, failed=False):
+    with _lock:
+        entry = _stage_entry(stage)
+        entry["failed" if failed else "done"] += 1
+
+        now = time.monotonic()
+        if PROGRESS_LINE and now - entry["last_progress"] >= PROGRESS_INTERVAL:
+            entry["last_progress"] = now
+            seconds = _stage_seconds(entry, now)
+            print(f"[progress] {stage}: {entry['done']} done, {entry['failed']} failed, "
+                  f"{_items_per_minute(entry, seconds):.1f} items/min, {seconds / 60:.1f} min")
+
+def _stage_seconds(entry, now):
+    running = now - entry["running_since"] if entry["running_since"] is not None else 0
+    return entry["seconds"] + running
+
+def _items_per_minute(entry, seconds):
+    return (entry["done"] + entry["failed"]) / (seconds / 60) if seconds > 0 else 0.0
+
+# Helper: latency summary of a list of durations (s)
+def _latency_summary(samples):
+    samples = sorted(samples)
+    histogram = {f"<={bound}ms": 0 for bound in LATENCY_BUCKETS_MS}
+    histogram[f">{LATENCY_BUCKETS_MS[-1]}ms"] = 0
+    for sample in samples:
+        ms = sample * 1000
+        bucket = next((f"<={bound}ms" for bound in LATENCY_BUCKETS_MS if ms <= bound), f">{LATENCY_BUCKETS_MS[-1]}ms")
+        histogram[bucket] += 1
+    return {
+        "count": len(samples),
+        "total_s": round(sum(samples), 3),
+        "mean_ms": round(1000 * sum(samples) / len(samples)),
+        "p50_ms": round(1000 * samples[len(samples) // 2]),
+        "p95_ms": round(1000 * samples[int(0.95 * (len(samples) - 1))]),
+        "max_ms": round(1000 * samples[-1]),
+        "histogram": histogram,
+    }
+
+# Collect all measurements of the run
+def collect_metrics():
+    """
+    Return the metrics of the run as a dict:
+    - stages: wall time, items done / failed, items per minute and retries per stage
+    - pages: latency histogram (and count, mean, median, p95, max) per page type
+    - readiness: waits per page type (see readiness.py)
+    - time: time in scraping tasks split into waits (readiness, throttling, backoff) and real work
+    """
+    now = time.monotonic()
+    rate_stats = get_rate_controller().stats
+
+    with _lock:
+        stage_metrics = {}
+        for stage, entry in stages.items():
+            seconds = _stage_seconds(entry, now)
+            stage_metrics[stage] = {
+                "seconds": round(seconds, 1),
+                "done": entry["done"],
+                "failed": entry["failed"],
+                "items_per_minute": round(_items_per_minute(entry, seconds), 2),
+                "retries": entry["retries"],
+            }
+        pages = {page_type: _latency_summary(samples) for page_type, samples in page_times.items() if samples}
+        task_seconds = counters["task_seconds"]
+        retries = counters["retries"]
+
+    readiness_seconds = sum(readiness.wait_total_ms.values()) / 1000
+    waits = {
+        "readiness_s": round(readiness_seconds, 1),
+        "throttle_s": round(rate_stats["throttled_seconds"], 1),
+        "backoff_s": round(rate_stats["backoff_seconds"], 1),
+    }
+
+    return {
+        "run_started": run_started.isoformat(timespec="seconds"),
+        "run_seconds": round((datetime.now() - run_started).total_seconds(), 1),
+        "stages": stage_metrics,
+        "pages": pages,
+        "readiness": {
+            page_type: {
+                "waits": len(readiness.wait_times[page_type]),
+                "timeouts": readiness.wait_timeouts[page_type],
+                "total_s": round(readiness.wait_total_ms[page_type] / 1000, 1),
+            }
+            for page_type in sorted(readiness.wait_total_ms)
+        },
+        "time": {
+            "task_s": round(task_seconds, 1),
+            "waits": waits,
+            "work_s": round(max(0.0, task_seconds - readiness_seconds), 1),  # task time without readiness waits
+            "retries": retries,
+        },
+    }
+
+# Export the metrics of the run (end of a run)
+def log_metrics(metrics_dir=METRICS_DIR):
+    """
+    Write the metrics of the run (see collect_metrics) to '<metrics_dir>/run_<start time>.json'.
+    """
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, f"run_{run_started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump(collect_metrics(), file, indent=4)
+    print(f"Metrics saved in {path}")
@@ -0,0 +1,318 @@
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, quote_plus
+
+# Synthetic data
+CONDITIONS = ["Anxiety", "Depression", "Asthma", "Diabetes", "Arthritis", "Migraine", "Lupus", "Thyroid",
+              "Fibromyalgia", "Crohns", "Psoriasis", "Insomnia"]
+COMMUNITY_SUFFIXES = ["Support", "Forum", "Network", "Friends"]
+TAGS = ["anxiety", "depression", "asthma", "type 2 diabetes", "rheumatoid arthritis", "migraine", "lupus", "hypothyroidism",
+        "fibromyalgia", "crohn's disease", "psoriasis", "insomnia", "high blood pressure", "back pain", "smoking"]
+GENDERS = ["Female", "Male", "Non-binary"]
+COUNTRIES = ["United Kingdom", "United States", "Canada", "Australia", "Ireland"]
+ETHNICITIES = ["White", "Asian", "Black", "Mixed", "Other"]
+
+SEARCH_PAGE_SIZE = 20  # search results per page
+MEMBERS_PAGE_SIZE = 20  # member cards per 'Most contribution' page
+POSTS_PAGE_SIZE = 10  # post items per 'Show more posts' batch
+
+# Synthetic HealthUnlocked: users, communities and search results derived from a seed
+class MockData:
+    """
+    Deterministic synthetic data: `users` users with tags, demographics, bio, posts and replies in
+    `communities` communities; every community has up to `members_per_community` active members.
+    Search results of a keyword are a seeded sample of users (one result per post).
+    """
+    def __init__(self, users=200, communities=12, members_per_community=40, results_per_keyword=60, seed=42):
+        rng = random.Random(seed)
+        self.seed = seed
+        self.results_per_keyword = results_per_keyword
+
+        names = [f"{condition} {suffix}" for suffix in COMMUNITY_SUFFIXES for condition in CONDITIONS][:communities]
+        self.communities = {}  # {comm_url: {"name", "about", "members", "posts"}}
+        for name in names:
+            comm_url = "/" + name.lower().replace(" ", "-")
+            self.communities[comm_url] = {
+                "name": name,
+                "about": f"A community for people living with {name.split()[0].lower()}. " * 5,
+                "members_count": rng.randint(500, 120000),
+                "posts_count": rng.randint(500, 90000),
+            }
+        comm_urls = list(self.communities)
+
+        self.users = {}  # {username: {"tags", "demographics", "bio", "posts", "replies"}}
+        for i in range(users):
+            username = f"user{i:04d}"
+            demographics = {"joined": (date(2015, 1, 1) + timedelta(days=rng.randint(0, 3000))).strftime("%B %d, %Y")}
+            if rng.random() < 0.7:
+                demographics["age"] = f"{rng.randint(18, 85)}"
+            if rng.random() < 0.8:
+                demographics["gender"] = rng.choice(GENDERS)
+            if rng.random() < 0.8:
+                demographics["country"] = rng.choice(COUNTRIES)
+            if rng.random() < 0.5:
+                demographics["ethnicity"] = rng.choice(ETHNICITIES)
+            self.users[username] = {
+                "tags": rng.sample(TAGS, rng.randint(0, 5)),
+                "demographics": demographics,
+                "bio": f"Hi, I am {username}." if rng.random() < 0.6 else None,
+                "posts": [rng.choice(comm_urls) for _ in range(rng.randint(0, 25))],
+                "replies": [rng.choice(comm_urls) for _ in range(rng.randint(0, 25))],
+            }
+        usernames = list(self.users)
+
+        self.members = {comm_url: rng.sample(usernames, min(members_per_community, len(usernames))) for comm_url in comm_urls}
+
+    def search(self, keyword):
+        """
+        Return the usernames of the search results of a keyword (one per post, users may repeat).
+        """
+        rng = random.Random(f"{self.seed}:{keyword}")
+        return [rng.choice(list(self.users)) for _ in range(self.results_per_keyword)]
+
+# Pages
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>{body}</body></html>"""
+
+HOME_BODY = """<input placeholder="Search HealthUnlocked" onkeydown="if (event.key === 'Enter') location.href = '/search/posts?query=' + encodeURIComponent(this.value)">"""
+
+LOGIN_BODY = """<div id="ccc"><button id="ccc-notify-accept" onclick="document.getElementById('ccc').remove()">Accept cookies</button></div>
+<form method="post" action="/login">
+<input id="email" name="email"><input id="password" name="password" type="password">
+<button type="submit" data-testid="log-in-button">Log in</button>
+</form>"""
+
+SHOW_MORE_SCRIPT = """<button id="show-more" onclick="showMore()">Show more posts</button>
+<script>
+let offset = {offset};
+async function showMore() {{
+    const response = await fetch(location.pathname + "?fragment=1&offset=" + offset);
+    document.getElementById("posts").insertAdjacentHTML("beforeend", await response.text());
+    offset += {page_size};
+    if (offset >= {total}) document.getElementById("show-more").remove();
+}}
+</script>"""
+
+# Helper: render the post items of a 'Posts' or 'Replies' tab
+def render_post_items(data, username, tab, offset):
+    items = []
+    for index, comm_url in enumerate(data.users[username][tab][offset:offset + POSTS_PAGE_SIZE], start=offset):
+        name = escape(data.communities[comm_url]["name"])
+        if tab == "posts":  # 2 links: user and community
+            items.append(f'<div data-sentry-element="PostItem"><div data-sentry-element="MetaTextWrapper">'
+                         f'<a href="/user/{username}">{username}</a> in <a href="{comm_url}">{name}</a></div>'
+                         f'<p>Post {index}</p></div>')
+        else:  # only the community link
+            items.append(f'<div data-sentry-element="PostItem"><a data-testid="profile-reply" href="{comm_url}">{name}</a>'
+                         f'<p>Reply {index}</p></div>')
+    return "\n".join(items)
+
+# Request handler serving the synthetic pages (with latency and failure injection)
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    site = None  # MockSite serving the requests
+
+    def log_message(self, format, *args):
+        pass  # no access log
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))  # form data (any credentials are accepted)
+        if urlsplit(self.path).path == "/login":
+            self._redirect("/", cookie="session=mock")
+        else:
+            self._send(404, "Not found")
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+
+        if not self.site.inject(url.path):
+            self.close_connection = True  # connection dropped without a response (network error)
+            return
+        if self.site.failed(url.path):
+            self._send(503, PAGE.format(title="Service unavailable", body="<h1>Service unavailable</h1>"))
+            return
+
+        data = self.site.data
+        logged_in = "session=mock" in self.headers.get("Cookie", "")
+
+        if not parts:
+            self._send(200, PAGE.format(title="HealthUnlocked", body=HOME_BODY))
+        elif parts == ["login"]:
+            if logged_in:
+                self._redirect("/")
+            else:
+                self._send(200, PAGE.format(title="Log in", body=LOGIN_BODY))
+        elif parts == ["search", "posts"]:
+            self._send(200, self._search_page(query.get("query", [""])[0], int(query.get("page", ["1"])[0])))
+        elif parts[0] == "user" and len(parts) in (2, 3) and parts[1] in data.users:
+            if len(parts) == 2:
+                self._send(200, self._profile_page(parts[1]))
+            elif parts[2] in ("posts", "replies"):
+                offset = int(query.get("offset", ["0"])[0])
+                if "fragment" in query:
+                    self._send(200, render_post_items(data, parts[1], parts[2], offset))
+                else:
+                    self._send(200, self._tab_page(parts[1], parts[2]))
+            else:
+                self._send(404, "Not found")
+        elif len(parts) == 2 and "/" + parts[0] in data.communities and parts[1] == "about":
+            community = data.communities["/" + parts[0]]
+            body = f'<div data-sentry-component="Description">{escape(community["about"])}</div>'
+            self._send(200, PAGE.format(title=escape(community["name"]), body=body))
+        elif len(parts) == 2 and "/" + parts[0] in data.communities and parts[1] == "members":
+            self._send(200, self._members_page("/" + parts[0], int(query.get("page", ["1"])[0])))
+        else:
+            self._send(404, PAGE.format(title="Not found", body="<h1>Not found</h1>"))
+
+    def _search_page(self, keyword, page_number):
+        results = self.site.data.search(keyword)
+        start = (page_number - 1) * SEARCH_PAGE_SIZE
+        links = "\n".join(f'<div><a data-sentry-element="Link" href="/user/{username}">{username}</a></div>'
+                          for username in results[start:start + SEARCH_PAGE_SIZE])
+        if start + SEARCH_PAGE_SIZE < len(results):
+            links += f'\n<a href="/search/posts?query={quote_plus(keyword)}&page={page_number + 1}">Next page</a>'
+        return PAGE.format(title=f"Search: {escape(keyword)}", body=HOME_BODY + links)
+
+    def _profile_page(self, username):
+        user = self.site.data.users[username]
+        tags = "".join(f'<li><a href="/tag/{quote_plus(tag)}">{escape(tag)}</a></li>' for tag in user["tags"])
+        body = f'<h1>{username}</h1><ul data-sentry-component="HealthTags">{tags}</ul>'
+        for key, value in user["demographics"].items():
+            body += f'<div data-testid="profile__about_{key}">{escape(value)}</div>'
+        if user["bio"]:
+            body += f'<div data-sentry-component="ProfileBio">{escape(user["bio"])} <button>Read more</button></div>'
+        return PAGE.format(title=username, body=body)
+
+    def _tab_page(self, username, tab):
+        total = len(self.site.data.users[username][tab])
+        body = f'<div id="posts">{render_post_items(self.site.data, username, tab, 0)}</div>'
+        if total > POSTS_PAGE_SIZE:
+            body += SHOW_MORE_SCRIPT.format(offset=POSTS_PAGE_SIZE, page_size=POSTS_PAGE_SIZE, total=total)
+        return PAGE.format(title=f"{username} - {tab}", body=body)
+
+    def _members_page(self, comm_url, page_number):
+        community = self.site.data.communities[comm_url]
+        members = self.site.data.members[comm_url]
+        start = (page_number - 1) * MEMBERS_PAGE_SIZE
+        body = (f'<div data-sentry-component="Details"><h1>{escape(community["name"])}</h1>'
+                f'<span>{community["members_count"]:,} members</span>•<span>{community["posts_count"]:,} posts</span></div>')
+        for index, username in enumerate(members[start:start + MEMBERS_PAGE_SIZE], start=start):
+            badge = " <span>Admin</span>" if index == 0 else ""
+            body += f'<div class="community-member-card__username">{username}{badge}</div>'
+        if start + MEMBERS_PAGE_SIZE < len(members):
+            body += f'<a href="{comm_url}/members?filter=active&page={page_number + 1}">Next page</a>'
+        return PAGE.format(title=escape(community["name"]), body=body)
+
+    def _send(self, status, html):
+        content = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _redirect(self, location, cookie=None):
+        self.send_response(303)
+        self.send_header("Location", location)
+        if cookie:
+            self.send_header("Set-Cookie", f"{cookie}; Path=/")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+# Local stand-in for HealthUnlocked
+class MockSite:
+    """
+    Serve synthetic HealthUnlocked pages matching config.SELECTORS on http://127.0.0.1:<port>:
+    login (cookie banner, form), search results with 'Next page', profiles (tags, demographics, bio),
+    'Posts' / 'Replies' tabs with 'Show more posts', community 'About' and 'Members' pages.
+    Every response is delayed by `latency_ms` (+/- `jitter` as a fraction); with probability `failure_rate`
+    a request fails: "status" -> HTTP 503, "drop" -> connection closed without a response (network error).
+    The login page is never delayed or failed.
+    """
+    def __init__(self, port=0, latency_ms=0, jitter=0.5, failure_rate=0.0, failure_mode="status", data=None, seed=42):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.data = data or MockData(seed=seed)
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats = {"requests": 0, "failures": 0}
+
+        handler = type("Handler", (MockHandler,), {"site": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    def inject(self, path):
+        """
+        Delay a request; return False if its connection is dropped (failure_mode "drop").
+        """
+        with self.rng_lock:
+            self.stats["requests"] += 1
+        if path == "/login":
+            return True
+        if self.latency_ms:
+            time.sleep(self.latency_ms * (1 + self.jitter * (2 * self._random() - 1)) / 1000)
+        if self.failure_mode == "drop" and self._random() < self.failure_rate:
+            with self.rng_lock:
+                self.stats["failures"] += 1
+            return False
+        return True
+
+    def failed(self, path):
+        """
+        Return True if a request fails with HTTP 503 (failure_mode "status").
+        """
+        if path == "/login" or self.failure_mode != "status" or self._random() >= self.failure_rate:
+            return False
+        with self.rng_lock:
+            self.stats["failures"] += 1
+        return True
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    # python mock_site.py --port 8000 --latency 300 --failure-rate 0.05  (then: HU_BASE_URL=http://127.0.0.1:8000 python main.py)
+    parser = argparse.ArgumentParser(description="Serve a synthetic HealthUnlocked site for offline scraping and benchmarks.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0, help="mean delay of a response (ms)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="delay varies by +/- this fraction")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability that a request fails")
+    parser.add_argument("--failure-mode", choices=["status", "drop"], default="status")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--communities", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    site = MockSite(args.port, args.latency, args.jitter, args.failure_rate, args.failure_mode,
+                    MockData(users=args.users, communities=args.communities, seed=args.seed), args.seed)
+    print(f"Mock HealthUnlocked running on {site.url} (Ctrl+C to stop)")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        site.stop()
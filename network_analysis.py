@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import networkx as nx
+import numpy as np
+import community.community_louvain as community_louvain  # Louvain algo for community detection (modularity)
+
+from config import BIPARTITE_NETWORK_DIR, NETWORK_METRICS_FILE, NETWORK_ANALYSIS_WORKERS, NETWORK_ANALYSIS_SEED
+
+# Networks analyzed by default: {group label: edge file or directory of edge files} (labels as in the notebook's stats files)
+general_dir = os.path.join(BIPARTITE_NETWORK_DIR, "general_patterns")
+country_dir = os.path.join(general_dir, "demographics", "country")
+DEFAULT_NETWORKS = {
+    "cluster_co-occurrence_edges.json": os.path.join(general_dir, "cluster_co-occurrence_edges.json"),
+    "gender": os.path.join(general_dir, "demographics", "gender"),
+    "age": os.path.join(general_dir, "demographics", "age"),
+    "ethnicity": os.path.join(general_dir, "demographics", "ethnicity"),
+    "Australia - India - Canada - Ireland": os.path.join(country_dir, "Australia - India - Canada - Ireland"),
+    "UK - US": os.path.join(country_dir, "UK - US"),
+    "US - Canada": os.path.join(country_dir, "US - Canada"),
+    "UK - Ireland": os.path.join(country_dir, "UK - Ireland"),
+    "cluster_co-occurrence_edges_by_comm": os.path.join(BIPARTITE_NETWORK_DIR, "community-specific_patterns", "cluster_co-occurrence_edges_by_comm"),
+}
+
+FLOAT_DIGITS = 12  # stats are rounded, so that the last bits of sums over sets (order depends on the process' hash seed) do not change the output
+
+# Load an edge list as a weighted (undirected) graph
+def load_graph(json_path):
+    with open(json_path, "r", encoding="utf-8") as file:
+        edges = json.load(file)  # [{"source": cluster, "target": cluster, "weight": 2}, ...]
+
+    G = nx.Graph()
+    for entry in edges:
+        G.add_edge(entry["source"], entry["target"], weight=entry["weight"])
+    return G
+
+# Compute the stats of a cluster-cluster network
+def analyze_graph(G, label, seed=NETWORK_ANALYSIS_SEED):
+    """
+    Return the stats of the network_analysis notebook: size and density, (weighted) degree, clustering,
+    connected components and diameter, Louvain modularity (with a fixed `seed`), top 5 nodes by degree and
+    betweenness centrality and the top 5 cluster pairs by weight (in % of the total weight).
+    Floats are rounded to FLOAT_DIGITS decimals. A network without edges only gets its size.
+    """
+    analysis = {"label": label, "nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+    if G.number_of_edges() == 0:
+        return analysis
+
+    # 1. Basic stats
+    analysis["density"] = round(nx.density(G), FLOAT_DIGITS)
+
+    # 2. Degree (number of neighbours, sum of edge weights)
+    analysis["average_degree"] = round(float(np.mean([degree for _, degree in G.degree()])), FLOAT_DIGITS)
+    analysis["average_weighted_degree"] = round(float(np.mean([degree for _, degree in G.degree(weight="weight")])), FLOAT_DIGITS)
+
+    # 3. Connectedness: clustering coefficient, connected components, diameter of the largest component
+    analysis["average_clustering"] = round(float(np.mean(list(nx.clustering(G, weight="weight").values()))), FLOAT_DIGITS)
+    components = list(nx.connected_components(G))
+    largest_cc = max(components, key=len)
+    analysis["num_components"] = len(components)
+    analysis["largest_component_size"] = len(largest_cc)
+    analysis["diameter"] = nx.diameter(G.subgraph(largest_cc))
+
+    # 4. Modularity of the Louvain communities
+    partition = community_louvain.best_partition(G, random_state=seed)
+    analysis["modularity"] = round(community_louvain.modularity(partition, G), FLOAT_DIGITS)
+
+    # 5./6. Top 5 nodes by centrality
+    degree_centrality = {node: round(value, FLOAT_DIGITS) for node, value in nx.degree_centrality(G).items()}
+    betweenness_centrality = {node: round(value, FLOAT_DIGITS) for node, value in nx.betweenness_centrality(G, weight="weight").items()}
+    analysis["top5_degree_centrality"] = sorted(degree_centrality.items(), key=lambda x: x[1], reverse=True)[:5]
+    analysis["top5_betweenness_centrality"] = sorted(betweenness_centrality.items(), key=lambda x: x[1], reverse=True)[:5]
+
+    # 7. Top 5 strongest edges (relative weight in % of the total weight)
+    total_weight = sum(d["weight"] for _, _, d in G.edges(data=True))
+    strongest_edges = sorted(G.edges(data=True), key=lambda x: x[2]["weight"], reverse=True)[:5]
+    analysis["top5_cluster_pairs_by_weight"] = [(u, v, int((d["weight"] / total_weight) * 100)) for u, v, d in strongest_edges]
+
+    return analysis
+
+# Helper: analyze one edge file (runs in a worker process)
+def analyze_file(path, seed=NETWORK_ANALYSIS_SEED):
+    label = os.path.splitext(os.path.basename(path))[0]
+    return analyze_graph(load_graph(path), label, seed)
+
+# Helper: edge files of a network group (a single file or all edge files of a directory)
+def edge_files(path):
+    if os.path.isfile(path):
+        return [path]
+    return [os.path.join(path, file) for file in sorted(os.listdir(path))
+            if file.endswith(".json") and not file.startswith("pms")]  # skip the matched user ids of the country groups
+
+# Analyze all networks
+def analyze_networks(networks=None, workers=NETWORK_ANALYSIS_WORKERS, seed=NETWORK_ANALYSIS_SEED):
+    """
+    Analyze every edge file of {group label: edge file or directory} (default: DEFAULT_NETWORKS; missing paths are skipped)
+    across a process pool of `workers` processes (None -> number of CPUs; 1 -> in this process).
+    Return {group label: [stats of each network, sorted by file name]}; the result only depends on the files and `seed`.
+    """
+    networks = networks if networks is not None else DEFAULT_NETWORKS
+    groups = {}
+    for label, path in networks.items():
+        if not os.path.exists(path):
+            print(f"Skipping {label}: {path} not found.")
+            continue
+        groups[label] = edge_files(path)
+    paths = [path for files in groups.values() for path in files]
+
+    analyze = partial(analyze_file, seed=seed)
+    if workers == 1:
+        stats = list(map(analyze, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            stats = list(executor.map(analyze, paths, chunksize=8))
+
+    results = {}
+    stats = iter(stats)
+    for label, files in groups.items():
+        results[label] = [next(stats) for _ in files]
+    return results
+
+# Save the stats of all networks
+def save_network_metrics(results, output_path=NETWORK_METRICS_FILE):
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nNetwork stats saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    # python network_analysis.py [edge file or directory ...] [--workers 8]  -> stats of all networks in one file
+    parser = argparse.ArgumentParser(description="Compute the network stats of all cluster-cluster networks across a process pool.")
+    parser.add_argument("paths", nargs="*", help="edge files or directories of edge files (default: all networks in " + BIPARTITE_NETWORK_DIR + ")")
+    parser.add_argument("--workers", type=int, default=NETWORK_ANALYSIS_WORKERS, help="processes (default: number of CPUs)")
+    parser.add_argument("--seed", type=int, default=NETWORK_ANALYSIS_SEED, help="random state of the Louvain algorithm")
+    parser.add_argument("--output", default=NETWORK_METRICS_FILE)
+    args = parser.parse_args()
+
+    networks = {os.path.basename(os.path.normpath(path)): path for path in args.paths} if args.paths else None
+    start = time.perf_counter()
+    results = analyze_networks(networks, args.workers, args.seed)
+    save_network_metrics(results, args.output)
+    print(f"{sum(len(stats) for stats in results.values())} networks analyzed in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+from collections import deque
+
+from playwright.sync_api import sync_playwright
+
+from browser_setup import launch_browser, setup_context
+from scrapers import scrape_usernames_by_keyword, scrape_user_profiles, scrape_community_members, scrape_member_profiles
+from config import (KEYWORDS_FILE, CATEGORIES_OF_KEYWORDS, USERNAMES_BY_KEYWORD, USERNAMES_BY_KEYWORD_LIMIT,
+                    GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, POSTS_BY_USER_LIMIT, MEMBERS_BY_COMM, PAGINATION_LIMIT,
+                    PROFILES_BY_COMM_DATA, PROFILE_WORKERS, KEYWORD_WORKERS, PIPELINE_QUEUE_SIZE, PIPELINE_QUEUE_DIR)
+
+# Queue between two scraping stages (in memory)
+class StageQueue:
+    """
+    Bounded FIFO queue between a producing and a consuming stage.
+    put() blocks while `maxsize` items are waiting (backpressure); close() ends the stream (get() returns None).
+    The consumer calls ack(item) once the item is committed to the output files.
+    abandon() lifts the bound, so that a producer never blocks on a consumer that stopped.
+    """
+    def __init__(self, maxsize=PIPELINE_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        with self.condition:
+            while self.maxsize and len(self.items) >= self.maxsize and not self.closed:
+                self.condition.wait()
+            self._record_put(item)
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def get(self):
+        """
+        Return the next item, or None once the queue is closed and empty.
+        """
+        with self.condition:
+            while not self.items and not self.closed:
+                self.condition.wait()
+            item = self.items.popleft() if self.items else None
+            self.condition.notify_all()
+            return item
+
+    def ack(self, item):
+        pass  # nothing to persist in memory
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def abandon(self):
+        with self.condition:
+            self.maxsize = 0
+            self.condition.notify_all()
+
+    def _record_put(self, item):
+        pass
+
+# Queue between two scraping stages with a checkpoint on disk
+class DurableQueue(StageQueue):
+    """
+    StageQueue that appends every handed-over item ({"put": item}) and every committed item ({"ack": item})
+    to a JSONL checkpoint. After a crash the items handed over but not committed are put back first,
+    and items already handed over in the interrupted run are not handed over again (put() skips them).
+    remove() deletes the checkpoint after a complete run.
+    """
+    def __init__(self, path, maxsize=PIPELINE_QUEUE_SIZE):
+        super().__init__(maxsize)
+        self.path = path
+        self.seen = set()  # items ever handed over (JSON keys)
+        pending = {}  # items handed over but not committed {key: item}
+
+        if os.path.exists(path):
+            valid_size = 0  # bytes of complete records
+            with open(path, mode="rb") as log_file:
+                for line in log_file:
+                    try:
+                        record = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        break  # incomplete last record
+                    valid_size += len(line)
+                    if "put" in record:
+                        key = json.dumps(record["put"])
+                        self.seen.add(key)
+                        pending[key] = record["put"]
+                    else:
+                        pending.pop(json.dumps(record["ack"]), None)
+
+            # Cut off an incomplete last record, so that new records start on a new line
+            if valid_size < os.path.getsize(path):
+                with open(path, mode="r+b") as log_file:
+                    log_file.truncate(valid_size)
+            self.items.extend(pending.values())  # restored items ignore the bound
+            if pending:
+                print(f"Restored {len(pending)} pending items from {path}")
+
+        self.log = open(path, mode="a", encoding="utf-8")
+        self.log_lock = threading.Lock()
+
+    def put(self, item):
+        if json.dumps(item) in self.seen:
+            return  # handed over in an interrupted run already
+        super().put(item)
+
+    def _record_put(self, item):
+        self.seen.add(json.dumps(item))
+        self._append({"put": item})
+
+    def ack(self, item):
+        self._append({"ack": item})
+
+    def _append(self, record):
+        with self.log_lock:
+            self.log.write(json.dumps(record) + "\n")
+            self.log.flush()
+            os.fsync(self.log.fileno())
+
+    def remove(self):
+        with self.log_lock:
+            self.log.close()
+            os.remove(self.path)
+
+# Helper: run a stage in its own thread with its own browser (sync Playwright is bound to one thread)
+def _run_stage(name, storage_state, stage, input_queue, output_queue, errors):
+    try:
+        with sync_playwright() as p:
+            browser = launch_browser(p)
+            try:
+                context = setup_context(browser.new_context(storage_state=storage_state))  # logged-in session
+                stage(context.new_page())
+            finally:
+                browser.close()
+        print(f"Pipeline stage '{name}' finished.")
+    except Exception as e:
+        print(f"Pipeline stage '{name}' failed: {e}")
+        errors.append((name, e))
+    finally:
+        if output_queue is not None:
+            output_queue.close()  # downstream stage stops after the remaining items
+        if input_queue is not None:
+            input_queue.abandon()  # upstream stage must not wait for this stage anymore
+
+# Run the four scraping stages as a pipeline
+def run_pipeline(storage_state, queue_dir=PIPELINE_QUEUE_DIR):
+    """
+    Run the scraping stages at the same time, connected by bounded, durable queues:
+    keyword search -> usernames -> general profiles -> new communities -> community members
+    -> (community, members) -> member profiles.
+    Each stage starts on the first item of the previous one, so the wall time is about that of the slowest stage.
+    Output files are the same as in sequential mode. Queue checkpoints are kept in `queue_dir` until a run
+    completes; a restarted run first processes the items that were handed over but not committed.
+    Return True if all stages finished without error.
+    """
+    os.makedirs(queue_dir, exist_ok=True)
+    usernames_queue = DurableQueue(os.path.join(queue_dir, "usernames.jsonl"))
+    communities_queue = DurableQueue(os.path.join(queue_dir, "communities.jsonl"))
+    members_queue = DurableQueue(os.path.join(queue_dir, "members.jsonl"))
+    queues = [usernames_queue, communities_queue, members_queue]
+
+    stages = [
+        ("keyword search", None, usernames_queue,
+         lambda page: scrape_usernames_by_keyword(page, KEYWORDS_FILE, CATEGORIES_OF_KEYWORDS, USERNAMES_BY_KEYWORD,
+                                                  USERNAMES_BY_KEYWORD_LIMIT, KEYWORD_WORKERS, username_queue=usernames_queue)),
+        ("general profiles", usernames_queue, communities_queue,
+         lambda page: scrape_user_profiles(page, USERNAMES_BY_KEYWORD, GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, POSTS_BY_USER_LIMIT,
+                                           PROFILE_WORKERS, username_queue=usernames_queue, community_queue=communities_queue)),
+        ("community members", communities_queue, members_queue,
+         lambda page: scrape_community_members(page, UNIQUE_COMM_LIST, MEMBERS_BY_COMM, PAGINATION_LIMIT,
+                                               community_queue=communities_queue, members_queue=members_queue)),
+        ("member profiles", members_queue, None,
+         lambda page: scrape_member_profiles(page, MEMBERS_BY_COMM, PROFILES_BY_COMM_DATA, PROFILE_WORKERS,
+                                             members_queue=members_queue)),
+    ]
+
+    errors = []
+    threads = [
+        threading.Thread(target=_run_stage, args=(name, storage_state, stage, input_queue, output_queue, errors), daemon=True)
+        for name, input_queue, output_queue, stage in stages
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        print(f"Pipeline stopped with errors in: {[name for name, _ in errors]}. Queue checkpoints kept in {queue_dir}.")
+        return False
+
+    for stage_queue in queues:
+        stage_queue.remove()  # complete run: next run starts from scratch
+    return True
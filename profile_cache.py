@@ -0,0 +1,120 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from storage import JsonlStore
+from helpers import read_json
+from config import PROFILE_CACHE_ENABLED, PROFILE_CACHE_FILE, PROFILE_CACHE_TTL_DAYS, GENERAL_PROFILES_DATA, STATS_LOG_FILE
+
+# Cache of scraped profiles shared by the general and the community-specific profile scraping
+class ProfileCache:
+    """
+    Keep the profile data (tags, demographics, bio and, if known, communities) of every scraped username
+    together with the time it was scraped ({username: {"scraped_at": ..., "data": {...}}}).
+    A member of many communities (or a user already in the general dataset) is then loaded only once.
+    Entries older than PROFILE_CACHE_TTL_DAYS are treated as missing (None -> never expire).
+    The cache is persisted as an append-only log (see storage.JsonlStore) in PROFILE_CACHE_FILE.
+    """
+    def __init__(self, path=PROFILE_CACHE_FILE, ttl_days=PROFILE_CACHE_TTL_DAYS, enabled=PROFILE_CACHE_ENABLED):
+        self.path = path
+        self.ttl = timedelta(days=ttl_days) if ttl_days is not None else None
+        self.enabled = enabled
+        self.store = JsonlStore()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "seeded": 0}
+
+        if self.enabled:
+            self.entries = self.store.load(self.path)
+            self._seed(GENERAL_PROFILES_DATA)
+
+    def _seed(self, general_profiles_json):
+        # Add profiles of the general dataset that are not cached yet (scraped at: last change of the file)
+        if not os.path.exists(general_profiles_json):
+            return
+        scraped_at = datetime.fromtimestamp(os.path.getmtime(general_profiles_json)).isoformat(timespec="seconds")
+        for username, profile_data in read_json(general_profiles_json).items():
+            if username not in self.entries and profile_data:
+                self.store.put(self.path, [username], {"scraped_at": scraped_at, "data": profile_data})
+                self.stats["seeded"] += 1
+        self.store.compact(self.path)
+
+    def get(self, username, require_communities=False):
+        """
+        Return a copy of the cached profile data of a username, or None if it is not cached, expired
+        or (with require_communities) was scraped without the communities of the user.
+        """
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(username)
+            if entry is not None and self.ttl is not None:
+                if datetime.now() - datetime.fromisoformat(entry["scraped_at"]) > self.ttl:
+                    self.stats["expired"] += 1
+                    entry = None
+            if entry is None or (require_communities and "communities" not in entry["data"]):
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["hits"] += 1
+            return dict(entry["data"])
+
+    def put(self, username, profile_data):
+        """
+        Cache freshly scraped profile data of a username. Communities already known are kept.
+        """
+        if not self.enabled or not profile_data:
+            return
+
+        with self.lock:
+            entry = self.entries.get(username)
+            data = dict(profile_data)
+            if "communities" not in data and entry is not None and "communities" in entry["data"]:
+                data["communities"] = entry["data"]["communities"]
+            self.store.put(self.path, [username], {"scraped_at": datetime.now().isoformat(timespec="seconds"), "data": data})
+
+    def close(self):
+        """
+        Compact the cache log into PROFILE_CACHE_FILE.
+        """
+        if self.enabled:
+            self.store.close()
+
+    def log_stats(self):
+        """
+        Append hit/miss statistics of the cache to STATS_LOG_FILE.
+        """
+        if not self.enabled:
+            return
+
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = 100 * self.stats["hits"] / lookups if lookups else 0
+        with open(STATS_LOG_FILE, "a") as log_file:
+            log_file.write(f"\nProfile cache ({self.path}):\n")
+            log_file.write(f"-cached profiles: {len(self.entries)} (seeded from general profiles: {self.stats['seeded']})\n")
+            log_file.write(f"-lookups: {lookups}, hits: {self.stats['hits']} ({hit_rate:.1f}%), "
+                           f"misses: {self.stats['misses']} (expired: {self.stats['expired']})\n")
+        print(f"Statistics logged in {STATS_LOG_FILE}")
+
+# Cache used by the scrapers (one per process)
+_cache = None
+_cache_lock = threading.Lock()  # first use may happen in several pool workers at once
+
+def get_profile_cache():
+    """
+    Return the profile cache of this process (created and seeded on first use).
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProfileCache()
+    return _cache
+
+# Log statistics and persist the cache (end of a run)
+def log_cache_stats():
+    """
+    Log hit/miss statistics of the profile cache and compact its log (no-op if the cache was not used).
+    """
+    if _cache is not None:
+        _cache.log_stats()
+        _cache.close()
@@ -0,0 +1,381 @@
+import argparse
+import json
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+from scipy import sparse
+
+from config import (TAG_TO_CLUSTER_MAPPING, BIPARTITE_NETWORK_DIR, GENERAL_PROFILES_WITH_CLUSTERS, PROFILES_BY_COMM_WITH_CLUSTERS,
+                    PROJECTION_WORKERS, PROJECTION_CHUNK_SIZE)
+
+NO_CLUSTER = "N/A"  # cluster of a tag without a mapping (skipped like in the notebooks)
+
+# Helper: load a JSON file
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+# Helper: stream the entries of a JSON object file
+def iter_json_items(path):
+    """
+    Yield the (key, value) pairs of a JSON object file one by one, parsed incrementally with ijson (optional
+    dependency), so that only one entry is in memory at a time. Without ijson the whole file is loaded.
+    """
+    try:
+        import ijson
+    except ImportError:
+        print(f"ijson is not installed: loading the whole file {path}")
+        yield from load_json(path).items()
+        return
+    with open(path, "rb") as file:
+        yield from ijson.kvitems(file, "", use_float=True)
+
+# Helper: load the tag-to-cluster mapping
+def load_tag_to_cluster(path=TAG_TO_CLUSTER_MAPPING):
+    """
+    Return the mapping {tag: cluster} (see 'jupyter notebooks/bipartite_network.ipynb').
+    """
+    return load_json(path)
+
+# Helper: clusters of a user's tags
+def profile_clusters(profile, tag_to_cluster=None):
+    """
+    Return the clusters of a profile: its "tag_clusters" (profiles extended in the notebook)
+    or else its "tags" mapped with `tag_to_cluster`. Tags without a cluster ("N/A") are skipped.
+    """
+    if "tag_clusters" in profile:
+        clusters = profile["tag_clusters"]
+    elif tag_to_cluster is not None:
+        clusters = [tag_to_cluster.get(tag, NO_CLUSTER) for tag in profile.get("tags", [])]
+    else:
+        raise ValueError("Profile has no 'tag_clusters'; pass a tag-to-cluster mapping to map its 'tags'.")
+    return [cluster for cluster in clusters if cluster != NO_CLUSTER]
+
+# Build the user-cluster bipartite network
+def incidence_matrix(profiles, tag_to_cluster=None, clusters=None):
+    """
+    Build the sparse user x cluster incidence matrix B of profiles {username: profile}:
+    B[u, c] = 1 if user u has at least one tag in cluster c (repeated tags of a cluster count once,
+    like the neighbours in networkx.bipartite.weighted_projected_graph).
+    Columns follow `clusters` if given (other clusters are skipped), else the order of first appearance.
+    Users without any cluster get no row.
+    Return a tuple (B as scipy.sparse.csr_matrix, usernames, clusters).
+    """
+    return _incidence(profiles.items(), tag_to_cluster, clusters)
+
+def _incidence(items, tag_to_cluster=None, clusters=None):
+    """
+    incidence_matrix() of (key, profile) pairs; return the keys of the rows instead of the usernames.
+    """
+    fixed_clusters = clusters is not None
+    clusters = list(clusters) if fixed_clusters else []
+    cluster_index = {cluster: index for index, cluster in enumerate(clusters)}
+
+    keys = []
+    rows = []
+    columns = []
+    for key, profile in items:
+        user_columns = set()
+        for cluster in profile_clusters(profile, tag_to_cluster):
+            if cluster not in cluster_index:
+                if fixed_clusters:
+                    continue
+                cluster_index[cluster] = len(clusters)
+                clusters.append(cluster)
+            user_columns.add(cluster_index[cluster])
+        if not user_columns:
+            continue
+
+        rows.extend([len(keys)] * len(user_columns))
+        columns.extend(user_columns)
+        keys.append(key)
+
+    data = np.ones(len(rows), dtype=np.int32)
+    B = sparse.csr_matrix((data, (rows, columns)), shape=(len(keys), len(clusters)), dtype=np.int32)
+    return B, keys, clusters
+
+# Project onto the cluster-cluster network
+def co_occurrence_matrix(B):
+    """
+    Return the weighted projection C = Bᵀ·B of an incidence matrix (dense numpy array, clusters x clusters):
+    C[i, j] is the number of users with both clusters i and j, C[i, i] the number of users with cluster i.
+    """
+    return (B.T @ B).toarray()
+
+# Helper: edge list of a cluster-cluster network
+def edge_list(C, clusters):
+    """
+    Return the edges [{"source", "target", "weight"}, ...] of a co-occurrence matrix:
+    one edge per pair of clusters with weight > 0 (upper triangle, the diagonal is no edge).
+    """
+    sources, targets = np.nonzero(np.triu(C, k=1))
+    return [
+        {"source": clusters[source], "target": clusters[target], "weight": int(C[source, target])}
+        for source, target in zip(sources, targets)
+    ]
+
+# Project profiles onto their cluster-cluster network
+def project_profiles(profiles, tag_to_cluster=None):
+    """
+    Return the edges of the cluster-cluster co-occurrence network of profiles {username: profile}
+    (same edges and weights as networkx.bipartite.weighted_projected_graph in the notebook).
+    """
+    B, _, clusters = incidence_matrix(profiles, tag_to_cluster)
+    return edge_list(co_occurrence_matrix(B), clusters)
+
+# Save an edge list
+def save_edges(edges, path):
+    """
+    Save edges to a JSON file in the format of 'cluster_co-occurrence_edges.json'.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(edges, file, indent=2)
+    print(f"Projected cluster co-occurrence edges saved to: {path} ({len(edges)} edges)")
+
+
+# ==========================
+# Partitions (one network per group of users, e.g. per gender or per community)
+# ==========================
+
+# Partition of the profiles into groups
+class Partition:
+    """
+    A partition of the profiles into groups with one cluster-cluster network each:
+    `groups(username, profile)` returns the groups of a profile (empty -> in no group) and
+    `output` is the path of a group's edge file relative to BIPARTITE_NETWORK_DIR ("{group}" -> group name).
+    `groups` is pickled for the worker processes, so it is a module-level function (or a functools.partial of one).
+    """
+    def __init__(self, name, groups, output):
+        self.name = name
+        self.groups = groups
+        self.output = output
+
+    def path(self, group, output_dir=BIPARTITE_NETWORK_DIR):
+        return os.path.join(output_dir, self.output.format(group=group))
+
+# Helper: demographic field of a profile
+def _demographic(profile, field):
+    return (profile.get("demographics", {}).get(field) or "N/A").strip()
+
+# Groups: all users (global network)
+def all_users(username, profile):
+    return ["global"]
+
+# Groups: gender ("male", "female"; "N/A" and "Others" are skipped)
+def by_gender(username, profile):
+    gender = _demographic(profile, "gender").lower()
+    return [gender] if gender in ("male", "female") else []
+
+# Groups: age group
+def age_group(age):
+    """
+    Return the age group of an age ("18-30", "30-50", "50-70", "70+"; None if under 18 or not a number).
+    """
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return None
+    if age < 18:
+        return None
+    elif age <= 30:
+        return "18-30"
+    elif age <= 50:
+        return "30-50"
+    elif age <= 70:
+        return "50-70"
+    return "70+"
+
+def by_age(username, profile):
+    group = age_group(_demographic(profile, "age"))
+    return [group] if group else []
+
+# Groups: ethnicity (one of `ethnicities`)
+def by_ethnicity(username, profile, ethnicities=("white", "asian", "black", "latino")):
+    ethnicity = _demographic(profile, "ethnicity").lower()
+    return [ethnicity] if ethnicity in ethnicities else []
+
+# Groups: country (one of `countries`, optionally only users matched by propensity score matching)
+def by_country(username, profile, countries, matched_users=None):
+    country = _demographic(profile, "country")
+    if country not in countries or (matched_users is not None and username not in matched_users):
+        return []
+    return [country]
+
+# Groups: community of a profile by community (see community_records)
+def by_community(username, profile):
+    """
+    Return the community as file name prefix ("/pmrgcauk" -> "pmrgcauk").
+    """
+    return [profile["community"].strip("/").replace("/", "_")]
+
+# Helper: country partition (optionally only with the users matched by propensity score matching in the notebook)
+def _country_partition(countries, folder, matched=False, output_dir=BIPARTITE_NETWORK_DIR):
+    """
+    Return the partition of a country group, or None if it needs the matched users and
+    its 'pms_matched_user_ids.json' does not exist (the unmatched networks would overwrite the matched ones).
+    """
+    output = os.path.join("general_patterns", "demographics", "country", folder, "cluster_co-occurrence_{group}.json")
+    matched_users = None
+    if matched:
+        matched_path = os.path.join(output_dir, "general_patterns", "demographics", "country", folder, "pms_matched_user_ids.json")
+        if not os.path.exists(matched_path):
+            print(f"Skipping country group '{folder}': {matched_path} not found.")
+            return None
+        matched_users = {username for usernames in load_json(matched_path).values() for username in usernames}
+    return Partition(f"country: {folder}", partial(by_country, countries=countries, matched_users=matched_users), output)
+
+# Partitions of the general profiles (as in the notebook)
+def general_partitions(output_dir=BIPARTITE_NETWORK_DIR):
+    """
+    Return the partitions of the general profiles: the global network and the demographic subgroups
+    (gender, age, ethnicity and the country groups; "UK - US", "US - Canada" and "UK - Ireland" only with
+    the users in their 'pms_matched_user_ids.json').
+    """
+    demographics = os.path.join("general_patterns", "demographics")
+    partitions = [
+        Partition("global", all_users, os.path.join("general_patterns", "cluster_co-occurrence_edges.json")),
+        Partition("gender", by_gender, os.path.join(demographics, "gender", "cluster_co-occurrence_{group}.json")),
+        Partition("age", by_age, os.path.join(demographics, "age", "cluster_co-occurrence_{group}.json")),
+        Partition("ethnicity", by_ethnicity, os.path.join(demographics, "ethnicity", "cluster_co-occurrence_{group}.json")),
+        _country_partition(["Australia", "India", "Canada", "Ireland"], "Australia - India - Canada - Ireland", output_dir=output_dir),
+        _country_partition(["United Kingdom", "United States"], "UK - US", matched=True, output_dir=output_dir),
+        _country_partition(["United States", "Canada"], "US - Canada", matched=True, output_dir=output_dir),
+        _country_partition(["United Kingdom", "Ireland"], "UK - Ireland", matched=True, output_dir=output_dir),
+    ]
+    return [partition for partition in partitions if partition is not None]
+
+# Partition of the profiles by community
+def community_partitions():
+    return [
+        Partition("community", by_community,
+                  os.path.join("community-specific_patterns", "cluster_co-occurrence_edges_by_comm", "{group}_co-occurrence.json")),
+    ]
+
+# Helper: records of the profiles by community
+def community_records(profiles_by_comm):
+    """
+    Yield (username, profile) of every member of every community of the pairs (community_url, {username: profile}),
+    e.g. the items() of the profiles by community or iter_json_items() of their file;
+    the profile gets the key "community" (see by_community).
+    """
+    for comm_url, users in profiles_by_comm:
+        for username, profile in users.items():
+            yield username, {**profile, "community": comm_url}
+
+# Helper: project one chunk of profiles onto the networks of all groups
+def _project_chunk(records, partitions, tag_to_cluster):
+    """
+    Return (clusters, {(partition name, group): co-occurrence matrix}) of a list of (username, profile).
+    The incidence matrix is built once; each group projects its rows of it.
+    """
+    B, kept, clusters = _incidence(((index, profile) for index, (_, profile) in enumerate(records)), tag_to_cluster)
+    group_rows = defaultdict(list)
+    for row, index in enumerate(kept):
+        username, profile = records[index]
+        for partition in partitions:
+            for group in partition.groups(username, profile):
+                group_rows[(partition.name, group)].append(row)
+    return clusters, {key: co_occurrence_matrix(B[rows]) for key, rows in group_rows.items()}
+
+# Helper: chunks of a stream of records
+def _chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# Project all partitions in one pass
+def project_partitions(records, partitions, tag_to_cluster=None, workers=PROJECTION_WORKERS, chunk_size=PROJECTION_CHUNK_SIZE):
+    """
+    Read a stream of (username, profile) once and project the network of every group of every partition.
+    The records are projected in chunks (in `workers` processes if > 1, with at most two chunks per worker
+    submitted at a time, so that the stream is not read ahead); the co-occurrence counts of the chunks add up
+    (Bᵀ·B is a sum over users), so a user must only appear once per group.
+    Return {(partition name, group): edges}.
+    """
+    clusters = []
+    cluster_index = {}
+    totals = {}
+
+    def merge(result):
+        chunk_clusters, matrices = result
+        for cluster in chunk_clusters:
+            if cluster not in cluster_index:
+                cluster_index[cluster] = len(clusters)
+                clusters.append(cluster)
+        indices = np.array([cluster_index[cluster] for cluster in chunk_clusters], dtype=np.intp)
+        for key, C in matrices.items():
+            total = totals.setdefault(key, defaultdict(int))  # a group with users but without pairs has an empty edge list
+            sources, targets = np.nonzero(np.triu(C, k=1))
+            for source, target in zip(sources, targets):
+                pair = tuple(sorted((indices[source], indices[target])))
+                total[pair] += int(C[source, target])
+
+    chunks = _chunks(records, chunk_size)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = deque()  # submitted chunks, merged in input order
+            for chunk in chunks:
+                futures.append(executor.submit(_project_chunk, chunk, partitions, tag_to_cluster))
+                if len(futures) >= 2 * workers:
+                    merge(futures.popleft().result())
+            while futures:
+                merge(futures.popleft().result())
+    else:
+        for chunk in chunks:
+            merge(_project_chunk(chunk, partitions, tag_to_cluster))
+
+    return {
+        key: [{"source": clusters[source], "target": clusters[target], "weight": weight}
+              for (source, target), weight in sorted(total.items())]
+        for key, total in totals.items()
+    }
+
+# Save the edge files of all partitions
+def save_partitions(edges_by_group, partitions, output_dir=BIPARTITE_NETWORK_DIR):
+    """
+    Save the edges of every group to its file (see Partition.output). Return the number of files.
+    """
+    partitions_by_name = {partition.name: partition for partition in partitions}
+    for (name, group), edges in edges_by_group.items():
+        save_edges(edges, partitions_by_name[name].path(group, output_dir))
+    return len(edges_by_group)
+
+
+if __name__ == "__main__":
+    # python projection.py [--only general|communities] [--workers 4]  -> all cluster-cluster edge files in one run
+    parser = argparse.ArgumentParser(description="Project the profiles onto the cluster-cluster networks of all partitions "
+                                                 "(global, demographic subgroups, communities) in one pass per profiles file.")
+    parser.add_argument("--profiles", default=GENERAL_PROFILES_WITH_CLUSTERS, help="general profiles {username: profile}")
+    parser.add_argument("--profiles-by-comm", default=PROFILES_BY_COMM_WITH_CLUSTERS, help="profiles by community {community_url: {username: profile}}")
+    parser.add_argument("--tag-to-cluster", default=TAG_TO_CLUSTER_MAPPING, help="mapping for profiles without 'tag_clusters'")
+    parser.add_argument("--only", choices=["general", "communities"], default=None)
+    parser.add_argument("--output-dir", default=BIPARTITE_NETWORK_DIR)
+    parser.add_argument("--workers", type=int, default=PROJECTION_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=PROJECTION_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    tag_to_cluster = load_tag_to_cluster(args.tag_to_cluster)
+    runs = []
+    if args.only != "communities":
+        runs.append((args.profiles, lambda items: items, general_partitions(args.output_dir)))
+    if args.only != "general":
+        runs.append((args.profiles_by_comm, community_records, community_partitions()))
+
+    for path, records, partitions in runs:
+        if not os.path.exists(path):
+            print(f"Skipping {path}: file not found.")
+            continue
+        start = time.perf_counter()
+        edges_by_group = project_partitions(records(iter_json_items(path)), partitions, tag_to_cluster, args.workers, args.chunk_size)
+        files = save_partitions(edges_by_group, partitions, args.output_dir)
+        print(f"\n{path}: {files} networks projected in {time.perf_counter() - start:.2f} s")
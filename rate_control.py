@@ -0,0 +1,265 @@
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, asynccontextmanager
+from urllib.parse import urlsplit
+
+from config import (NETWORK_ERRORS, HOST_REQUESTS_PER_SECOND, RATE_LIMIT_BURST, BACKOFF_BASE, BACKOFF_MAX,
+                    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN, ADAPTIVE_CONCURRENCY, CONCURRENCY_MIN, CONCURRENCY_MAX,
+                    LATENCY_TARGET, STATS_LOG_FILE)
+
+POLL_INTERVAL = 0.05  # (s) interval to check for a free concurrency slot
+
+# Token bucket: at most `rate` requests per second with bursts of up to `burst` requests
+class TokenBucket:
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and return the time (s) to wait until it is available (0 if available now).
+        """
+        if not self.rate:
+            return 0
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0, -self.tokens / self.rate)
+
+# Exponential backoff with full jitter
+class Backoff:
+    def __init__(self, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt):
+        """
+        Return a random delay (s) between 0 and base * 2^attempt (at most `cap`).
+        """
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+# Circuit breaker: pause all requests after many network errors in a row
+class CircuitBreaker:
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0  # network errors in a row
+        self.open_until = 0  # monotonic time until which no request is started
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def record(self, failed):
+        with self.lock:
+            if not failed:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.open_until = self.clock() + self.cooldown
+                self.failures = 0  # half-open after the cooldown: the next error opens it again only after a new series
+                self.trips += 1
+                print(f"Circuit breaker open: {self.failure_threshold} network errors in a row. Pausing {self.cooldown} s.")
+
+    def wait_time(self):
+        return max(0, self.open_until - self.clock())
+
+# Adaptive concurrency limit: additive increase, multiplicative decrease (AIMD)
+class AdaptiveConcurrency:
+    """
+    Allow `limit` requests at the same time. Every request that finishes fast (latency below LATENCY_TARGET) and without
+    a network error raises the limit by 1/limit (about +1 per round of requests); a slow or failed request halves it.
+    """
+    def __init__(self, minimum=CONCURRENCY_MIN, maximum=CONCURRENCY_MAX, latency_target=LATENCY_TARGET, enabled=ADAPTIVE_CONCURRENCY):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.enabled = enabled
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        with self.lock:
+            if self.in_flight < max(1, int(self.limit)):
+                self.in_flight += 1
+                return True
+            return False
+
+    def release(self, latency, failed):
+        with self.lock:
+            self.in_flight -= 1
+            if not self.enabled:
+                return
+            if failed or latency > self.latency_target:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+# Throttling, backoff, circuit breaker and concurrency for all requests to HealthUnlocked
+class RateController:
+    """
+    Shared by the sync scrapers (incl. pool workers and the HTTP fetcher) and the async engine:
+    - throttle(url): wait for a token of the host's bucket (HOST_REQUESTS_PER_SECOND, RATE_LIMIT_BURST)
+    - request(url) / async_request(url): wrap one request, i.e. a navigation or HTTP GET (circuit breaker,
+      token of the target host, concurrency slot; its latency and outcome drive the breaker and the AIMD limit)
+    - retry_delay(attempt): exponential backoff with jitter before the next task attempt
+    """
+    def __init__(self):
+        self.buckets = defaultdict(lambda: TokenBucket(HOST_REQUESTS_PER_SECOND, RATE_LIMIT_BURST))  # {host: bucket}
+        self.buckets_lock = threading.Lock()
+        self.backoff = Backoff()
+        self.breaker = CircuitBreaker()
+        self.concurrency = AdaptiveConcurrency()
+        self.stats = {"requests": 0, "errors": 0, "network_errors": 0, "throttled_seconds": 0.0, "backoff_seconds": 0.0}
+        self.stats_lock = threading.Lock()
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc if url else ""
+        with self.buckets_lock:
+            return self.buckets[host]
+
+    def _count(self, key, value=1):
+        with self.stats_lock:
+            self.stats[key] += value
+
+    def throttle(self, url=None):
+        """
+        Block until a request to the host of the URL may start.
+        """
+        delay = self.breaker.wait_time() + self._bucket(url).reserve()
+        if delay:
+            self._count("throttled_seconds", delay)
+            time.sleep(delay)
+
+    async def async_throttle(self, url=None):
+        """
+        Async version of throttle.
+        """
+        delay = self.breaker.wait_time() + self._bucket(url).reserve()
+        if delay:
+            self._count("throttled_seconds", delay)
+            await asyncio.sleep(delay)
+
+    def acquire(self, url=None):
+        """
+        Wait for a concurrency slot and a token of the URL's host. Return the start time to pass to release().
+        """
+        while not self.concurrency.try_acquire():
+            time.sleep(POLL_INTERVAL)
+        self.throttle(url)
+        return time.monotonic()
+
+    async def async_acquire(self, url=None):
+        """
+        Async version of acquire.
+        """
+        while not self.concurrency.try_acquire():
+            await asyncio.sleep(POLL_INTERVAL)
+        await self.async_throttle(url)
+        return time.monotonic()
+
+    @contextmanager
+    def request(self, url=None):
+        """
+        Wrap one request to the host of the URL: acquire() before, release() with its latency and error after
+        (the exception is re-raised).
+        """
+        start = self.acquire(url)
+        error_message = None
+        try:
+            yield
+        except Exception as e:
+            error_message = str(e).lower()
+            raise
+        finally:
+            self.release(start, error_message)
+
+    @asynccontextmanager
+    async def async_request(self, url=None):
+        """
+        Async version of request.
+        """
+        start = await self.async_acquire(url)
+        error_message = None
+        try:
+            yield
+        except Exception as e:
+            error_message = str(e).lower()
+            raise
+        finally:
+            self.release(start, error_message)
+
+    def release(self, start, error_message=None):
+        """
+        Free the concurrency slot and record the outcome of a request (error_message None -> success).
+        Network errors (NETWORK_ERRORS) trip the circuit breaker and lower the concurrency.
+        """
+        network_error = is_network_error(error_message)
+        self.concurrency.release(time.monotonic() - start, network_error)
+        self.breaker.record(network_error)
+        self._count("requests")
+        if error_message is not None:
+            self._count("errors")
+        if network_error:
+            self._count("network_errors")
+
+    def retry_delay(self, attempt):
+        """
+        Return the backoff (s) before retry number `attempt` (0-based).
+        """
+        delay = self.backoff.delay(attempt)
+        self._count("backoff_seconds", delay)
+        return delay
+
+    def log_stats(self):
+        """
+        Append request outcomes, time spent waiting and the final concurrency limit to STATS_LOG_FILE.
+        """
+        if not self.stats["requests"]:
+            return
+        with open(STATS_LOG_FILE, "a") as log_file:
+            log_file.write("\nRate control:\n")
+            log_file.write(f"-requests: {self.stats['requests']}, errors: {self.stats['errors']} "
+                           f"(network: {self.stats['network_errors']}), circuit breaker trips: {self.breaker.trips}\n")
+            log_file.write(f"-throttled: {self.stats['throttled_seconds']:.0f} s, backoff: {self.stats['backoff_seconds']:.0f} s, "
+                           f"concurrency limit at the end: {self.concurrency.limit:.1f}\n")
+        print(f"Statistics logged in {STATS_LOG_FILE}")
+
+# Helper: classify an error message
+def is_network_error(error_message):
+    """
+    Return True if the (lowercase) error message contains one of NETWORK_ERRORS.
+    """
+    return error_message is not None and any(err in error_message for err in NETWORK_ERRORS)
+
+# Controller used by all scrapers (one per process)
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_rate_controller():
+    """
+    Return the rate controller of this process.
+    """
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = RateController()
+    return _controller
+
+# Log statistics (end of a run)
+def log_rate_stats():
+    """
+    Log the statistics of the rate controller (no-op if it was not used).
+    """
+    if _controller is not None:
+        _controller.log_stats()
@@ -0,0 +1,154 @@
+import time
+from collections import defaultdict
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from config import (SELECTORS, READY_SELECTORS, READY_MIN_TIMEOUT, READY_MAX_TIMEOUT, READY_TIMEOUT_FACTOR,
+                    READY_MIN_SAMPLES, STATS_LOG_FILE)
+
+# Observed waits per page type (shared by sync and async scrapers)
+wait_times = defaultdict(list)  # successful waits in ms {page_type: [ms, ...]}
+wait_timeouts = defaultdict(int)  # number of waits that ran into the timeout {page_type: count}
+wait_total_ms = defaultdict(float)  # time spent waiting incl. timeouts and the network idle fallback {page_type: ms}
+
+# Helper: record a finished wait
+def _record_wait(page_type, start, ready):
+    elapsed = (time.perf_counter() - start) * 1000
+    wait_total_ms[page_type] += elapsed
+    if ready:
+        wait_times[page_type].append(elapsed)
+    else:
+        wait_timeouts[page_type] += 1
+
+# Adaptive timeout of a page type
+def get_ready_timeout(page_type):
+    """
+    Return the timeout (ms) for waiting on a page type: READY_TIMEOUT_FACTOR times the 95th percentile
+    of the observed waits, bounded by READY_MIN_TIMEOUT and READY_MAX_TIMEOUT.
+    Use READY_MAX_TIMEOUT until READY_MIN_SAMPLES waits have been observed.
+    """
+    samples = wait_times[page_type]
+    if len(samples) < READY_MIN_SAMPLES:
+        return READY_MAX_TIMEOUT
+
+    p95 = sorted(samples)[int(0.95 * (len(samples) - 1))]
+    return int(min(READY_MAX_TIMEOUT, max(READY_MIN_TIMEOUT, READY_TIMEOUT_FACTOR * p95)))
+
+# Wait until a page is ready (sync API)
+def wait_for_ready(page, page_type):
+    """
+    Wait for the element of the page type (READY_SELECTORS) to be attached, or for network idle
+    if the page type has no selector. If the element does not show up (e.g. a user without posts),
+    settle on network idle for a short time instead of failing.
+    Record the wait time of the page type. Return True if the page was ready before the timeout.
+    """
+    timeout = get_ready_timeout(page_type)
+    selector_key = READY_SELECTORS.get(page_type)
+    start = time.perf_counter()
+
+    try:
+        if selector_key:
+            page.wait_for_selector(SELECTORS[selector_key], state="attached", timeout=timeout)
+        else:
+            page.wait_for_load_state("networkidle", timeout=timeout)
+        _record_wait(page_type, start, True)
+        return True
+    except PlaywrightTimeoutError:
+        print(f"Page '{page_type}' not ready after {timeout} ms. Waiting for network idle...")
+        try:
+            page.wait_for_load_state("networkidle", timeout=READY_MIN_TIMEOUT)
+        except PlaywrightTimeoutError:
+            pass
+        _record_wait(page_type, start, False)
+        return False
+
+# Wait until new items are loaded (sync API)
+def wait_for_more_items(page, selector, count_before, page_type="show_more"):
+    """
+    Wait until more elements than `count_before` match the selector (e.g. after clicking 'Show more posts').
+    Record the wait time. Return True if new elements were loaded before the timeout.
+    """
+    timeout = get_ready_timeout(page_type)
+    start = time.perf_counter()
+
+    try:
+        page.wait_for_function(
+            "([selector, count]) => document.querySelectorAll(selector).length > count",
+            arg=[selector, count_before],
+            timeout=timeout
+        )
+        _record_wait(page_type, start, True)
+        return True
+    except PlaywrightTimeoutError:
+        _record_wait(page_type, start, False)
+        return False
+
+# Wait until a page is ready (async API)
+async def async_wait_for_ready(page, page_type):
+    """
+    Async version of wait_for_ready.
+    """
+    timeout = get_ready_timeout(page_type)
+    selector_key = READY_SELECTORS.get(page_type)
+    start = time.perf_counter()
+
+    try:
+        if selector_key:
+            await page.wait_for_selector(SELECTORS[selector_key], state="attached", timeout=timeout)
+        else:
+            await page.wait_for_load_state("networkidle", timeout=timeout)
+        _record_wait(page_type, start, True)
+        return True
+    except PlaywrightTimeoutError:
+        print(f"Page '{page_type}' not ready after {timeout} ms. Waiting for network idle...")
+        try:
+            await page.wait_for_load_state("networkidle", timeout=READY_MIN_TIMEOUT)
+        except PlaywrightTimeoutError:
+            pass
+        _record_wait(page_type, start, False)
+        return False
+
+# Wait until new items are loaded (async API)
+async def async_wait_for_more_items(page, selector, count_before, page_type="show_more"):
+    """
+    Async version of wait_for_more_items.
+    """
+    timeout = get_ready_timeout(page_type)
+    start = time.perf_counter()
+
+    try:
+        await page.wait_for_function(
+            "([selector, count]) => document.querySelectorAll(selector).length > count",
+            arg=[selector, count_before],
+            timeout=timeout
+        )
+        _record_wait(page_type, start, True)
+        return True
+    except PlaywrightTimeoutError:
+        _record_wait(page_type, start, False)
+        return False
+
+# Log wait statistics
+def log_wait_stats():
+    """
+    Append wait times per page type (count, mean, median, 95th percentile, max, timeouts, current timeout)
+    to STATS_LOG_FILE, so that READY_* settings can be tuned.
+    """
+    page_types = sorted(set(wait_times) | set(wait_timeouts))
+    if not page_types:
+        return
+
+    with open(STATS_LOG_FILE, "a") as log_file:
+        log_file.write("\nPage readiness waits (ms):\n")
+        for page_type in page_types:
+            samples = sorted(wait_times[page_type])
+            if samples:
+                mean = sum(samples) / len(samples)
+                median = samples[len(samples) // 2]
+                p95 = samples[int(0.95 * (len(samples) - 1))]
+                log_file.write(f"-{page_type}: {len(samples)} waits, mean {mean:.0f}, median {median:.0f}, "
+                               f"p95 {p95:.0f}, max {samples[-1]:.0f}, timeouts {wait_timeouts[page_type]}, "
+                               f"current timeout {get_ready_timeout(page_type)}\n")
+            else:
+                log_file.write(f"-{page_type}: 0 waits, timeouts {wait_timeouts[page_type]}\n")
+    print(f"Statistics logged in {STATS_LOG_FILE}")
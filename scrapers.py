@@ -1,507 +1,296 @@
-from datetime import datetime
-import re
-
-from helpers import write_to_json, read_json, pagination
-from config import SELECTORS, MAX_RETRIES, ERROR_LOG_FILE, STATS_LOG_FILE, FAILED_USERNAMES_LOG, FAILED_COMMUNITIES_LOG, FAILED_MEMBERS_LOG
-from keywords_handler import load_and_process_keywords_from_csv
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+
+from helpers import goto, pagination, show_more_posts
+from readiness import wait_for_ready
+from browser_pool import scrape_in_pool
+from profile_cache import get_profile_cache
+from rate_control import get_rate_controller
+from metrics import timed_stage, page_timer
+from extraction import (extract_fields, extract_community_urls, read_fields, parse_profile_fields, parse_community_metadata,
+                        add_member_usernames)
+from fetchers import get_fetcher, get_http_fetcher
+from stages import KeywordStage, ProfileStage, CommunityStage, MemberStage, TabCommunities, members_url, member_page_windows
+from config import BASE_URL, SELECTORS, BULK_EXTRACTION, FETCH_MODE, MEMBERS_PAGINATION, MEMBER_PAGE_WORKERS, SEARCH_URL_TEMPLATE
 
 # Perform global search by a keyword and gather usernames
-def scrape_usernames_by_keyword(page, keywords_csv, categories, output_json, usernames_limit):
+@timed_stage("keywords")
+def scrape_usernames_by_keyword(page, keywords_csv, categories, output_json, usernames_limit, workers=1,
+                                storage_state=None, username_queue=None, only_failed=False):
     """
     Perform global search on HealthUnlocked for each keyword from the provided categories.
     Collect usernames from posts and save the results into a JSON file.
-    Each keyword is assigned to a category for structed search i.e. { "Mental Health": ["depression", "anxiety"]}.
-    Handle variations in keywords (e.g. "smoke" - "smoking") using NLTK.
-    Logs statistics on how many usernames were collected per category and in total.
+    Keywords, work queue, streaming of new usernames and statistics: see stages.KeywordStage.
+    With workers > 1 the keywords are searched on a pool of browser contexts (same output as serial mode).
     """
-    # Load and extend the original list of keywords by their lemmas
-    keywords = load_and_process_keywords_from_csv(keywords_csv)  # extended list of keywords by their lemmas (e.g. smoking -> smoke)
-    
-    # Identify which passed categories are valid
-    valid_categories = []
-    for category in categories:
-        if category in keywords:  # check if category exists as a key in original 'keywords' dict
-            valid_categories.append(category)
-    if not valid_categories:
-        print(f"Error: None of the provided categories {categories} exist in the keywords CSV file.")
-        return  # exit    
-    print(f"Perform search for validated categories: {valid_categories}")
-
-    usernames_data = {}
-    category_stats = {}  # track usernames collected per category
-
-    for category in valid_categories:  # iterate by (valid) categories in dict { "Mental Health": ["depression", "anxiety"]}
-        keyword_list = keywords[category]
-        print(f"Process category: {category} with keywords: {keyword_list}")
-
-        category_count = 0  # track number of usernames for the current category        
-        for keyword in keyword_list:
-            print(f"Searching for keyword: {keyword} (Category: {category})")
-
-            user_post_count= {}  # track post count per user
-            retries = 0  # track number of retries to scrape
-
-            while retries < MAX_RETRIES:
-                try:
-                    # Reload page before retrying
-                    if retries > 0:
-                        print(f"Retry {retries} for keyword: {keyword}")
-                        page.reload()
-                        page.wait_for_timeout(2000)
-
-                    # Global search on HU using a keyword
-                    page.goto("https://healthunlocked.com/")
-                    page.fill(SELECTORS["search_input"], keyword)
-                    page.keyboard.press("Enter")
-                    page.wait_for_timeout(2000)
-
-                    print(f"-------- Keyword: {keyword} --------")
-
-                    while True:
-                        # Find all post elements which are the serach results
-                        post_elements = page.locator(SELECTORS["post_items_search_results"]).all()
-
-                        for post in post_elements:
-                            username = post.text_content().strip()
-                            if username:
-                                user_post_count[username] = user_post_count.get(username, 0) + 1
-                            
-                        # Stop collection if the limit is reached (entire page processing) OR no 'Next Page'
-                        if len(user_post_count) >= usernames_limit or not pagination(page, "text=Next page"):
-                            print(f"Reached limit of {usernames_limit} distinct usernames OR no more pages -> stop pagination.")
-                            break
-            
-                    # Append collected data for this keyword
-                    for username, count in user_post_count.items():
-                        if username not in usernames_data:
-                            usernames_data[username] = {}  # create a sub-dictionary for the username
-                        usernames_data[username][keyword] = count  # update the counter
-                        category_count += 1
-
-                    # Save progress after each keyword
-                    write_to_json(output_json, usernames_data)
+    stage = KeywordStage(keywords_csv, categories, output_json, username_queue, only_failed)
+    if not stage.valid_categories:
+        return  # exit
 
-                    break  # exit retry block if success
+    # Search keywords of all (valid) categories: { "Mental Health": ["depression", "anxiety"]}
+    search_results = scrape_in_pool(page, stage.items(),
+                                    lambda current_page, item: search_keyword(current_page, item, usernames_limit), workers, storage_state)
+    for item, user_post_count, error_message in search_results:
+        stage.commit(item, user_post_count, error_message)
 
-                except Exception as e:  # unexpected error occurs
-                    error_message = str(e).lower()
+    stage.close()
 
-                    retries += 1
-                    print(f"Error on keyword '{keyword}': {error_message}. Retrying ({retries}/{MAX_RETRIES})...")
-
-                    # Handle network error
-                    network_errors = ["ns_error", "timeout", "connection", "network", "reset", "refused", "aborted", "failed"]
-
-                    if any(err in error_message for err in network_errors):
-                        print(f"Network issue {error_message} for {keyword}. Reconnecting...")
-                        page.wait_for_timeout(15000)
-                    
-                    page.reload()
-                    page.wait_for_timeout(2000)
-
-            if retries == MAX_RETRIES:
-                with open(ERROR_LOG_FILE, "a") as log_file:
-                    log_file.write(f"{keyword} | Error: {error_message}\n")
-                print(f"Logged failed keyword: {keyword}")
+# Helper: Global search on HU using a keyword
+def search_keyword(page, item, usernames_limit):
+    """
+    Open the search results of a keyword (by URL, see SEARCH_URL_TEMPLATE, or by typing into the search box)
+    and collect usernames with their post count from the result pages until `usernames_limit` distinct usernames.
+    `item` is a tuple (category, keyword).
+    """
+    category, keyword = item
+    print(f"-------- Keyword: {keyword} (Category: {category}) --------")
+
+    # Open the result page directly; use the search box if it shows no results (e.g. changed URL scheme)
+    results_shown = False
+    with page_timer("search"):
+        if SEARCH_URL_TEMPLATE:
+            goto(page, SEARCH_URL_TEMPLATE.format(keyword=quote_plus(keyword)))
+            results_shown = wait_for_ready(page, "search")
+        if not results_shown:
+            # Global search on HU using a keyword
+            goto(page, f"{BASE_URL}/")
+            page.fill(SELECTORS["search_input"], keyword)
+            with get_rate_controller().request(page.url):
+                page.keyboard.press("Enter")
+            wait_for_ready(page, "search")
+
+    user_post_count = {}  # track post count per user
+    while True:
+        # Find all post elements which are the serach results
+        post_elements = page.locator(SELECTORS["post_items_search_results"]).all()
+
+        for post in post_elements:
+            username = post.text_content().strip()
+            if username:
+                user_post_count[username] = user_post_count.get(username, 0) + 1
+            
+        # Stop collection if the limit is reached (entire page processing) OR no 'Next Page'
+        if len(user_post_count) >= usernames_limit or not pagination(page, "text=Next page"):
+            print(f"Reached limit of {usernames_limit} distinct usernames OR no more pages -> stop pagination.")
+            break
 
-        # stats for the current category
-        category_stats[category] = category_count
-    
-    # Log stats after scraping all categories
-    total_usernames = sum(category_stats.values())
-    with open(STATS_LOG_FILE, "a") as log_file:
-        log_file.write(f"\nUsernames scraped - scrape_usernames_by_keyword() :\n")
-        for category, count in category_stats.items():
-            log_file.write(f"-{category}: {count} usernames\n")
-        log_file.write(f"Total usernames by keywords scraped: {total_usernames}\n")
-    print(f"Statistics logged in {STATS_LOG_FILE}")
+    return user_post_count
 
 # Collect user's profile information
-def scrape_user_profiles(page, input_json, output_json, unique_communities_json, post_limit):
+@timed_stage("usernames")
+def scrape_user_profiles(page, input_json, output_json, unique_communities_json, post_limit, workers=1, username_queue=None,
+                         community_queue=None, only_failed=False):
     """
-    For each username in the input file, navigate to the user's profile and gather their personal data 
-    (tags, demographics, bio, communities). Implement retry mechanism for a username if scraping fails.
-    Also maintain a global set of all communities ever discovered. 
+    For each username in the input file (or arriving in `username_queue`), navigate to the user's profile and gather
+    their personal data (tags, demographics, bio, communities). Implement retry mechanism for a username if scraping fails.
+    With workers > 1 the usernames are spread across a pool of browser contexts (same output as serial mode).
+    Also maintain a global set of all communities ever discovered (see stages.ProfileStage).
     Create 2 JSON files containing user data and the set of communities. Save progress continuously.
-    Log statistics on how many profiles were scraped.
     """
-    # Load communities' unqiue list (if already exist) - global set of unique communities across all users
-    try:
-        all_communities = read_json(unique_communities_json)
-    except FileNotFoundError:
-        all_communities = {}
-
-    # Load existing scraped profiles (to prevent overwriting old data)
-    try:
-        profiles_data = read_json(output_json)  # Load previous data
-    except FileNotFoundError:
-        profiles_data = {}
-
-
-    # Read usernames from input file
-    usernames_data = read_json(input_json)  # if JSON structure is a list of dict [ {}, {} ]
-    usernames = list(usernames_data.keys()) # if JSON structure is a dict { "key1": {}, "key2": {} }
-
-    total_profiles_scraped = 0  # track number of successfully scraped profiles
-
-    # Log input file and number of usernames
-    with open(STATS_LOG_FILE, "a") as log_file:
-        log_file.write(f"\nStarting (general) profile scraping - scrape_user_profiles() :\n")
-        log_file.write(f"Input file: {input_json}\n")
-        log_file.write(f"Total usernames to process: {len(usernames)}\n")
-
-    # Identify last scraped username
-    scraped_usernames = set(profiles_data.keys())  # Get usernames already scraped
-    last_scraped_username = max(scraped_usernames, key=lambda x: list(profiles_data.keys()).index(x)) if scraped_usernames else None
-
-    # If scraping was interrupted, find the index of the last scraped username and start from the next one
-    # Start from the beginning if no previous data
-    start_index = usernames.index(last_scraped_username) + 1 if last_scraped_username in usernames else 0
-
-    # ------- DELETE LIMIT LATER: in config.py USER_PROFILE_LIMIT ------------
-    for i, username in enumerate(usernames[start_index:], start=start_index + 1):  # [:6]
-        print(f"\nProcessing profile {i}/{len(usernames)} for username: {username}")
-
-        retries = 0
-        while retries < MAX_RETRIES:
-            try:
-                # Collect user's profile info (tags, demographics, bio, communities)
-                profile_data = scrape_profile_data(page, username)
-                
-                if profile_data:
-                    # Collect community names and href from tabs 'Posts'and 'Replies' (where a user has showed any activity)
-                    communities = collect_communities_of_user(page, username, post_limit)
-                    profile_data["communities"] = list(communities) 
-                    profiles_data[username] = profile_data  # add profile info under username key
-                    
-                    # Update the global community set
-                    for comm_url in communities:
-                        if comm_url not in all_communities:  # new community is encountered
-                            all_communities[comm_url] = {}
-
-                    # Store/update data from user's profiles (after each username)
-                    write_to_json(output_json, profiles_data)
-
-                    # Store/update a list of unique community names and their urls
-                    write_to_json(unique_communities_json, all_communities)
-
-                    total_profiles_scraped += 1
-
-                break  # exit retry block if success
-            except Exception as e:  # unexpected error occurs
-                error_message = str(e).lower()
-
-                retries += 1
-                print(f"Error processing profile '{username}': {error_message}. Retrying ({retries}/{MAX_RETRIES})...")
-
-                # Handle network error
-                network_errors = ["ns_error", "timeout", "connection", "network", "reset", "refused", "aborted", "failed"]
-
-                if any(err in error_message for err in network_errors):
-                    print(f"Network issue {error_message} for {username}. Reconnecting...")
-                    page.wait_for_timeout(15000)
-
-                page.reload()
-                page.wait_for_timeout(2000)
-
-        if retries == MAX_RETRIES:
-            print(f"Skipping user '{username}' after {MAX_RETRIES} retries.")
-            with open(FAILED_USERNAMES_LOG, "a") as log_file:
-                log_file.write(f"{username}\n")
-    
-    # Log stats of profile scraping process
-    with open(STATS_LOG_FILE, "a") as log_file:
-        log_file.write(f"Total (general) profiles successfully scraped: {total_profiles_scraped}\n")
+    stage = ProfileStage(input_json, output_json, unique_communities_json, username_queue, community_queue, only_failed)
+    profile_results = scrape_in_pool(page, stage.items(),
+                                     lambda current_page, username: scrape_general_profile(current_page, username, post_limit), workers)
+    for username, profile_data, error_message in profile_results:
+        stage.commit(username, profile_data, error_message)
 
-    print(f"Statistics logged in {STATS_LOG_FILE}")
+    stage.close()
 
 # Collect profile information of community's members
-def scrape_member_profiles(page, members_by_comm_json, profiles_by_comm_json):
+@timed_stage("members")
+def scrape_member_profiles(page, members_by_comm_json, profiles_by_comm_json, workers=1, members_queue=None, only_failed=False):
     """
-    Process usernames from a JSON file with the most active community's members
-    and collect their profile information. Save into a JSON file.
-    
-    """    
-    # Read existing members' prfile data (if available) or create an empty dictionary
-    try:
-        profiles_by_community = read_json(profiles_by_comm_json)
-    except FileNotFoundError:
-        profiles_by_community = {}
-    
-    # Read usernames and community details from JSON
-    communities = read_json(members_by_comm_json)
-
-    # Iterate through communities and their members
-    # for comm_url, members in communities.items():  # iterate over key-value pairs of a dict
-    for i, (comm_url, members) in enumerate(communities.items(), start=1):  # iterate over key-value pairs of a dict
-    # for i, (comm_url, members) in enumerate(communities[start_index:].items(), start=start_index +1):
-    # for i, username in enumerate(usernames[start_index:], start=start_index + 1):  # [:6]
-
-        print(f"\nProcessing community {i}/{len(communities)}: {comm_url}")
-
-        profiles_by_community[comm_url] = {}
-        
-        for member in members:  # [:2]
-            
-            retries = 0
-
-            while retries < MAX_RETRIES:
-                try:
-
-                    # Scrape member's profile information
-                    profile_data = scrape_profile_data(page, member)
+    Process usernames from a JSON file with the most active community's members (or arriving in `members_queue`)
+    and collect their profile information. Save into a JSON file (see stages.MemberStage).
+    With workers > 1 the members are spread across a pool of browser contexts.
+    """
+    stage = MemberStage(members_by_comm_json, profiles_by_comm_json, members_queue, only_failed)
 
-                    if profile_data:
-                        profiles_by_community[comm_url][member] = profile_data
+    # Scrape members' profile information (members already scraped for another community come from the cache)
+    member_results = scrape_in_pool(page, stage.items(),
+                                    lambda current_page, item: scrape_cached_profile(current_page, item[1]), workers)
+    for item, profile_data, error_message in member_results:
+        stage.commit(item, profile_data, error_message)
 
-                        write_to_json(profiles_by_comm_json, profiles_by_community)
+    stage.close()
 
-                    break  # exit retry block if success
+# Collect usernames and metadata from a community page
+@timed_stage("communities")
+def scrape_community_members(page, unqiue_communities_json, members_by_comm_json, pagination_limit=None,
+                             community_queue=None, members_queue=None, only_failed=False):
+    """
+    For each community in the unique community list (or arriving in `community_queue`), navigate to the respective
+    community page, go to 'Most Contributors' tab and collect the usernames.
+    Implements retry mechanism for each community if scraping fails.
+    Update the unique community list with metadata (see stages.CommunityStage).
+    """
+    stage = CommunityStage(unqiue_communities_json, members_by_comm_json, community_queue, members_queue, only_failed)
 
-                except Exception as e:  # unexpected error occurs
-                    error_message = str(e).lower()
+    # Scrape metadata and members one community after another (retries, backoff and throttling in run_with_retries)
+    community_results = scrape_in_pool(page, stage.items(),
+                                       lambda current_page, comm_url: scrape_community(current_page, comm_url, pagination_limit))
+    for comm_url, result, error_message in community_results:
+        stage.commit(comm_url, result, error_message)
 
-                    retries += 1
-                    print(f"Error processing member profile '{member}': {error_message}. Retrying ({retries}/{MAX_RETRIES})...")
+    stage.close()
 
-                    # Handle network error
-                    network_errors = ["ns_error", "timeout", "connection", "network", "reset", "refused", "aborted", "failed"]
+# Helper: Collect metadata and the most active members of a community
+def scrape_community(page, comm_url, pagination_limit=None):
+    """
+    Collect the metadata of a community and the usernames of its most active members
+    ('Most contribution' pages up to `pagination_limit`). Return a tuple (metadata, usernames).
+    """
+    print(f"\nProcessing community: {comm_url}")
 
-                    if any(err in error_message for err in network_errors):
-                        print(f"Network issue {error_message} for {member}. Reconnecting...")
-                        page.wait_for_timeout(15000)
+    # Collect metadata (number of posts and memebers), community's name and text field 'About'
+    metadata = extract_community_metadata(page, comm_url)
 
-                    page.reload()
-                    page.wait_for_timeout(2000)
+    # Collect usernames of most active users
+    if MEMBERS_PAGINATION == "url" or FETCH_MODE == "http":  # pages fetched by URL (no page to click on over HTTP)
+        # In browser mode the page already shows page 1 (see extract_community_metadata)
+        first_page = extract_fields(page, "members")["usernames"] if FETCH_MODE != "http" else None
+        usernames = fetch_member_usernames(page, comm_url, pagination_limit, first_page)
+    else:
+        usernames = []
+        pages_scraped = 0  # counter of pages visited
+        while True:
+            # Locate username links on the current page
+            add_member_usernames(usernames, [element.inner_text().strip() for element in page.locator(SELECTORS["community_card_username"]).all()])
 
-            if retries == MAX_RETRIES:
-                print(f"Skipping member '{member}' after {MAX_RETRIES} retries.")
-                with open(FAILED_MEMBERS_LOG, "a") as log_file:
-                    log_file.write(f"{member}\n")
-        
-    # write_to_json(profiles_by_comm_json, profiles_by_community)
+            # Check if page limit is reached
+            pages_scraped += 1
+            if pagination_limit is not None and pages_scraped >= pagination_limit:
+                break # while-loop
 
-# Collect usernames and metadata from a community page
-def scrape_community_members(page, unqiue_communities_json, members_by_comm_json, pagination_limit=None):
-    """
-    For each community in the unique community list, navigate to the respective community page, 
-    go to 'Most Contributors' tab and collect the usernames. 
-    Only scrape a community if its metadata (the number of members and posts) has not been collected yet.
-    Implements retry mechanism for each community if scraping fails.
-    Update the unique community list with metadata.
-    """
-    # Read the unique community list (community_url as a key)
-    unique_communities = read_json(unqiue_communities_json)
+            # Pagination: check if 'Next page' btn is available
+            if not pagination(page, SELECTORS["next_page_button"]): # as returns False, when no more pages exist
+                break
 
-    # Read existing members data (if available) or create an empty dictionary
-    try:
-        members_by_comm = read_json(members_by_comm_json)
-    except FileNotFoundError:
-        members_by_comm = {}
-
-    failed_communities = []  # track communities that were not scraped
-
-    # Log stats of input file
-    with open(STATS_LOG_FILE, "a") as log_file:
-        log_file.write(f"\nStarting communities scraping - scrape_community_members() :\n")
-        log_file.write(f"Total communities to process: {len(unique_communities)}\n")
-
-    for i, (comm_url, comm_data) in enumerate(unique_communities.items(), start=1):
-
-        # Skip communities that already have metadata (i.e. has been scraped already)
-        if "posts_count" in comm_data and "members_count" in comm_data:
-            print(f"Skipping {comm_url}, already scraped.")
-            continue
-
-        print(f"\nProcessing community {i}/{len(unique_communities)}: {comm_url}")
-
-        retries = 0
-        while retries < MAX_RETRIES:
-            try:
-                # Reload before retrying
-                if retries > 0:
-                    print(f"Retrying {comm_url}... Attempt {retries}/{MAX_RETRIES}")
-                    page.reload()
-                    page.wait_for_timeout(2000)
-
-                # Collect metadata (number of posts and memebers), community's name and text field 'About'                
-                metadata = extract_community_metadata(page, comm_url)
-                if metadata:
-                    unique_communities[comm_url].update(metadata)
-
-                # Collect usernames of most active users
-                usernames = []
-                pages_scraped = 0  # counter of pages visited
-                while True:
-                    # Locate username links on the current page
-                    post_elements = page.locator(SELECTORS["community_card_username"]).all()
-                    
-                    for element in post_elements:
-                        username = element.inner_text().strip().split()[0]  # extract username, ignore role/badge if there is
-                        if username and username not in usernames:
-                            usernames.append(username)
-
-                    # Check if page limit is reached
-                    pages_scraped += 1
-                    if pagination_limit is not None and pages_scraped >= pagination_limit:
-                        break # while-loop
-
-                    # Pagination: check if 'Next page' btn is available
-                    if not pagination(page, SELECTORS["next_page_button"]): # as returns False, when no more pages exist
-                        break
-
-                members_by_comm[comm_url] = usernames
-
-                # Save to / update JSON continuously
-                write_to_json(members_by_comm_json, members_by_comm)
-                write_to_json(unqiue_communities_json, unique_communities)
-                
-                break  # exit retry block if success
-            except Exception as e:
-                error_message = str(e).lower()
-                
-                retries += 1
-                print(f"Error scraping community '{comm_url}': {error_message}. Retrying ({retries}/{MAX_RETRIES})...")
-
-                # Handle network error
-                network_errors = ["ns_error", "timeout", "connection", "network", "reset", "refused", "aborted", "failed"]
-
-                if any(err in error_message for err in network_errors):
-                    print(f"Network issue {error_message} for {comm_url}. Reconnecting...")
-                    page.wait_for_timeout(15000)
-                
-                page.reload()
-                page.wait_for_timeout(2000)
-
-        if retries == MAX_RETRIES:
-            print(f"Failed to scrape {comm_url} after {MAX_RETRIES} retries. Logging failed community.")
-            failed_communities.append(comm_url)
-
-    # Log failed communities
-    if failed_communities:
-        with open(FAILED_COMMUNITIES_LOG, "a") as log_file:
-            for comm_url in failed_communities:
-                log_file.write(f"{comm_url}\n")
-        print(f"Failed communities logged in {FAILED_COMMUNITIES_LOG}")
-
-    # Log stats
-    with open(STATS_LOG_FILE, "a") as log_file:
-        log_file.write(f"Total successfully scraped communities: {len(unique_communities)-len(failed_communities)}\n")
-        log_file.write(f"Total failed communities: {len(failed_communities)}\n")
-    print(f"Statistics logged in {STATS_LOG_FILE}")
+    return metadata, usernames
 
 # Helper: Collect metadata (number of posts and memebrs) of a community
 def extract_community_metadata(page, comm_url):
     """
     Extract metadata (number of members and posts), name and text field 'About' 
-    (only first 100 characters) from a community's page.
+    (only first 150 characters) from a community's page (see extraction.parse_community_metadata).
     """
 
+    fetcher = get_fetcher(page)  # HTTP or browser page (see FETCH_MODE)
+
     # Firstly, navigate to communitiy's 'About' tab
-    about_tab_url = f"https://healthunlocked.com{comm_url}/about"
+    about_tab_url = f"{BASE_URL}{comm_url}/about"
     print(f"Navigating to: {about_tab_url}")
-    page.goto(about_tab_url)
-    page.wait_for_timeout(2000)
-
-    # Extract first 100 characters from 'About' section
-    about_comm = page.locator(SELECTORS["about_comm"]).text_content().strip()[:150] if page.locator(SELECTORS["about_comm"]).count() > 0 else "N/A"
+    about_comm = fetcher.fetch(about_tab_url, "about")["about_comm"]
 
     # Secondly, navigate to communitiy's most active users ('Most contribution' on 'Members' tab)
-    active_members_url = f"https://healthunlocked.com{comm_url}/members?filter=active&page=1"
+    active_members_url = members_url(comm_url, 1)
     print(f"Navigating to: {active_members_url}")
-    page.goto(active_members_url)
-    page.wait_for_timeout(2000) 
-
-    # Get metadata details: "Anxiety and Depression Support94,251 members•88,014 posts"
-    metadata = page.locator(SELECTORS["community_metadata"]).text_content().strip()
-
-    # Regex to extract community's name (right before the first digit)
-    match = re.search(r"^(.*?)(?=\d)", metadata)
-    community_name = match.group(1).strip() if match else "N/A"
-
-    # Regex to extract the numbers of members and posts separately
-    # \d{1,3}: matches 1–3 digits
-    # (?:,\d{3})*: matches groups of ,### (e.g., ,251) for thousands separators
-    match = re.search(r"(\d{1,3}(?:,\d{3})*) members•(\d{1,3}(?:,\d{3})*) posts", metadata)
-    members_count = int(match.group(1).replace(",", "")) if match else "N/A"
-    posts_count = int(match.group(2).replace(",", "")) if match else "N7A"
-
-    return {
-        "comm_name": community_name,
-        "members_count": members_count,
-        "posts_count": posts_count,
-        "about_comm": about_comm
-    }
+    metadata = fetcher.fetch(active_members_url, "members")["metadata"]
+
+    return parse_community_metadata(about_comm, metadata, active_members_url)
+
+# Helper: Collect usernames of a community's most active members page by page (by URL)
+def fetch_member_usernames(page, comm_url, pagination_limit=None, first_page=None, workers=MEMBER_PAGE_WORKERS):
+    """
+    Fetch the 'Most contribution' pages of a community by URL (page=1, 2, ... up to `pagination_limit`)
+    instead of clicking 'Next page'. Stop at the first page without new usernames (empty page, or the
+    last page shown again). Return the usernames in page order.
+    `first_page`: username texts of page 1 if already loaded. With FETCH_MODE "http" and workers > 1,
+    the pages are fetched in windows of `workers` pages in parallel over the pooled HTTP client (pages it
+    cannot parse are then loaded one by one on the browser page); no window is requested after an empty page.
+    """
+    fetcher = get_fetcher(page)
+    window_size = workers if FETCH_MODE == "http" and workers > 1 else 1
+
+    def fetch_page(page_number):
+        return fetcher.fetch(members_url(comm_url, page_number), "members")["usernames"]
+
+    def fetch_window(executor, page_numbers):
+        # Username texts of consecutive pages in order
+        if window_size == 1:
+            return [fetch_page(page_number) for page_number in page_numbers]
+        http_fetcher = get_http_fetcher(page)
+        pages_fields = list(executor.map(lambda page_number: http_fetcher.fetch(members_url(comm_url, page_number), "members"), page_numbers))
+        return [fields["usernames"] if fields is not None else fetch_page(page_number)
+                for page_number, fields in zip(page_numbers, pages_fields)]
+
+    usernames = []
+    if first_page is not None and add_member_usernames(usernames, first_page) == 0:
+        return usernames
+    with ThreadPoolExecutor(max_workers=window_size) as executor:
+        for page_numbers in member_page_windows(1 if first_page is None else 2, pagination_limit, window_size):
+            for texts in fetch_window(executor, page_numbers):
+                if add_member_usernames(usernames, texts) == 0:  # empty page (or the last page repeated): no more members
+                    return usernames
+    return usernames
 
 # Helper: Scrape User Profile Data
 def scrape_profile_data(page, username):
     """
-    Scrape profile data (tags, demographics, bio, communities) for a given username.
+    Scrape profile data (tags, demographics, bio) for a given username (see extraction.parse_profile_fields).
     """
-    # Define locator of data elements
-    demographics_locators = {
-        "joined": SELECTORS["profile_demographics_joined"],
-        "age": SELECTORS["profile_demographics_age"],
-        "gender": SELECTORS["profile_demographics_gender"],
-        "country": SELECTORS["profile_demographics_country"],
-        "ethnicity": SELECTORS["profile_demographics_ethnicity"]
-    }
-
     # Navigate to the user's profile page
-    profile_url = f"https://healthunlocked.com/user/{username}"
-    page.goto(profile_url)
-    page.wait_for_timeout(2000)
+    profile_url = f"{BASE_URL}/user/{username}"
 
-    # Collect tags, demographic info, bio details, communities
-    try:
-        # Collect tags
-        tags = []
-        tag_elements = page.locator(SELECTORS["profile_tags"])
-        if tag_elements.count() >0:
-            for tag in tag_elements.all():
-                tag_text = tag.text_content().strip()
-                if tag_text:
-                    tags.append(tag_text)
-        else:
-            tags = ["N/A"]  # if no tags
-        print(f"username: {username} has tags {tags}")
-
-        # Collect demographics (age, gender, country, ethnicity)
-        demographics = {}
-        for key, locator in demographics_locators.items():
-            # Check if a field exists and extract its content
-            if page.locator(locator).count() > 0:
-                value = page.locator(locator).text_content().strip()
-                
-                # Convert 'joined' field to date format
-                if key == 'joined':
-                    demographics[key] = datetime.strptime(value, "%B %d, %Y").strftime("%Y-%m-%d")  # YYYY-MM-DD
-                else:
-                    demographics[key] = value
+    # Load the page and read all fields in one round trip (HTTP or browser page, see FETCH_MODE)
+    if BULK_EXTRACTION or FETCH_MODE == "http":
+        fields = get_fetcher(page).fetch(profile_url, "profile")
+    else:
+        with page_timer("profile"):
+            goto(page, profile_url)
+            wait_for_ready(page, "profile")
+        fields = read_fields(page, "profile")  # one locator call per element
 
-            else:
-                demographics[key] = "N/A"  # if a field is missing
-        print(f"username: {username} has demographics: {demographics}")
-
-        # Collect bio
-        if page.locator(SELECTORS["profile_bio"]).count() > 0: # Check if bio section exists
-            bio = page.locator(SELECTORS["profile_bio"]).text_content().strip()
-            # Remove "Read more" and "Read less" if there is
-            bio = bio.replace("Read more", "").replace("Read less", "").strip()
-        else:
-            bio = "N/A" # if no bio
-        print(f"username: {username} has bio: {bio}")
-
-        # Return collected info
-        return{
-            "tags": tags,
-            "demographics": demographics,
-            "bio": bio
-        }
+    # Collect tags, demographic info, bio details
+    try:
+        profile_data = parse_profile_fields(fields)
+        print(f"username: {username} has tags {profile_data['tags']}")
+        print(f"username: {username} has demographics: {profile_data['demographics']}")
+        print(f"username: {username} has bio: {profile_data['bio']}")
+        return profile_data
     except Exception as e:
         print(f"Error collecting user's profile data for {username}: {e}")
         return None
 
+# Helper: Scrape a user's profile data together with the communities the user is active in
+def scrape_general_profile(page, username, post_limit):
+    """
+    Scrape profile data (tags, demographics, bio) of a user and add the communities' URLs
+    collected from the 'Posts' and 'Replies' tabs. Return None if the profile could not be scraped.
+    Fresh data in the profile cache is used instead of loading the pages again.
+    """
+    cache = get_profile_cache()
+    cached_data = cache.get(username, require_communities=True)
+    if cached_data:
+        print(f"username: {username} found in profile cache")
+        return cached_data
+
+    profile_data = scrape_profile_data(page, username)
+
+    if profile_data:
+        # Collect community names and href from tabs 'Posts'and 'Replies' (where a user has showed any activity)
+        communities = collect_communities_of_user(page, username, post_limit)
+        profile_data["communities"] = list(communities)
+        cache.put(username, profile_data)
+
+    return profile_data
+
+# Helper: Scrape a member's profile data unless it is in the profile cache
+def scrape_cached_profile(page, username):
+    """
+    Return the profile data (tags, demographics, bio) of a username from the profile cache,
+    or scrape it (and cache it) if the username is not cached or its entry has expired.
+    """
+    cache = get_profile_cache()
+    cached_data = cache.get(username)
+    if cached_data:
+        print(f"username: {username} found in profile cache")
+        cached_data.pop("communities", None)  # community-specific files only hold tags, demographics, bio
+        return cached_data
+
+    profile_data = scrape_profile_data(page, username)
+    cache.put(username, profile_data)
+    return profile_data
+
 # Helper: collect communities' names and URLs    from 'Posts' and 'Replies' tabs on a user's profile
 def collect_communities_of_user(page, username, post_limit):
     """
@@ -511,8 +300,8 @@ def collect_communities_of_user(page, username, post_limit):
     """
     # Define URLs for 'Posts' and 'Replies' tabs
     tabs_urls = [
-        f"https://healthunlocked.com/user/{username}/posts",
-        f"https://healthunlocked.com/user/{username}/replies"
+        f"{BASE_URL}/user/{username}/posts",
+        f"{BASE_URL}/user/{username}/replies"
     ]
     
     all_communities = set()
@@ -529,20 +318,23 @@ def collect_communities_of_user(page, username, post_limit):
 def process_tab(page, tab_url, post_limit):
     '''
     Process a 'Posts'/'Reply' tabl on a user's profile to collect community URLs.
+    Load more posts only while needed (post limit, saturation; see stages.TabCommunities).
     Return a set of communities' URLs.
     '''
-    communities = set()
-    page.goto(tab_url)
-    page.wait_for_timeout(2000)
+    tab = TabCommunities(tab_url, post_limit)
+    with page_timer("replies_tab" if tab_url.endswith("/replies") else "posts_tab"):
+        goto(page, tab_url)
+        wait_for_ready(page, "posts_tab")
 
-    posts_scraped = 0  # track the number of posts already visited; reset counter for each tab
     start_index = 0   # track starting index for each batch of posts loaded
 
-    while posts_scraped <= post_limit:
+    while not tab.full():
 
         # Get currently showed post items (30 post_items max)
         post_items = page.locator(SELECTORS["post_items"])
-        post_count_current = post_items.count()
+        # Read community links of all new post items in one round trip
+        community_urls = extract_community_urls(page, start_index) if BULK_EXTRACTION else None
+        post_count_current = start_index + len(community_urls) if BULK_EXTRACTION else post_items.count()
 
         print(f"Found {post_count_current} items on {tab_url}")
 
@@ -550,31 +342,26 @@ def process_tab(page, tab_url, post_limit):
         for i in range(start_index, post_count_current):
 
             # Check if limit is reached (only with loaded posts)
-            if posts_scraped > post_limit:
+            if tab.full():
                 print(f"Reached the post limit to scrape from 'Posts' or 'Replies' tab. Limit is: {post_limit}.")
-                # return communities  # exit when limit is reached
                 break  # stop scraping posts for this tab
-                
-            post_item = post_items.nth(i)  # only look inside the current post item, not all loaded posts
-            # Extract community's name and link
-            community_url = extract_community_url(post_item)
-
-            if community_url:
-                communities.add(community_url)
-                posts_scraped += 1
-                print(f"Total posts scraped so far: {posts_scraped}.")
+
+            if BULK_EXTRACTION:
+                tab.add(community_urls[i - start_index])
             else:
-                print("No community's link found; skipping this post...")
+                tab.add(extract_community_url(post_items.nth(i)))  # only look inside the current post item
 
         # Update start index for next bacth of posts
         start_index = post_count_current
 
-        # Click 'Show more posts' and check if limit is reached
-        if not pagination(page, SELECTORS["show_more_posts_button"]) or posts_scraped >= post_limit:
-            print(f"Reached the post limit {post_limit} OR no more post items to show.")
+        # Click 'Show more posts' (if still needed) and wait for the new post items
+        if not tab.load_more():
+            break
+        if not show_more_posts(page, post_count_current):
+            print(f"No more post items to show on {tab_url}.")
             break
 
-    return communities
+    return tab.communities
 
 # Helper: Extract a community's name and link from a user's post item.
 def extract_community_url(post_item):
@@ -0,0 +1,78 @@
+import os
+
+from helpers import login, goto
+from readiness import wait_for_ready, async_wait_for_ready
+from browser_setup import setup_context, async_setup_context
+from config import BASE_URL, SELECTORS, STORAGE_STATE_FILE, REUSE_SESSION
+
+LOGIN_URL = f"{BASE_URL}/login"
+
+# Check whether the session of a page is still logged in (sync API)
+def is_logged_in(page):
+    """
+    Open the login page: a logged-in session is redirected away from it (no login form).
+    """
+    goto(page, LOGIN_URL)
+    wait_for_ready(page, "session_check")
+    return "/login" not in page.url and page.locator(SELECTORS["login_email"]).count() == 0
+
+# Open a logged-in page, reusing the saved session if it is still valid (sync API)
+def open_logged_in_page(browser):
+    """
+    Return a page of a new (resource-blocking) context that is logged in.
+    If STORAGE_STATE_FILE exists and its session is still valid, it is reused (no login).
+    Otherwise log in on a fresh context and save its storage state (cookies, local storage)
+    for later runs; pool workers get the same state from the page's context.
+    """
+    if REUSE_SESSION and os.path.exists(STORAGE_STATE_FILE):
+        context = setup_context(browser.new_context(storage_state=STORAGE_STATE_FILE))
+        page = context.new_page()
+        if is_logged_in(page):
+            print(f"Reusing saved session from {STORAGE_STATE_FILE}.")
+            return page
+        print("Saved session expired. Logging in again...")
+        context.close()
+
+    context = setup_context(browser.new_context())  # fresh context: cookie banner and login form
+    page = context.new_page()
+    login(page)
+    if REUSE_SESSION:
+        context.storage_state(path=STORAGE_STATE_FILE)
+        print(f"Session saved to {STORAGE_STATE_FILE}.")
+    return page
+
+# Check whether the session of a page is still logged in (async API)
+async def async_is_logged_in(engine, page):
+    """
+    Async version of is_logged_in.
+    """
+    await engine.goto(page, LOGIN_URL)
+    await async_wait_for_ready(page, "session_check")
+    return "/login" not in page.url and await page.locator(SELECTORS["login_email"]).count() == 0
+
+# Open a logged-in context, reusing the saved session if it is still valid (async API)
+async def async_open_logged_in_context(browser, engine_factory, async_login):
+    """
+    Async version of open_logged_in_page: return (context, engine) where the context is logged in.
+    `engine_factory(context)` creates the scraping engine of a context, `async_login(engine, page)` logs in.
+    """
+    if REUSE_SESSION and os.path.exists(STORAGE_STATE_FILE):
+        context = await async_setup_context(await browser.new_context(storage_state=STORAGE_STATE_FILE))
+        engine = engine_factory(context)
+        page = await context.new_page()
+        if await async_is_logged_in(engine, page):
+            print(f"Reusing saved session from {STORAGE_STATE_FILE}.")
+            await page.close()
+            return context, engine
+        print("Saved session expired. Logging in again...")
+        await context.close()
+
+    context = await async_setup_context(await browser.new_context())
+    engine = engine_factory(context)
+    page = await context.new_page()
+    await async_login(engine, page)
+    if REUSE_SESSION:
+        await context.storage_state(path=STORAGE_STATE_FILE)
+        print(f"Session saved to {STORAGE_STATE_FILE}.")
+    await page.close()
+    return context, engine
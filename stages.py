@@ -0,0 +1,415 @@
+import threading
+
+from storage import get_store
+from work_queue import get_work_queue
+from config import (BASE_URL, COMMUNITY_SATURATION_WINDOW, MAX_RETRIES, ERROR_LOG_FILE, STATS_LOG_FILE, FAILED_USERNAMES_LOG,
+                    FAILED_COMMUNITIES_LOG, FAILED_MEMBERS_LOG)
+from keywords_handler import load_and_process_keywords_from_csv
+
+# Stage logic shared by the sync scrapers (scrapers.py) and the async engine (async_scrapers.py).
+# A stage selects its items (work queue, output of earlier runs, pipeline queue) with items() and commits
+# every result in input order with commit(item, result, error_message); close() writes the final files and stats.
+# The drivers only load the pages: for item, result, error_message in <scrape items>: stage.commit(...)
+
+# Keyword search: items (category, keyword) -> {username: post count}
+class KeywordStage:
+    """
+    Each keyword is assigned to a category for structed search i.e. { "Mental Health": ["depression", "anxiety"]}.
+    Keywords are extended by their lemmas (e.g. "smoke" - "smoking") using NLTK.
+    The state of every keyword is kept in the "keywords" work queue (see work_queue.py): a search starts over
+    only if the previous one is complete (WorkQueue.complete), else it continues with the open keywords;
+    `only_failed` searches only the keywords that failed before.
+    If `username_queue` is given, every username is put into it as soon as it is found the first time
+    (across all keywords), so that profile scraping can run at the same time; a continued search first puts
+    the usernames found before.
+    """
+    def __init__(self, keywords_csv, categories, output_json, username_queue=None, only_failed=False):
+        self.output_json = output_json
+        self.username_queue = username_queue
+        self.only_failed = only_failed
+        self.store = get_store()
+        self.work_queue = get_work_queue("keywords")
+
+        # Load and extend the original list of keywords by their lemmas (e.g. smoking -> smoke)
+        keywords = load_and_process_keywords_from_csv(keywords_csv)
+
+        # Identify which passed categories are valid
+        self.valid_categories = [category for category in categories if category in keywords]
+        if not self.valid_categories:
+            print(f"Error: None of the provided categories {categories} exist in the keywords CSV file.")
+            return
+        print(f"Perform search for validated categories: {self.valid_categories}")
+        self.search_items = [(category, keyword) for category in self.valid_categories for keyword in keywords[category]]
+
+        if only_failed or not self.work_queue.complete():
+            # Retry failed keywords or continue an interrupted / partly failed search: keep the usernames collected so far
+            found_usernames = list(self.store.load(output_json))
+            self.seen_usernames = set(found_usernames)  # usernames found by any keyword so far
+            if username_queue is not None:
+                # Profiles of usernames found before the interruption may not be scraped yet: hand them over again
+                # (the profile stage skips the usernames done in its work queue)
+                for username in found_usernames:
+                    username_queue.put(username)
+        else:
+            self.store.clear(output_json)  # start a new collection of usernames
+            self.work_queue.reset()
+            self.seen_usernames = set()
+        self.category_stats = {category: 0 for category in self.valid_categories}  # track usernames collected per category
+
+    def items(self):
+        """
+        Return the keywords to search (marked in flight as they are taken).
+        """
+        return self.work_queue.track(self.work_queue.select(self.search_items, self.only_failed))
+
+    def commit(self, item, user_post_count, error_message):
+        category, keyword = item
+        if error_message is not None:
+            with open(ERROR_LOG_FILE, "a") as log_file:
+                log_file.write(f"{keyword} | Error: {error_message}\n")
+            print(f"Logged failed keyword: {keyword}")
+            self.work_queue.finish(item, error_message)
+            return
+
+        # Append collected data for this keyword (progress is saved record by record)
+        for username, post_count in user_post_count.items():
+            self.store.put(self.output_json, [username, keyword], post_count)  # update the counter under the username
+            self.category_stats[category] += 1
+
+            if username not in self.seen_usernames:
+                self.seen_usernames.add(username)
+                if self.username_queue is not None:
+                    self.username_queue.put(username)  # hand over to profile scraping
+
+        self.work_queue.finish(item)  # committed
+
+    def close(self):
+        # Write the final JSON file
+        self.store.compact(self.output_json)
+
+        # Log stats after scraping all categories
+        total_usernames = sum(self.category_stats.values())
+        with open(STATS_LOG_FILE, "a") as log_file:
+            log_file.write("\nUsernames scraped - scrape_usernames_by_keyword() :\n")
+            for category, count in self.category_stats.items():
+                log_file.write(f"-{category}: {count} usernames\n")
+            log_file.write(f"Total usernames by keywords scraped: {total_usernames}\n")
+            log_file.write(f"Distinct usernames: {len(self.seen_usernames)}\n")
+        print(f"Statistics logged in {STATS_LOG_FILE}")
+
+# General profiles: items username -> profile data with the user's communities
+class ProfileStage:
+    """
+    Usernames come from the input file, or from `username_queue` while the keyword search is still running
+    (until None). Usernames done in the "usernames" work queue (or found in the output file) are skipped;
+    `only_failed` scrapes only the usernames that failed before.
+    Every profile is saved under its username and every new community is added to the global set of
+    communities (and put into `community_queue` for the community stage of the pipeline, if given).
+    """
+    def __init__(self, input_json, output_json, unique_communities_json, username_queue=None, community_queue=None,
+                 only_failed=False):
+        self.input_json = input_json
+        self.output_json = output_json
+        self.unique_communities_json = unique_communities_json
+        self.username_queue = username_queue
+        self.community_queue = community_queue
+        self.only_failed = only_failed
+        self.store = get_store()
+        self.work_queue = get_work_queue("usernames")
+
+        # Global set of unique communities across all users and the profiles scraped so far (not overwritten)
+        self.all_communities = self.store.load(unique_communities_json)
+        self.profiles_data = self.store.load(output_json)
+
+        self.total_profiles_scraped = 0  # track number of successfully scraped profiles
+        self.processed = 0
+        self.total = "?"  # usernames to process (unknown for a stream)
+
+    def items(self):
+        """
+        Return the usernames to scrape (marked in flight as they are taken). Profiles in the output file count as done
+        (e.g. scraped before the work queue existed). A `username_queue` makes it a blocking stream.
+        """
+        if self.username_queue is not None:
+            with open(STATS_LOG_FILE, "a") as log_file:
+                log_file.write("\nStarting (general) profile scraping - scrape_user_profiles() :\n")
+                log_file.write(f"Input: usernames streamed from the keyword search ({self.input_json})\n")
+            return self.work_queue.track(self._stream_usernames(set(self.profiles_data)))
+
+        # Read usernames from input file: { "username1": {}, "username2": {} }
+        usernames = list(self.store.load(self.input_json))
+        with open(STATS_LOG_FILE, "a") as log_file:
+            log_file.write("\nStarting (general) profile scraping - scrape_user_profiles() :\n")
+            log_file.write(f"Input file: {self.input_json}\n")
+            log_file.write(f"Total usernames to process: {len(usernames)}\n")
+
+        usernames_to_scrape = self.work_queue.select(usernames, self.only_failed, done=self.profiles_data)
+        self.total = len(usernames_to_scrape)
+        return self.work_queue.track(usernames_to_scrape)
+
+    def _stream_usernames(self, already_scraped):
+        for username in iter(self.username_queue.get, None):
+            if self.work_queue.select([username], done=already_scraped):
+                yield username
+            else:
+                self.username_queue.ack(username)
+
+    def commit(self, username, profile_data, error_message):
+        self.processed += 1
+        print(f"\nProcessed profile {self.processed}/{self.total} for username: {username}")
+
+        if error_message is not None:
+            print(f"Skipping user '{username}' after {MAX_RETRIES} retries.")
+            with open(FAILED_USERNAMES_LOG, "a") as log_file:
+                log_file.write(f"{username}\n")
+            self.work_queue.finish(username, error_message)
+
+        elif profile_data:
+            # Store/update data from user's profiles (after each username)
+            self.store.put(self.output_json, [username], profile_data)  # add profile info under username key
+
+            # Update the global community set (a list of unique community names and their urls)
+            for comm_url in profile_data["communities"]:
+                if comm_url not in self.all_communities:  # new community is encountered
+                    self.store.put(self.unique_communities_json, [comm_url], {})
+                    if self.community_queue is not None:
+                        self.community_queue.put(comm_url)  # hand over to community scraping
+
+            self.total_profiles_scraped += 1
+
+        if error_message is None:
+            self.work_queue.finish(username)  # committed
+            if self.username_queue is not None:
+                self.username_queue.ack(username)  # committed (checkpoint of the pipeline; failed usernames are restored)
+
+    def close(self):
+        # Write the final JSON files
+        self.store.compact(self.output_json)
+        self.store.compact(self.unique_communities_json)
+
+        # Log stats of profile scraping process
+        with open(STATS_LOG_FILE, "a") as log_file:
+            log_file.write(f"Total (general) profiles successfully scraped: {self.total_profiles_scraped}\n")
+        print(f"Statistics logged in {STATS_LOG_FILE}")
+
+# Communities: items community URL -> (metadata, usernames of the most active members)
+class CommunityStage:
+    """
+    Only a community that is not done in the "communities" work queue is scraped (communities with metadata,
+    i.e. the number of members and posts, from earlier runs count as done); `only_failed` scrapes only
+    the communities that failed before. The unique community list is updated with the metadata.
+    With a `community_queue` the communities are taken from the queue while profiles are still being
+    scraped, and every scraped community is put into `members_queue` as [comm_url, members] (see pipeline.py).
+    """
+    def __init__(self, unique_communities_json, members_by_comm_json, community_queue=None, members_queue=None,
+                 only_failed=False):
+        self.unique_communities_json = unique_communities_json
+        self.members_by_comm_json = members_by_comm_json
+        self.community_queue = community_queue
+        self.members_queue = members_queue
+        self.only_failed = only_failed
+        self.store = get_store()
+        self.work_queue = get_work_queue("communities")
+
+        # Read the unique community list (community_url as a key) and existing members data (if available)
+        self.unique_communities = self.store.load(unique_communities_json)
+        self.store.load(members_by_comm_json)
+
+        self.failed_communities = []  # track communities that were not scraped
+
+    def items(self):
+        """
+        Return the community URLs to scrape (marked in flight as they are taken); a `community_queue` makes it a blocking stream.
+        """
+        with open(STATS_LOG_FILE, "a") as log_file:
+            log_file.write("\nStarting communities scraping - scrape_community_members() :\n")
+            log_file.write(f"Total communities to process: {len(self.unique_communities)}\n")
+
+        # Communities that already have metadata (i.e. has been scraped already); iterate a snapshot, since
+        # the profile stage may add communities concurrently (pipeline)
+        communities_snapshot = self.store.snapshot(self.unique_communities_json)
+        scraped_communities = {comm_url for comm_url, comm_data in communities_snapshot.items()
+                               if "posts_count" in comm_data and "members_count" in comm_data}
+
+        if self.community_queue is None:
+            return self.work_queue.track(self.work_queue.select(list(communities_snapshot), self.only_failed, done=scraped_communities))
+        return self.work_queue.track(self._stream_communities(scraped_communities))
+
+    def _stream_communities(self, scraped_communities):
+        for comm_url in iter(self.community_queue.get, None):
+            if self.work_queue.select([comm_url], done=scraped_communities):
+                yield comm_url
+            else:
+                print(f"Skipping {comm_url}, already scraped.")
+                self.community_queue.ack(comm_url)
+
+    def commit(self, comm_url, result, error_message):
+        if error_message is not None:
+            print(f"Failed to scrape {comm_url} after {MAX_RETRIES} retries. Logging failed community.")
+            self.failed_communities.append(comm_url)
+            self.work_queue.finish(comm_url, error_message)
+        else:
+            metadata, usernames = result
+
+            # Save to / update JSON continuously
+            self.store.put(self.members_by_comm_json, [comm_url], usernames)
+            if metadata:
+                comm_data = self.unique_communities.get(comm_url, {})
+                self.store.put(self.unique_communities_json, [comm_url], {**comm_data, **metadata})
+            if self.members_queue is not None:
+                self.members_queue.put([comm_url, usernames])  # hand over to member profile scraping
+            self.work_queue.finish(comm_url)  # committed
+
+        if self.community_queue is not None:
+            self.community_queue.ack(comm_url)  # committed (checkpoint of the pipeline)
+
+    def close(self):
+        # Write the final JSON files
+        self.store.compact(self.members_by_comm_json)
+        self.store.compact(self.unique_communities_json)
+
+        # Log failed communities
+        if self.failed_communities:
+            with open(FAILED_COMMUNITIES_LOG, "a") as log_file:
+                for comm_url in self.failed_communities:
+                    log_file.write(f"{comm_url}\n")
+            print(f"Failed communities logged in {FAILED_COMMUNITIES_LOG}")
+
+        # Log stats
+        with open(STATS_LOG_FILE, "a") as log_file:
+            log_file.write(f"Total successfully scraped communities: {len(self.unique_communities)-len(self.failed_communities)}\n")
+            log_file.write(f"Total failed communities: {len(self.failed_communities)}\n")
+        print(f"Statistics logged in {STATS_LOG_FILE}")
+
+# Member profiles: items (community URL, member) -> profile data
+class MemberStage:
+    """
+    Members of all communities form one stream of items, in the order of communities and members.
+    With a `members_queue` the communities ([comm_url, members]) are taken from the queue while the community
+    stage is still running (see pipeline.py); a community is acknowledged once all its members are committed.
+    Members done in the "members" work queue (or found in the output file) are skipped;
+    `only_failed` scrapes only the members that failed before.
+    """
+    def __init__(self, members_by_comm_json, profiles_by_comm_json, members_queue=None, only_failed=False):
+        self.profiles_by_comm_json = profiles_by_comm_json
+        self.members_queue = members_queue
+        self.only_failed = only_failed
+        self.store = get_store()
+        self.work_queue = get_work_queue("members")  # items: (comm_url, member)
+
+        # Existing members' profile data and the members of every community
+        self.profiles_by_community = self.store.load(profiles_by_comm_json)
+        self.communities = self.store.load(members_by_comm_json)
+
+        self.open_members = {}  # members handed over but not committed yet {comm_url: [count, members]}
+        self.started_communities = set()  # communities with a committed member
+        self.lock = threading.Lock()  # items() may run in another thread than commit() (browser pool feeder)
+
+    def items(self):
+        """
+        Return the (comm_url, member) items to scrape (marked in flight as they are taken).
+        """
+        community_items = iter(self.members_queue.get, None) if self.members_queue is not None else list(self.communities.items())
+        return self.work_queue.track(self._select_members(community_items))
+
+    def _select_members(self, community_items):
+        for comm_url, members in community_items:
+            if comm_url not in self.profiles_by_community:
+                self.store.put(self.profiles_by_comm_json, [comm_url], {})
+
+            # Members not done yet (members with a profile in the output file count as done)
+            scraped_members = {(comm_url, member) for member in self.profiles_by_community[comm_url]}
+            member_items = self.work_queue.select([(comm_url, member) for member in members], self.only_failed, done=scraped_members)
+
+            if not member_items:
+                self._ack(comm_url, members)
+                continue
+            with self.lock:
+                self.open_members[comm_url] = [len(member_items), members]
+            yield from member_items
+
+    def _ack(self, comm_url, members):
+        if self.members_queue is not None:
+            self.members_queue.ack([comm_url, members])  # committed (checkpoint of the pipeline)
+
+    def commit(self, item, profile_data, error_message):
+        comm_url, member = item
+        if comm_url not in self.started_communities:
+            print(f"\nProcessing community {len(self.started_communities) + 1}/{len(self.communities)}: {comm_url}")
+            self.started_communities.add(comm_url)
+
+        if error_message is not None:
+            print(f"Skipping member '{member}' after {MAX_RETRIES} retries.")
+            with open(FAILED_MEMBERS_LOG, "a") as log_file:
+                log_file.write(f"{member}\n")
+            self.work_queue.finish(item, error_message)
+        else:
+            if profile_data:
+                self.store.put(self.profiles_by_comm_json, [comm_url, member], profile_data)
+            self.work_queue.finish(item)  # committed
+
+        with self.lock:
+            self.open_members[comm_url][0] -= 1
+            community_done = self.open_members[comm_url][0] == 0
+            members = self.open_members.pop(comm_url)[1] if community_done else None
+        if community_done:
+            self._ack(comm_url, members)
+
+    def close(self):
+        # Write the final JSON file
+        self.store.compact(self.profiles_by_comm_json)
+
+# Community URLs found on a user's 'Posts' / 'Replies' tab
+class TabCommunities:
+    """
+    Count the posts of a tab and collect their community URLs. More posts are loaded only while the post limit
+    is not reached and the last COMMUNITY_SATURATION_WINDOW posts still found a new community
+    (most users post in one or two communities).
+    """
+    def __init__(self, tab_url, post_limit):
+        self.tab_url = tab_url
+        self.post_limit = post_limit
+        self.communities = set()
+        self.posts_scraped = 0  # track the number of posts already visited
+        self.posts_without_new_community = 0  # posts in a row whose community was already found (saturation)
+
+    def full(self):
+        return self.posts_scraped > self.post_limit
+
+    def add(self, community_url):
+        if community_url:
+            self.posts_without_new_community = 0 if community_url not in self.communities else self.posts_without_new_community + 1
+            self.communities.add(community_url)
+            self.posts_scraped += 1
+            print(f"Total posts scraped so far: {self.posts_scraped}.")
+        else:
+            print("No community's link found; skipping this post...")
+
+    def load_more(self):
+        """
+        Return True if more posts should be loaded.
+        """
+        # Stop if the communities have saturated (loading more posts would most likely only repeat them)
+        if COMMUNITY_SATURATION_WINDOW is not None and self.posts_without_new_community >= COMMUNITY_SATURATION_WINDOW:
+            print(f"No new community in the last {self.posts_without_new_community} posts. Stopping on {self.tab_url}.")
+            return False
+        if self.posts_scraped >= self.post_limit:
+            print(f"Reached the post limit {self.post_limit} on {self.tab_url}.")
+            return False
+        return True
+
+# Helper: URL of a 'Most contribution' page of a community
+def members_url(comm_url, page_number):
+    return f"{BASE_URL}{comm_url}/members?filter=active&page={page_number}"
+
+# Helper: page numbers of the 'Most contribution' pages in windows
+def member_page_windows(first_page_number, pagination_limit, window_size):
+    """
+    Yield ranges of up to `window_size` consecutive page numbers (fetched together) from `first_page_number`
+    up to `pagination_limit` (None -> without end: the caller stops at the first page without new usernames).
+    """
+    page_number = first_page_number
+    while pagination_limit is None or page_number <= pagination_limit:
+        window_end = page_number + window_size if pagination_limit is None else min(page_number + window_size, pagination_limit + 1)
+        yield range(page_number, window_end)
+        page_number = window_end
@@ -0,0 +1,421 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from helpers import read_json, write_to_json
+from config import (STORAGE_BACKEND, STORAGE_FSYNC_EVERY, SQLITE_DB, USERNAMES_BY_KEYWORD, GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST,
+                    MEMBERS_BY_COMM, PROFILES_BY_COMM_DATA)
+
+# Helper: set a value in nested dicts by a list of keys
+def set_nested(data, keys, value):
+    """
+    Set data[keys[0]][keys[1]]...[keys[-1]] = value, creating intermediate dicts if needed.
+    """
+    for key in keys[:-1]:
+        data = data.setdefault(key, {})
+    data[keys[-1]] = value
+
+# Legacy store: rewrite the whole JSON file after every record
+class JsonStore:
+    """
+    Keep each JSON file as a dict in memory and rewrite the whole file after every record.
+    Writes are atomic (see helpers.write_to_json), but the bytes written grow with the dataset.
+    """
+    def __init__(self):
+        self.data = {}  # {path: dict}
+        self.lock = threading.Lock()
+
+    def load(self, path):
+        """
+        Return the dict stored in a JSON file (empty dict if the file does not exist yet).
+        The returned dict is owned by the store: change it only through put().
+        """
+        with self.lock:
+            if path not in self.data:
+                self.data[path] = read_json(path) if os.path.exists(path) else {}
+            return self.data[path]
+
+    def snapshot(self, path):
+        """
+        Return a shallow copy of the dict of a path, taken under the store lock: safe to iterate while
+        another stage thread put()s into the same path.
+        """
+        data = self.load(path)
+        with self.lock:
+            return dict(data)
+
+    def clear(self, path):
+        """
+        Start a file from scratch (empty dict).
+        """
+        with self.lock:
+            self.data.setdefault(path, {}).clear()
+            write_to_json(path, self.data[path])
+
+    def put(self, path, keys, value):
+        """
+        Store one record: data[keys[0]]...[keys[-1]] = value.
+        """
+        with self.lock:
+            data = self.data.setdefault(path, {})
+            set_nested(data, keys, value)
+            write_to_json(path, data)
+
+    def compact(self, path):
+        pass  # the JSON file is always up to date
+
+    def export(self, path):
+        pass  # the JSON file is always up to date
+
+    def close(self):
+        pass
+
+# Append-only store: one JSONL record per scraped entity, compacted into the JSON layout
+class JsonlStore:
+    """
+    Append one record per scraped entity ({"keys": [...], "value": ...}) to '<path>.jsonl' next to the JSON file.
+    The log is flushed after every record and fsynced every STORAGE_FSYNC_EVERY records.
+    load() replays the log over the last compacted JSON file; a truncated last line (crash mid-append) is ignored.
+    compact() writes the JSON layout read by the notebooks (atomic rename) and empties the log.
+    Replaying a record twice gives the same result, so a crash between both steps loses nothing.
+    """
+    def __init__(self, fsync_every=STORAGE_FSYNC_EVERY):
+        self.fsync_every = fsync_every
+        self.data = {}  # {path: dict}
+        self.logs = {}  # open log files {path: file}
+        self.unsynced = {}  # records written since the last fsync {path: count}
+        self.lock = threading.RLock()
+
+    def load(self, path):
+        """
+        Return the dict stored in a JSON file plus all records appended since its last compaction.
+        The returned dict is owned by the store: change it only through put().
+        """
+        with self.lock:
+            if path in self.data:
+                return self.data[path]
+
+            data = read_json(path) if os.path.exists(path) else {}
+
+            log_path = path + ".jsonl"
+            replayed = 0
+            if os.path.exists(log_path):
+                valid_size = 0  # bytes of complete records
+                with open(log_path, mode="rb") as log_file:
+                    for line in log_file:
+                        try:
+                            record = json.loads(line)
+                        except (json.JSONDecodeError, UnicodeDecodeError):
+                            print(f"Ignoring incomplete record in {log_path}")
+                            break  # only the last record can be incomplete
+                        set_nested(data, record["keys"], record["value"])
+                        valid_size += len(line)
+                        replayed += 1
+
+                # Cut off an incomplete last record, so that new records start on a new line
+                if valid_size < os.path.getsize(log_path):
+                    with open(log_path, mode="r+b") as log_file:
+                        log_file.truncate(valid_size)
+            if replayed:
+                print(f"Replayed {replayed} records from {log_path}")
+
+            self.data[path] = data
+            return data
+
+    def snapshot(self, path):
+        """
+        Return a shallow copy of the dict of a path, taken under the store lock: safe to iterate while
+        another stage thread put()s into the same path.
+        """
+        data = self.load(path)
+        with self.lock:
+            return dict(data)
+
+    def clear(self, path):
+        """
+        Start a file from scratch (empty dict, empty log).
+        """
+        with self.lock:
+            self.data.setdefault(path, {}).clear()
+            self._close_log(path)
+            write_to_json(path, {})
+            open(path + ".jsonl", mode="w", encoding="utf-8").close()
+
+    def put(self, path, keys, value):
+        """
+        Store one record: data[keys[0]]...[keys[-1]] = value, and append it to the log.
+        """
+        with self.lock:
+            set_nested(self.load(path), keys, value)
+
+            log_file = self.logs.get(path)
+            if log_file is None:
+                log_file = self.logs[path] = open(path + ".jsonl", mode="a", encoding="utf-8")
+                self.unsynced[path] = 0
+            log_file.write(json.dumps({"keys": keys, "value": value}) + "\n")
+            log_file.flush()
+
+            self.unsynced[path] += 1
+            if self.unsynced[path] >= self.fsync_every:
+                os.fsync(log_file.fileno())
+                self.unsynced[path] = 0
+
+    def compact(self, path):
+        """
+        Write the current data into the JSON file (same layout as before) and empty the log.
+        """
+        with self.lock:
+            if path not in self.data:
+                return
+            write_to_json(path, self.data[path])  # atomic
+            self._close_log(path)
+            open(path + ".jsonl", mode="w", encoding="utf-8").close()
+
+    def export(self, path):
+        """
+        Write the JSON file read by the notebooks (same as compact).
+        """
+        self.load(path)
+        self.compact(path)
+
+    def close(self):
+        """
+        Compact all files written by this store.
+        """
+        with self.lock:
+            for path in list(self.logs):
+                self.compact(path)
+
+    def _close_log(self, path):
+        log_file = self.logs.pop(path, None)
+        if log_file is not None:
+            log_file.flush()
+            os.fsync(log_file.fileno())
+            log_file.close()
+        self.unsynced.pop(path, None)
+
+# SQLite store: indexed tables, profiles shared across keywords and communities
+class SqliteStore:
+    """
+    Keep the scraped data in a SQLite database instead of JSON files:
+    - usernames_by_keyword: post count of a username for a keyword
+    - profiles: profile data (tags, demographics, bio) stored once per username
+    - general_profiles: usernames of the general dataset and their communities
+    - communities: unique community list with metadata
+    - member_lists / memberships: most active members of a community (in order)
+    - profile_lists / community_profiles: members of a community whose profile was scraped
+    The JSON paths of the pipeline (config) are mapped to these tables; load() returns the same dict layout
+    as the JSON file and export() regenerates the JSON file read by the notebooks.
+    """
+    def __init__(self, db_path=SQLITE_DB):
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.data = {}  # layout of each path in memory {path: dict}
+        self.datasets = {
+            USERNAMES_BY_KEYWORD: "usernames_by_keyword",
+            GENERAL_PROFILES_DATA: "general_profiles",
+            UNIQUE_COMM_LIST: "communities",
+            MEMBERS_BY_COMM: "memberships",
+            PROFILES_BY_COMM_DATA: "community_profiles",
+        }
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS usernames_by_keyword (
+                username TEXT NOT NULL, keyword TEXT NOT NULL, post_count INTEGER NOT NULL,
+                PRIMARY KEY (username, keyword));
+            CREATE TABLE IF NOT EXISTS profiles (
+                username TEXT PRIMARY KEY, data TEXT NOT NULL, scraped_at TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS general_profiles (
+                username TEXT PRIMARY KEY REFERENCES profiles (username), communities TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS communities (
+                comm_url TEXT PRIMARY KEY, data TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS member_lists (
+                comm_url TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS memberships (
+                comm_url TEXT NOT NULL, position INTEGER NOT NULL, username TEXT NOT NULL,
+                PRIMARY KEY (comm_url, position));
+            CREATE TABLE IF NOT EXISTS profile_lists (
+                comm_url TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS community_profiles (
+                comm_url TEXT NOT NULL, username TEXT NOT NULL REFERENCES profiles (username),
+                PRIMARY KEY (comm_url, username));
+            CREATE INDEX IF NOT EXISTS memberships_username ON memberships (username);
+            CREATE INDEX IF NOT EXISTS community_profiles_username ON community_profiles (username);
+        """)
+
+    def _dataset(self, path):
+        if path not in self.datasets:
+            raise KeyError(f"No SQLite table for {path} (known: {list(self.datasets)})")
+        return self.datasets[path]
+
+    def load(self, path):
+        """
+        Return the data of a path in the layout of its JSON file (read from the tables once, then kept in memory).
+        The returned dict is owned by the store: change it only through put().
+        """
+        with self.lock:
+            if path in self.data:
+                return self.data[path]
+
+            dataset = self._dataset(path)
+            data = {}
+            if dataset == "usernames_by_keyword":
+                for username, keyword, post_count in self.connection.execute(
+                        "SELECT username, keyword, post_count FROM usernames_by_keyword ORDER BY rowid"):
+                    data.setdefault(username, {})[keyword] = post_count
+            elif dataset == "general_profiles":
+                for username, profile, communities in self.connection.execute(
+                        "SELECT g.username, p.data, g.communities FROM general_profiles g "
+                        "JOIN profiles p ON p.username = g.username ORDER BY g.rowid"):
+                    data[username] = {**json.loads(profile), "communities": json.loads(communities)}
+            elif dataset == "communities":
+                for comm_url, comm_data in self.connection.execute("SELECT comm_url, data FROM communities ORDER BY rowid"):
+                    data[comm_url] = json.loads(comm_data)
+            elif dataset == "memberships":
+                for (comm_url,) in self.connection.execute("SELECT comm_url FROM member_lists ORDER BY rowid"):
+                    data[comm_url] = []
+                for comm_url, username in self.connection.execute(
+                        "SELECT comm_url, username FROM memberships ORDER BY comm_url, position"):
+                    data[comm_url].append(username)
+            elif dataset == "community_profiles":
+                for (comm_url,) in self.connection.execute("SELECT comm_url FROM profile_lists ORDER BY rowid"):
+                    data[comm_url] = {}
+                for comm_url, username, profile in self.connection.execute(
+                        "SELECT c.comm_url, c.username, p.data FROM community_profiles c "
+                        "JOIN profiles p ON p.username = c.username ORDER BY c.rowid"):
+                    data[comm_url][username] = json.loads(profile)
+
+            self.data[path] = data
+            return data
+
+    def snapshot(self, path):
+        """
+        Return a shallow copy of the dict of a path, taken under the store lock: safe to iterate while
+        another stage thread put()s into the same path.
+        """
+        data = self.load(path)
+        with self.lock:
+            return dict(data)
+
+    def clear(self, path):
+        """
+        Start a dataset from scratch.
+        """
+        with self.lock, self.connection:
+            dataset = self._dataset(path)
+            tables = {
+                "usernames_by_keyword": ["usernames_by_keyword"],
+                "general_profiles": ["general_profiles"],
+                "communities": ["communities"],
+                "memberships": ["memberships", "member_lists"],
+                "community_profiles": ["community_profiles", "profile_lists"],
+            }[dataset]
+            for table in tables:
+                self.connection.execute(f"DELETE FROM {table}")
+            self.data.setdefault(path, {}).clear()
+
+    def put(self, path, keys, value):
+        """
+        Store one record: data[keys[0]]...[keys[-1]] = value (committed immediately).
+        """
+        with self.lock, self.connection:
+            set_nested(self.load(path), keys, value)
+
+            dataset = self._dataset(path)
+            if dataset == "usernames_by_keyword":  # [username, keyword] -> post count
+                username, keyword = keys
+                self.connection.execute(
+                    "INSERT INTO usernames_by_keyword (username, keyword, post_count) VALUES (?, ?, ?) "
+                    "ON CONFLICT (username, keyword) DO UPDATE SET post_count = excluded.post_count",
+                    (username, keyword, value))
+            elif dataset == "general_profiles":  # [username] -> profile with communities
+                username, = keys
+                profile = {key: field for key, field in value.items() if key != "communities"}
+                self._put_profile(username, profile)
+                self.connection.execute(
+                    "INSERT INTO general_profiles (username, communities) VALUES (?, ?) "
+                    "ON CONFLICT (username) DO UPDATE SET communities = excluded.communities",
+                    (username, json.dumps(value.get("communities", []))))
+            elif dataset == "communities":  # [comm_url] -> metadata
+                comm_url, = keys
+                self.connection.execute(
+                    "INSERT INTO communities (comm_url, data) VALUES (?, ?) "
+                    "ON CONFLICT (comm_url) DO UPDATE SET data = excluded.data",
+                    (comm_url, json.dumps(value)))
+            elif dataset == "memberships":  # [comm_url] -> list of usernames
+                comm_url, = keys
+                self.connection.execute("INSERT OR IGNORE INTO member_lists (comm_url) VALUES (?)", (comm_url,))
+                self.connection.execute("DELETE FROM memberships WHERE comm_url = ?", (comm_url,))
+                self.connection.executemany(
+                    "INSERT INTO memberships (comm_url, position, username) VALUES (?, ?, ?)",
+                    [(comm_url, position, username) for position, username in enumerate(value)])
+            elif dataset == "community_profiles":
+                if len(keys) == 1:  # [comm_url] -> {} (start the community from scratch)
+                    comm_url, = keys
+                    self.connection.execute("INSERT OR IGNORE INTO profile_lists (comm_url) VALUES (?)", (comm_url,))
+                    self.connection.execute("DELETE FROM community_profiles WHERE comm_url = ?", (comm_url,))
+                    for username, profile in value.items():
+                        self._put_profile(username, profile)
+                        self.connection.execute(
+                            "INSERT INTO community_profiles (comm_url, username) VALUES (?, ?)", (comm_url, username))
+                else:  # [comm_url, username] -> profile
+                    comm_url, username = keys
+                    self._put_profile(username, value)
+                    self.connection.execute("INSERT OR IGNORE INTO profile_lists (comm_url) VALUES (?)", (comm_url,))
+                    self.connection.execute(
+                        "INSERT OR IGNORE INTO community_profiles (comm_url, username) VALUES (?, ?)", (comm_url, username))
+
+    def _put_profile(self, username, profile):
+        # One row per username, shared by the general and the community-specific datasets
+        self.connection.execute(
+            "INSERT INTO profiles (username, data, scraped_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (username) DO UPDATE SET data = excluded.data, scraped_at = excluded.scraped_at",
+            (username, json.dumps(profile), datetime.now().isoformat(timespec="seconds")))
+
+    def compact(self, path):
+        pass  # every record is committed in put()
+
+    def export(self, path):
+        """
+        Regenerate the JSON file of a dataset for the notebooks.
+        """
+        write_to_json(path, self.load(path))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+# Store used by the scrapers (one per process)
+_store = None
+
+def get_store():
+    """
+    Return the process-wide store of the configured backend (STORAGE_BACKEND: "jsonl", "sqlite" or "json").
+    """
+    global _store
+    if _store is None:
+        if STORAGE_BACKEND == "sqlite":
+            _store = SqliteStore()
+        elif STORAGE_BACKEND == "jsonl":
+            _store = JsonlStore()
+        else:
+            _store = JsonStore()
+    return _store
+
+# Export: regenerate the JSON files read by the notebooks
+def export_json(paths):
+    """
+    Write the JSON files of the given paths from the configured backend
+    (compact the JSONL logs, e.g. after a crashed run, or export the SQLite tables).
+    """
+    store = get_store()
+    for path in paths:
+        store.export(path)
+        print(f"Exported: {path}")
+
+
+if __name__ == "__main__":
+    # python storage.py [file.json ...]  (default: all output files of the scraping pipeline)
+    export_json(sys.argv[1:] or [USERNAMES_BY_KEYWORD, GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, MEMBERS_BY_COMM, PROFILES_BY_COMM_DATA])
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from projection import NO_CLUSTER, load_json, load_tag_to_cluster
+from embedding_cache import EmbeddingCache, clean_tag
+from config import (TAG_TO_CLUSTER_MAPPING, TAG_LEMMATIZE, TAG_CACHE_SIZE, TAG_EMBEDDING_MODEL, TAG_CENTROIDS_FILE,
+                    TAG_SIMILARITY_THRESHOLD)
+
+# Helper: WordNet lemmatizer (NLTK, loaded on first use)
+_lemmatizer = None
+
+def _lemmatize(word):
+    global _lemmatizer
+    if _lemmatizer is None:
+        import nltk
+        from nltk.stem import WordNetLemmatizer
+        try:
+            nltk.data.find("corpora/wordnet")
+        except LookupError:
+            nltk.download("wordnet", quiet=True)  # first use only: the download checks the NLTK index online
+        _lemmatizer = WordNetLemmatizer()
+    return _lemmatizer.lemmatize(word)
+
+# Normalize a tag
+def normalize_tag(tag, lemmatize=TAG_LEMMATIZE):
+    """
+    Normalize a tag like the tags_clustering notebook (remove special characters, lowercase),
+    collapse whitespace and (with `lemmatize`) reduce each word to its WordNet lemma ("Migraines" -> "migraine").
+    """
+    words = clean_tag(tag).split()
+    if lemmatize:
+        words = [_lemmatize(word) for word in words]
+    return " ".join(words)
+
+# Compute the embedding centroids of the clusters
+def build_centroids(tag_to_cluster, model=TAG_EMBEDDING_MODEL, path=TAG_CENTROIDS_FILE, lemmatize=TAG_LEMMATIZE, encode=None):
+    """
+    Embed the normalized tags of every cluster with `model` (SentenceTransformer, through the embedding cache)
+    and save the normalized mean embedding per cluster to '<path>' (.npy, clusters x dimensions)
+    and the model and cluster names to '<path>.json'.
+    """
+    encode = encode if encode is not None else EmbeddingCache(model).embed
+    tags_by_cluster = {}
+    for tag, cluster in tag_to_cluster.items():
+        if cluster != NO_CLUSTER:
+            tags_by_cluster.setdefault(cluster, set()).add(normalize_tag(tag, lemmatize))
+    clusters = sorted(tags_by_cluster)
+
+    centroids = []
+    for cluster in clusters:
+        centroid = np.asarray(encode(sorted(tags_by_cluster[cluster]))).mean(axis=0)
+        centroids.append(centroid / np.linalg.norm(centroid))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.save(path, np.array(centroids, dtype=np.float32))
+    with open(path + ".json", "w", encoding="utf-8") as file:
+        json.dump({"model": model, "clusters": clusters}, file, indent=2)
+    print(f"Centroids of {len(clusters)} clusters saved to: {path}")
+
+# Resolve tags to clusters
+class TagResolver:
+    """
+    Map tags to clusters in three steps: the tag itself in the mapping, its normalized form (see normalize_tag)
+    in the normalized mapping and, for tags still unknown, the cluster with the nearest embedding centroid
+    (cosine similarity >= `threshold`; only if the centroids file exists, see build_centroids; tags are embedded
+    with the centroids' model through the embedding cache unless `encode` is given). Tags without a cluster resolve to "N/A".
+    Results are memoized (LRU, `cache_size` tags).
+    get(tag, default) behaves like the mapping dict, so a resolver can be passed as `tag_to_cluster` to projection.py.
+    """
+    def __init__(self, tag_to_cluster=None, centroids_path=TAG_CENTROIDS_FILE, encode=None, threshold=TAG_SIMILARITY_THRESHOLD,
+                 lemmatize=TAG_LEMMATIZE, cache_size=TAG_CACHE_SIZE):
+        self.tag_to_cluster = tag_to_cluster if tag_to_cluster is not None else load_tag_to_cluster()
+        self.lemmatize = lemmatize
+        self.threshold = threshold
+        self.encode = encode
+        self.stats = {"exact": 0, "normalized": 0, "nearest": 0, "unknown": 0}  # resolved tags by step
+
+        # Normalized mapping (the first cluster wins if normalized tags collide)
+        self.normalized = {}
+        for tag, cluster in self.tag_to_cluster.items():
+            self.normalized.setdefault(normalize_tag(tag, lemmatize), cluster)
+
+        self.centroids = None
+        if os.path.exists(centroids_path):
+            index = load_json(centroids_path + ".json")
+            self.centroids = np.load(centroids_path)
+            self.centroid_clusters = index["clusters"]
+            self.model = index["model"]
+
+        self.embedded = {}  # clusters of unknown tags resolved by resolve_many() {tag: cluster}
+        self._resolve = lru_cache(maxsize=cache_size)(self._resolve_uncached)
+
+    # Helper: cluster of a tag in the mappings
+    def _lookup(self, tag):
+        """
+        Return (cluster, step) if the tag or its normalized form is mapped, else (None, normalized tag).
+        """
+        cluster = self.tag_to_cluster.get(tag)
+        if cluster is not None:
+            return cluster, "exact"
+        normalized = normalize_tag(tag, self.lemmatize)
+        cluster = self.normalized.get(normalized)
+        if cluster is not None:
+            return cluster, "normalized"
+        return None, normalized
+
+    # Helper: clusters of the nearest centroids of normalized tags
+    def _nearest(self, normalized_tags):
+        if self.centroids is None or not normalized_tags:
+            return [NO_CLUSTER] * len(normalized_tags)
+        if self.encode is None:
+            self.encode = EmbeddingCache(self.model).embed
+
+        similarities = np.asarray(self.encode(normalized_tags)) @ self.centroids.T
+        nearest = similarities.argmax(axis=1)
+        return [self.centroid_clusters[index] if similarities[row, index] >= self.threshold else NO_CLUSTER
+                for row, index in enumerate(nearest)]
+
+    def _resolve_uncached(self, tag):
+        cluster, step = self._lookup(tag)
+        if cluster is None:
+            normalized = step
+            if tag in self.embedded:
+                cluster = self.embedded[tag]
+            else:
+                cluster = self._nearest([normalized])[0] if normalized else NO_CLUSTER
+            step = "nearest" if cluster != NO_CLUSTER else "unknown"
+        self.stats[step] += 1
+        return cluster
+
+    def resolve(self, tag):
+        """
+        Return the cluster of a tag ("N/A" if it has none).
+        """
+        return self._resolve(tag)
+
+    def get(self, tag, default=NO_CLUSTER):
+        cluster = self._resolve(tag)
+        return cluster if cluster != NO_CLUSTER else default
+
+    def resolve_many(self, tags):
+        """
+        Return {tag: cluster} of many tags (e.g. all tags of fresh scrapes).
+        Tags unknown to the mappings are embedded in one batch instead of one by one.
+        """
+        tags = list(dict.fromkeys(tags))
+        unknown = {}  # {tag: normalized tag}
+        for tag in tags:
+            cluster, step = self._lookup(tag)
+            if cluster is None and step and tag not in self.embedded:
+                unknown[tag] = step
+        self.embedded.update(zip(unknown, self._nearest(list(unknown.values()))))
+        return {tag: self._resolve(tag) for tag in tags}
+
+# Extend profiles by the clusters of their tags
+def add_tag_clusters(profiles, resolver):
+    """
+    Add "tag_clusters" to every profile of {username: profile} (as the bipartite_network notebook), resolving
+    all distinct tags at once.
+    """
+    clusters = resolver.resolve_many(tag for profile in profiles.values() for tag in profile.get("tags", []))
+    for profile in profiles.values():
+        profile["tag_clusters"] = [clusters[tag] for tag in profile.get("tags", [])]
+    return profiles
+
+
+if __name__ == "__main__":
+    # python tag_resolver.py centroids                         -> embed the mapped tags once and save the cluster centroids
+    # python tag_resolver.py map general_profiles.json out.json -> profiles with "tag_clusters" (unknown tags: nearest centroid)
+    parser = argparse.ArgumentParser(description="Map tags of (new) profiles to the tag clusters.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    centroids_parser = subparsers.add_parser("centroids", help="compute the embedding centroids of the clusters")
+    centroids_parser.add_argument("--model", default=TAG_EMBEDDING_MODEL, help="SentenceTransformer name or local path")
+    map_parser = subparsers.add_parser("map", help="add 'tag_clusters' to profiles {username: profile}")
+    map_parser.add_argument("profiles")
+    map_parser.add_argument("output")
+    for subparser in (centroids_parser, map_parser):
+        subparser.add_argument("--tag-to-cluster", default=TAG_TO_CLUSTER_MAPPING)
+        subparser.add_argument("--centroids", default=TAG_CENTROIDS_FILE)
+    args = parser.parse_args()
+
+    tag_to_cluster = load_tag_to_cluster(args.tag_to_cluster)
+    if args.command == "centroids":
+        build_centroids(tag_to_cluster, args.model, args.centroids)
+    else:
+        resolver = TagResolver(tag_to_cluster, args.centroids)
+        profiles = add_tag_clusters(load_json(args.profiles), resolver)
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(profiles, file, indent=2)
+        print(f"Extended profiles saved to: {args.output}")
+        print(f"Tags resolved: {resolver.stats}")
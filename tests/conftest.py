@@ -0,0 +1,35 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The modules live in the repository root (flat layout)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+@pytest.fixture(scope="session")
+def repo_dir():
+    return REPO_DIR
+
+
+@pytest.fixture(scope="session")
+def shipped_data():
+    """
+    Return the cleaned general profiles and the tag-to-cluster mapping shipped in 'data/' (read-only).
+    """
+    from config import TAG_TO_CLUSTER_MAPPING
+    with open(os.path.join(REPO_DIR, "data", "data_cleaned", "general_profiles_data_CLEANED_A.json"), encoding="utf-8") as file:
+        profiles = json.load(file)
+    with open(os.path.join(REPO_DIR, TAG_TO_CLUSTER_MAPPING), encoding="utf-8") as file:
+        tag_to_cluster = json.load(file)
+    return profiles, tag_to_cluster
+
+
+@pytest.fixture(scope="session")
+def edge_set():
+    """
+    Return a function turning edges into a set, independent of their order and direction.
+    """
+    return lambda edges: {(frozenset((edge["source"], edge["target"])), edge["weight"]) for edge in edges}
@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+import projection
+from cooccurrence_store import CoOccurrenceStore
+
+
+@pytest.fixture(scope="module")
+def shipped_profiles(shipped_data):
+    """
+    Return 300 cleaned general profiles with their tags mapped to clusters.
+    """
+    profiles, tag_to_cluster = shipped_data
+    return {username: {**profile, "tag_clusters": projection.profile_clusters(profile, tag_to_cluster)}
+            for username, profile in list(profiles.items())[:300]}
+
+
+@pytest.fixture
+def store_edges(edge_set):
+    """
+    Return a function giving the edges of every network of a store, as {(partition, group): edge set} of the groups with users.
+    """
+    return lambda store: {key: edge_set(store.edges(*key)) for key, counts in store.counts.items() if counts}
+
+
+@pytest.fixture
+def projected_edges(edge_set):
+    """
+    Return a function projecting the same networks from scratch (see store_edges).
+    """
+    def project(profiles, output_dir):
+        edges_by_group = projection.project_partitions(profiles.items(), projection.general_partitions(output_dir), workers=1)
+        return {key: edge_set(edges) for key, edges in edges_by_group.items() if edges}
+    return project
+
+
+def test_incremental_updates_match_a_new_projection(tmp_path, shipped_profiles, store_edges, projected_edges):
+    output_dir = str(tmp_path / "networks")
+    store = CoOccurrenceStore(str(tmp_path / "store.json"), tag_to_cluster={}, output_dir=output_dir)
+    profiles = dict(shipped_profiles)
+    assert store.sync(profiles) == (len([p for p in profiles.values() if p["tag_clusters"]]), 0)
+    assert store_edges(store) == projected_edges(profiles, output_dir)
+
+    # Update, remove and add single profiles
+    first, second, third = list(profiles)[:3]
+    profiles[first] = {**profiles[first], "tag_clusters": ["Mental Health", "Sleep"]}
+    assert store.put(first, profiles[first])
+    assert not store.put(second, profiles[second])  # unchanged
+    del profiles[second]
+    assert store.remove(second)
+    profiles["new_user"] = {**profiles[third], "demographics": {"gender": "Male", "age": "40"}}
+    assert store.put("new_user", profiles["new_user"])
+    assert store_edges(store) == projected_edges(profiles, output_dir)
+
+    # sync() with the complete file removes the missing profiles
+    del profiles[third]
+    assert store.sync(profiles) == (0, 1)
+    assert store_edges(store) == projected_edges(profiles, output_dir)
+
+    # Only the changed networks are written; the counts are rebuilt from the log
+    assert store.save() == len(store.counts)
+    assert store.save() == 0
+    reloaded = CoOccurrenceStore(str(tmp_path / "store.json"), tag_to_cluster={}, output_dir=output_dir)
+    assert store_edges(reloaded) == store_edges(store)
+    assert projection.load_json(os.path.join(output_dir, "general_patterns", "cluster_co-occurrence_edges.json")) == \
+        store.edges("global", "global")
+
+
+def test_community_members_are_kept_apart_from_general_profiles(tmp_path):
+    store = CoOccurrenceStore(str(tmp_path / "store.json"), tag_to_cluster={}, output_dir=str(tmp_path))
+    profile = {"tag_clusters": ["Pain", "Sleep"]}
+    store.sync({"alice": profile}, {"/painconcern": {"alice": profile}})
+    assert store.edges("community", "painconcern") == [{"source": "Pain", "target": "Sleep", "weight": 1}]
+
+    assert store.sync({}, None) == (0, 1)  # community profiles not given: kept
+    assert store.edges("global", "global") == []
+    assert store.edges("community", "painconcern") == [{"source": "Pain", "target": "Sleep", "weight": 1}]
+
+
+def test_networks_of_partitions_no_longer_configured_are_skipped(tmp_path):
+    store = CoOccurrenceStore(str(tmp_path / "store.json"), tag_to_cluster={}, output_dir=str(tmp_path))
+    store.put("alice", {"tag_clusters": ["Pain", "Sleep"], "demographics": {"gender": "Female"}})
+    del store.paths["gender"]  # e.g. a country group whose matched users file was removed
+    assert store.save() == 1  # global network only
+    assert not os.path.exists(os.path.join(str(tmp_path), "general_patterns", "demographics", "gender"))
+
+
+def test_saved_counts_are_loaded_without_summing_up_the_profiles(tmp_path, shipped_profiles, store_edges, monkeypatch):
+    path = str(tmp_path / "store.json")
+    store = CoOccurrenceStore(path, tag_to_cluster={}, output_dir=str(tmp_path))
+    store.sync(shipped_profiles)
+    store.save()
+    expected = store_edges(store)
+
+    def fail(*args):
+        raise AssertionError("counts summed up again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(CoOccurrenceStore, "_apply", fail)
+        assert store_edges(CoOccurrenceStore(path, tag_to_cluster={}, output_dir=str(tmp_path))) == expected
+
+    # Interrupted run: the records after the last save are in the log, so the counts are summed up again
+    store.put("new_user", {"tag_clusters": ["Sleep", "Pain"]})
+    store.store._close_log(path)
+    reloaded = CoOccurrenceStore(path, tag_to_cluster={}, output_dir=str(tmp_path))
+    assert store_edges(reloaded) == store_edges(store) != expected
+
+
+def test_delta_touches_only_the_given_profiles(tmp_path, edge_set):
+    store = CoOccurrenceStore(str(tmp_path / "store.json"), tag_to_cluster={}, output_dir=str(tmp_path))
+    store.sync({"alice": {"tag_clusters": ["Pain", "Sleep"]}, "bob": {"tag_clusters": ["Pain", "Sleep"]}},
+               {"/painconcern": {"alice": {"tag_clusters": ["Pain", "Sleep"]}}})
+    store.save()
+
+    changed, removed = store.apply({"carol": {"tag_clusters": ["Diet", "Sleep"]}}, None, [[None, "bob"], ["/painconcern", "alice"]])
+    assert (changed, removed) == (1, 2)
+    assert edge_set(store.edges("global", "global")) == {(frozenset(("Pain", "Sleep")), 1), (frozenset(("Diet", "Sleep")), 1)}
+    assert store.edges("community", "painconcern") == []
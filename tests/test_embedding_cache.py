@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+
+import embedding_cache
+from embedding_cache import EmbeddingCache
+
+
+# Helper: stub encoder (one vector per text: its length and its number of words), recording the encoded texts
+def stub_encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(text), len(text.split())] for text in texts], dtype=np.float32)
+    return encode
+
+
+def test_only_unseen_tags_are_encoded(tmp_path):
+    calls = []
+    cache = EmbeddingCache("stub", cache_dir=str(tmp_path), batch_size=2, encode=stub_encoder(calls))
+    embeddings = cache.embed(["Back pain", "Insomnia", "back  PAIN!", "Fatigue"])
+    assert embeddings.tolist() == [[9, 2], [8, 1], [9, 2], [7, 1]]
+    assert calls == [["back pain", "insomnia"], ["fatigue"]]  # cleaned, deduplicated, in batches
+
+    assert cache.embed(["fatigue", "Arthritis"]).tolist() == [[7, 1], [9, 1]]
+    assert calls[-1] == ["arthritis"]
+    assert cache.stats == {"hits": 1 + 1, "encoded": 3 + 1}
+    assert cache.embed([]).shape == (0, 2)
+
+    # A new cache reads the stored vectors without an encoder
+    cache = EmbeddingCache("stub", cache_dir=str(tmp_path))
+    assert cache.embed(["Insomnia", "arthritis"]).tolist() == [[8, 1], [9, 1]]
+    assert cache.stats == {"hits": 2, "encoded": 0}
+
+
+def test_rows_of_an_interrupted_append_are_dropped(tmp_path):
+    calls = []
+    cache = EmbeddingCache("stub", cache_dir=str(tmp_path), encode=stub_encoder(calls))
+    cache.embed(["insomnia", "fatigue"])
+
+    # Crash after writing vectors, before saving the index
+    with open(cache.vectors_path, "ab") as file:
+        file.write(np.ones((3, 2), dtype=np.float32).tobytes()[:20])
+
+    cache = EmbeddingCache("stub", cache_dir=str(tmp_path), encode=stub_encoder(calls))
+    assert cache.embed(["insomnia", "fatigue"]).tolist() == [[8, 1], [7, 1]]
+    assert cache.embed(["back pain"]).tolist() == [[9, 2]]
+    assert os.path.getsize(cache.vectors_path) == 3 * 2 * 4
+    assert EmbeddingCache("stub", cache_dir=str(tmp_path)).embed(["back pain", "fatigue"]).tolist() == [[9, 2], [7, 1]]
+
+
+def test_models_have_separate_caches(tmp_path):
+    first = EmbeddingCache("first", cache_dir=str(tmp_path), encode=lambda texts: np.zeros((len(texts), 2)))
+    second = EmbeddingCache("second", cache_dir=str(tmp_path), encode=lambda texts: np.ones((len(texts), 3)))
+    first.embed(["insomnia"])
+    assert second.embed(["insomnia"]).tolist() == [[1, 1, 1]]
+    assert first.dir != second.dir
+
+
+def test_local_model_copy_shares_the_cache_of_the_model(tmp_path, monkeypatch):
+    loaded = []
+    monkeypatch.setitem(embedding_cache.ENCODERS, "stub", lambda model: loaded.append(model) or stub_encoder([]))
+    online = EmbeddingCache("org/model", backend="stub", cache_dir=str(tmp_path))
+    online.embed(["insomnia"])
+
+    offline = EmbeddingCache("org/model", backend="stub", cache_dir=str(tmp_path), model_path="/models/model")
+    assert offline.dir == online.dir
+    assert offline.embed(["insomnia", "fatigue"]).tolist() == [[8, 1], [7, 1]]
+    assert offline.stats == {"hits": 1, "encoded": 1}
+    assert loaded == ["org/model", "/models/model"]
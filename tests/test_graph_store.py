@@ -0,0 +1,52 @@
+import json
+import os
+
+import numpy as np
+
+from graph_store import write_graph_store, build_graph_store, GraphStore
+from network_analysis import load_graph
+
+
+def test_networks_round_trip(tmp_path, edge_set):
+    path = str(tmp_path / "networks.npy")
+    networks = [
+        ("gender", "male", [{"source": "Sleep", "target": "Pain", "weight": 3}]),
+        ("gender", "female", [{"source": "Pain", "target": "Diet", "weight": 1}, {"source": "Sleep", "target": "Diet", "weight": 2}]),
+        ("age", "18-30", []),
+    ]
+    write_graph_store(networks, path)
+
+    store = GraphStore(path)
+    assert len(store) == 3
+    assert store.clusters == ["Diet", "Pain", "Sleep"]
+    assert store.groups() == ["gender", "age"]
+    assert store.labels("gender") == ["male", "female"]
+    for group, label, edges in networks:
+        assert edge_set(store.edges(group, label)) == edge_set(edges)
+    assert np.array_equal(store.matrix("gender", "female"), [[0, 1, 2], [1, 0, 0], [2, 0, 0]])
+    assert store.graph("gender", "male")["Sleep"]["Pain"]["weight"] == 3
+    assert store.graph("age", "18-30").number_of_edges() == 0
+    assert np.array_equal(GraphStore(path, mmap=False).weights, store.weights)
+
+
+def test_shipped_edge_files_round_trip(tmp_path, repo_dir, edge_set):
+    network_dir = os.path.join(repo_dir, "data", "bipartite_network")
+    path = str(tmp_path / "networks.npy")
+    networks = {
+        "cluster_co-occurrence_edges.json": os.path.join(network_dir, "general_patterns", "cluster_co-occurrence_edges.json"),
+        "gender": os.path.join(network_dir, "general_patterns", "demographics", "gender"),
+        "missing": os.path.join(network_dir, "missing"),  # skipped
+    }
+    build_graph_store(networks, path)
+
+    store = GraphStore(path)
+    assert store.networks == [("cluster_co-occurrence_edges.json", "cluster_co-occurrence_edges"),
+                              ("gender", "cluster_co-occurrence_female"), ("gender", "cluster_co-occurrence_male")]
+    edge_file = os.path.join(network_dir, "general_patterns", "demographics", "gender", "cluster_co-occurrence_male.json")
+    with open(edge_file, "r", encoding="utf-8") as file:
+        assert edge_set(store.edges("gender", "cluster_co-occurrence_male")) == edge_set(json.load(file))
+
+    G = store.graph("cluster_co-occurrence_edges.json", "cluster_co-occurrence_edges")
+    expected = load_graph(networks["cluster_co-occurrence_edges.json"])
+    assert G.number_of_edges() == expected.number_of_edges() == 253
+    assert all(G[source][target]["weight"] == weight for source, target, weight in expected.edges(data="weight"))
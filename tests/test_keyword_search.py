@@ -0,0 +1,90 @@
+import pytest
+
+import helpers
+import scrapers
+import stages
+import storage
+import work_queue
+from pipeline import StageQueue
+from storage import JsonlStore
+from work_queue import WorkQueue, DONE, FAILED
+
+
+@pytest.fixture
+def keyword_run(tmp_path, monkeypatch):
+    """
+    Run scrape_usernames_by_keyword without a browser: search_keyword is replaced by `search`
+    (a dict {keyword: post counts per username, or an exception to raise}).
+    """
+    monkeypatch.chdir(tmp_path)  # log files
+    monkeypatch.setattr(storage, "_store", JsonlStore())
+    queue = WorkQueue("keywords", queue_dir=str(tmp_path / "queues"))
+    monkeypatch.setitem(work_queue._queues, "keywords", queue)
+    monkeypatch.setattr(helpers, "MAX_RETRIES", 1)
+    monkeypatch.setattr(stages, "load_and_process_keywords_from_csv", lambda path: {"Health": ["sleep", "diet"]})
+
+    searched = []
+    search = {}
+
+    def search_keyword(page, item, usernames_limit):
+        keyword = item[1]
+        searched.append(keyword)
+        if isinstance(search[keyword], Exception):
+            raise search[keyword]
+        return search[keyword]
+
+    monkeypatch.setattr(scrapers, "search_keyword", search_keyword)
+    output_json = str(tmp_path / "usernames.json")
+
+    def run(results, username_queue=None):
+        search.clear()
+        search.update(results)
+        searched.clear()
+        scrapers.scrape_usernames_by_keyword(object(), "keywords.csv", ["Health"], output_json, usernames_limit=10,
+                                             username_queue=username_queue)
+        return searched
+
+    run.queue = queue
+    run.output_json = output_json
+    run.output = lambda: storage.get_store().load(output_json)
+    return run
+
+
+def test_failed_keyword_is_retried_by_the_next_plain_run(keyword_run):
+    searched = keyword_run({"sleep": {"alice": 2}, "diet": RuntimeError("timeout")})
+    assert searched == ["sleep", "diet"]
+    assert keyword_run.queue.state(["Health", "diet"]) == FAILED
+
+    # Not complete (diet has attempts left): resume instead of starting over
+    searched = keyword_run({"sleep": {"alice": 2}, "diet": {"bob": 1}})
+    assert searched == ["diet"]
+    assert keyword_run.queue.state(["Health", "diet"]) == DONE
+    assert keyword_run.output() == {"alice": {"sleep": 2}, "bob": {"diet": 1}}
+
+
+def test_complete_search_starts_over(keyword_run):
+    keyword_run({"sleep": {"alice": 2}, "diet": {"bob": 1}})
+    assert keyword_run.queue.complete()
+
+    searched = keyword_run({"sleep": {"carol": 1}, "diet": {}})
+    assert searched == ["sleep", "diet"]
+    assert keyword_run.output() == {"carol": {"sleep": 1}}
+
+
+def test_interrupted_streaming_run_resumes_unscraped_profiles(keyword_run, tmp_path, monkeypatch):
+    monkeypatch.setitem(work_queue._queues, "usernames", WorkQueue("usernames", queue_dir=str(tmp_path / "queues")))
+
+    # Interrupted run: alice and bob are found, only alice's profile is scraped
+    username_queue = StageQueue(maxsize=0)
+    keyword_run({"sleep": {"alice": 2, "bob": 1}, "diet": RuntimeError("timeout")}, username_queue)
+    assert [username_queue.get(), username_queue.get()] == ["alice", "bob"]
+    profiles = stages.ProfileStage(keyword_run.output_json, str(tmp_path / "profiles.json"), str(tmp_path / "communities.json"))
+    profiles.commit("alice", {"communities": []}, None)
+
+    # Resumed run: bob is handed over again, before the usernames of the continued search
+    username_queue = StageQueue(maxsize=0)
+    keyword_run({"diet": {"carol": 1, "alice": 1}}, username_queue)
+    username_queue.close()
+    profiles = stages.ProfileStage(keyword_run.output_json, str(tmp_path / "profiles.json"), str(tmp_path / "communities.json"),
+                                   username_queue)
+    assert list(profiles.items()) == ["bob", "carol"]
@@ -0,0 +1,54 @@
+import json
+import os
+
+import networkx as nx
+import pytest
+
+from network_analysis import analyze_graph, analyze_file, analyze_networks
+
+
+# Helper: stats as stored in JSON, floats rounded to 9 digits (the notebook's stats are not rounded)
+def as_stored(stats):
+    def rounded(value):
+        if isinstance(value, float):
+            return round(value, 9)
+        if isinstance(value, list):
+            return [rounded(item) for item in value]
+        if isinstance(value, dict):
+            return {key: rounded(item) for key, item in value.items()}
+        return value
+    return rounded(json.loads(json.dumps(stats)))
+
+
+def test_stats_of_a_small_network():
+    G = nx.Graph()
+    G.add_weighted_edges_from([("A", "B", 3), ("B", "C", 1), ("A", "C", 1), ("C", "D", 5)])
+    stats = analyze_graph(G, "toy")
+    assert stats["density"] == pytest.approx(4 / 6)
+    assert stats["average_degree"] == 2.0
+    assert stats["average_weighted_degree"] == 5.0
+    assert (stats["num_components"], stats["largest_component_size"], stats["diameter"]) == (1, 4, 2)
+    assert stats["top5_degree_centrality"][0] == ("C", 1.0)
+    assert stats["top5_betweenness_centrality"][0] == ("C", 1.0)
+    assert stats["top5_cluster_pairs_by_weight"][:2] == [("C", "D", 50), ("A", "B", 30)]
+    assert analyze_graph(G, "toy") == stats  # Louvain with a fixed seed
+    assert analyze_graph(nx.Graph(), "empty") == {"label": "empty", "nodes": 0, "edges": 0}
+
+
+def test_global_network_matches_the_notebook_stats(repo_dir):
+    general_dir = os.path.join(repo_dir, "data", "bipartite_network", "general_patterns")
+    with open(os.path.join(general_dir, "network_analysis", "network_stats.json"), encoding="utf-8") as file:
+        shipped = json.load(file)["cluster_co-occurrence_edges.json"][0]
+    stats = analyze_file(os.path.join(general_dir, "cluster_co-occurrence_edges.json"))
+    assert as_stored(stats) == as_stored(shipped)
+
+
+def test_worker_processes_give_the_same_stats(repo_dir):
+    demographics_dir = os.path.join(repo_dir, "data", "bipartite_network", "general_patterns", "demographics")
+    networks = {"gender": os.path.join(demographics_dir, "gender"), "age": os.path.join(demographics_dir, "age"),
+                "missing": os.path.join(demographics_dir, "missing")}
+    results = analyze_networks(networks, workers=1)
+    assert list(results) == ["gender", "age"]
+    assert [stats["label"] for stats in results["age"]] == ["cluster_co-occurrence_18-30", "cluster_co-occurrence_30-50",
+                                                            "cluster_co-occurrence_50-70", "cluster_co-occurrence_70+"]
+    assert analyze_networks(networks, workers=2) == results
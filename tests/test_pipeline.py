@@ -0,0 +1,49 @@
+import os
+import threading
+
+from pipeline import StageQueue, DurableQueue
+
+
+def test_durable_queue_restores_items_handed_over_but_not_committed(tmp_path):
+    path = str(tmp_path / "members.jsonl")
+    queue = DurableQueue(path, maxsize=0)
+    for item in ["alice", ["/painconcern", ["bob", "carol"]], "dave"]:
+        queue.put(item)
+    assert queue.get() == "alice"
+    queue.ack("alice")
+    assert queue.get() == ["/painconcern", ["bob", "carol"]]  # taken, crash before it is committed
+
+    # Crash: the checkpoint ends with an incomplete record
+    queue.log.close()
+    with open(path, mode="a", encoding="utf-8") as log_file:
+        log_file.write('{"put": "er')
+
+    queue = DurableQueue(path, maxsize=0)
+    for item in ["alice", ["/painconcern", ["bob", "carol"]], "erin"]:  # the upstream stage hands over its items again
+        queue.put(item)
+    queue.close()
+    assert list(iter(queue.get, None)) == [["/painconcern", ["bob", "carol"]], "dave", "erin"]
+    queue.ack("dave")
+
+    # Records appended after the incomplete one are kept after the next crash
+    queue.log.close()
+    queue = DurableQueue(path, maxsize=0)
+    assert list(queue.items) == [["/painconcern", ["bob", "carol"]], "erin"]
+
+    queue.remove()
+    assert not os.path.exists(path)
+
+
+def test_stage_queue_applies_backpressure_until_abandoned():
+    queue = StageQueue(maxsize=1)
+    queue.put("alice")
+    producer = threading.Thread(target=queue.put, args=("bob",))
+    producer.start()
+    producer.join(timeout=0.2)
+    assert producer.is_alive()  # blocked: the queue is full
+
+    queue.abandon()  # the consumer stopped
+    producer.join(timeout=1)
+    assert not producer.is_alive()
+    queue.close()
+    assert list(iter(queue.get, None)) == ["alice", "bob"]
@@ -0,0 +1,60 @@
+import os
+
+import projection
+
+
+def test_co_occurrence_counts_users_per_pair_of_clusters(edge_set):
+    profiles = {
+        "alice": {"tag_clusters": ["sleep", "diet", "sleep"]},  # repeated clusters count once
+        "bob": {"tag_clusters": ["sleep", "diet", "pain"]},
+        "carol": {"tag_clusters": ["N/A"]},  # no cluster -> no row
+    }
+    B, usernames, clusters = projection.incidence_matrix(profiles)
+    assert usernames == ["alice", "bob"]
+    assert clusters == ["sleep", "diet", "pain"]
+
+    C = projection.co_occurrence_matrix(B)
+    assert C.tolist() == [[2, 2, 1], [2, 2, 1], [1, 1, 1]]
+    assert edge_set(projection.edge_list(C, clusters)) == {
+        (frozenset(("sleep", "diet")), 2), (frozenset(("sleep", "pain")), 1), (frozenset(("diet", "pain")), 1)}
+
+
+def test_projection_reproduces_the_global_network(shipped_data, repo_dir, edge_set):
+    profiles, tag_to_cluster = shipped_data
+    edges = projection.project_profiles(profiles, tag_to_cluster)
+    shipped = projection.load_json(os.path.join(repo_dir, projection.BIPARTITE_NETWORK_DIR, "general_patterns",
+                                                "cluster_co-occurrence_edges.json"))
+    assert len(edges) == 253
+    assert edge_set(edges) == edge_set(shipped)
+
+
+def test_partitions_reproduce_the_demographic_networks(shipped_data, repo_dir, edge_set):
+    profiles, tag_to_cluster = shipped_data
+    output_dir = os.path.join(repo_dir, projection.BIPARTITE_NETWORK_DIR)
+    partitions = projection.general_partitions(output_dir)
+    edges_by_group = projection.project_partitions(profiles.items(), partitions, tag_to_cluster, workers=1, chunk_size=1000)
+
+    partitions_by_name = {partition.name: partition for partition in partitions}
+    assert ("gender", "female") in edges_by_group
+    for (name, group), edges in edges_by_group.items():
+        shipped = projection.load_json(partitions_by_name[name].path(group, output_dir))
+        assert edge_set(edges) == edge_set(shipped), (name, group)
+
+
+def test_chunks_and_worker_processes_add_up(shipped_data):
+    profiles, tag_to_cluster = shipped_data
+    partitions = [projection.Partition("gender", projection.by_gender, "{group}.json")]
+    records = list(profiles.items())[:2000]
+    expected = projection.project_partitions(records, partitions, tag_to_cluster, workers=1, chunk_size=len(records))
+    assert projection.project_partitions(records, partitions, tag_to_cluster, workers=2, chunk_size=300) == expected
+
+
+def test_profiles_file_is_streamed_as_records(tmp_path):
+    path = tmp_path / "profiles_by_comm.json"
+    path.write_text('{"/pmrgcauk": {"alice": {"tag_clusters": ["Pain", "Sleep"]}}, "/painconcern": {"bob": {"tag_clusters": ["Pain"]}}}')
+    records = list(projection.community_records(projection.iter_json_items(str(path))))
+    assert records == [("alice", {"tag_clusters": ["Pain", "Sleep"], "community": "/pmrgcauk"}),
+                       ("bob", {"tag_clusters": ["Pain"], "community": "/painconcern"})]
+    edges_by_group = projection.project_partitions(iter(records), projection.community_partitions(), workers=2, chunk_size=1)
+    assert edges_by_group == {("community", "pmrgcauk"): [{"source": "Pain", "target": "Sleep", "weight": 1}],
+                              ("community", "painconcern"): []}
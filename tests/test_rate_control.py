@@ -0,0 +1,98 @@
+import pytest
+
+import rate_control
+from rate_control import TokenBucket, Backoff, CircuitBreaker, AdaptiveConcurrency, RateController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_bursts_then_spaces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert [bucket.reserve() for _ in range(2)] == [0.5, 1.0]  # queued behind each other
+
+    clock.now += 10  # refills up to the burst only
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, 0, 0.5]
+    assert TokenBucket(rate=0, burst=1, clock=clock).reserve() == 0  # no limit
+
+
+def test_backoff_grows_exponentially_up_to_the_cap(monkeypatch):
+    backoff = Backoff(base=2.0, cap=60)
+    monkeypatch.setattr(rate_control.random, "uniform", lambda low, high: high)
+    assert [backoff.delay(attempt) for attempt in range(7)] == [2, 4, 8, 16, 32, 60, 60]
+    monkeypatch.undo()
+    assert all(0 <= backoff.delay(3) <= 16 for _ in range(100))
+
+
+def test_circuit_breaker_opens_after_errors_in_a_row():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60, clock=clock)
+    for failed in [True, True, False, True, True]:  # a success resets the series
+        breaker.record(failed)
+    assert breaker.wait_time() == 0
+
+    breaker.record(True)
+    assert breaker.trips == 1
+    assert breaker.wait_time() == 60
+    clock.now += 45
+    assert breaker.wait_time() == 15
+    clock.now += 15
+    assert breaker.wait_time() == 0
+
+    # Half-open: one more error does not open it again, a new series does
+    breaker.record(True)
+    assert breaker.wait_time() == 0
+    breaker.record(True)
+    breaker.record(True)
+    assert breaker.trips == 2
+
+
+def test_adaptive_concurrency_increases_additively_and_decreases_multiplicatively():
+    concurrency = AdaptiveConcurrency(minimum=1, maximum=8, latency_target=2.0)
+    assert all(concurrency.try_acquire() for _ in range(8))
+    assert not concurrency.try_acquire()  # limit reached
+
+    concurrency.release(latency=5.0, failed=False)  # slow
+    assert concurrency.limit == 4
+    concurrency.release(latency=0.1, failed=True)  # network error
+    assert concurrency.limit == 2
+    assert concurrency.in_flight == 6
+    assert not concurrency.try_acquire()
+
+    for _ in range(6):
+        concurrency.release(latency=0.1, failed=False)
+    assert concurrency.limit == pytest.approx(4.0, abs=0.1)  # about +1 per round of `limit` requests
+    for _ in range(10):
+        concurrency.release(0.1, True)
+    assert concurrency.limit == 1  # minimum
+
+    fixed = AdaptiveConcurrency(minimum=1, maximum=4, enabled=False)
+    fixed.try_acquire()
+    fixed.release(latency=10.0, failed=True)
+    assert fixed.limit == 4
+
+
+def test_request_records_network_errors(monkeypatch):
+    monkeypatch.setattr(rate_control, "HOST_REQUESTS_PER_SECOND", 0)
+    controller = RateController()
+    with controller.request("https://example.com/a"):
+        pass
+    with pytest.raises(RuntimeError):
+        with controller.request("https://example.com/b"):
+            raise RuntimeError("net::ERR_CONNECTION_RESET")
+    with pytest.raises(ValueError):
+        with controller.request("https://example.com/c"):
+            raise ValueError("no such element")
+
+    assert controller.stats["requests"] == 3
+    assert controller.stats["errors"] == 2
+    assert controller.stats["network_errors"] == 1
+    assert controller.concurrency.in_flight == 0
+    assert controller.concurrency.limit < controller.concurrency.maximum
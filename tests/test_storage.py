@@ -0,0 +1,92 @@
+import json
+
+from storage import JsonlStore
+
+
+def test_jsonl_store_replays_the_log_and_drops_a_truncated_record(tmp_path):
+    path = str(tmp_path / "profiles.json")
+    store = JsonlStore()
+    store.put(path, ["alice", "tags"], ["sleep"])
+    store.put(path, ["bob"], {"tags": []})
+    store._close_log(path)
+
+    # Crash in the middle of the next append
+    with open(path + ".jsonl", mode="a", encoding="utf-8") as log_file:
+        log_file.write('{"keys": ["carol"], "val')
+
+    store = JsonlStore()
+    assert store.load(path) == {"alice": {"tags": ["sleep"]}, "bob": {"tags": []}}
+    with open(path + ".jsonl", encoding="utf-8") as log_file:
+        assert log_file.read().endswith("}\n")  # the incomplete record is cut off
+
+    # New records start on a new line
+    store.put(path, ["carol"], {"tags": ["diet"]})
+    store._close_log(path)
+    assert JsonlStore().load(path)["carol"] == {"tags": ["diet"]}
+
+
+def test_jsonl_store_compaction_writes_the_json_layout_and_empties_the_log(tmp_path):
+    path = str(tmp_path / "communities.json")
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump({"https://example.com/a": {"members": 10}}, file)
+
+    store = JsonlStore()
+    store.put(path, ["https://example.com/b"], {"members": 5})
+    store.compact(path)
+
+    with open(path, encoding="utf-8") as file:
+        assert json.load(file) == {"https://example.com/a": {"members": 10}, "https://example.com/b": {"members": 5}}
+    with open(path + ".jsonl", encoding="utf-8") as log_file:
+        assert log_file.read() == ""
+    assert JsonlStore().load(path) == store.load(path)
+
+
+def test_jsonl_store_clear_starts_from_scratch(tmp_path):
+    path = str(tmp_path / "members.json")
+    store = JsonlStore()
+    store.put(path, ["https://example.com/a"], ["alice"])
+    store.clear(path)
+    store.put(path, ["https://example.com/b"], ["bob"])
+    store.close()
+
+    assert JsonlStore().load(path) == {"https://example.com/b": ["bob"]}
+
+
+def test_sqlite_store_round_trips_every_dataset(tmp_path):
+    from config import USERNAMES_BY_KEYWORD, GENERAL_PROFILES_DATA, UNIQUE_COMM_LIST, MEMBERS_BY_COMM, PROFILES_BY_COMM_DATA
+    from storage import SqliteStore
+
+    db_path = str(tmp_path / "scrape.db")
+    profile = {"tags": ["sleep"], "demographics": {"gender": "N/A"}}
+    store = SqliteStore(db_path)
+    store.put(USERNAMES_BY_KEYWORD, ["alice", "sleep"], 2)
+    store.put(USERNAMES_BY_KEYWORD, ["alice", "sleep"], 3)  # updated, not duplicated
+    store.put(GENERAL_PROFILES_DATA, ["alice"], {**profile, "communities": ["https://example.com/a"]})
+    store.put(UNIQUE_COMM_LIST, ["https://example.com/a"], {"members": 10})
+    store.put(MEMBERS_BY_COMM, ["https://example.com/a"], ["bob", "alice"])
+    store.put(MEMBERS_BY_COMM, ["https://example.com/b"], [])
+    store.put(PROFILES_BY_COMM_DATA, ["https://example.com/a", "bob"], profile)
+    store.put(PROFILES_BY_COMM_DATA, ["https://example.com/b"], {})
+    expected = {path: store.load(path) for path in store.datasets}
+    store.close()
+
+    store = SqliteStore(db_path)
+    assert {path: store.load(path) for path in store.datasets} == expected
+    assert store.load(USERNAMES_BY_KEYWORD) == {"alice": {"sleep": 3}}
+    assert store.load(MEMBERS_BY_COMM) == {"https://example.com/a": ["bob", "alice"], "https://example.com/b": []}
+    assert store.load(PROFILES_BY_COMM_DATA) == {"https://example.com/a": {"bob": profile}, "https://example.com/b": {}}
+
+    assert store.connection.execute("SELECT COUNT(*) FROM profiles").fetchone() == (2,)  # alice and bob
+
+    # A username in both datasets has one profile row, shared by both
+    updated = {**profile, "tags": ["sleep", "diet"]}
+    store.put(PROFILES_BY_COMM_DATA, ["https://example.com/a", "alice"], updated)
+    assert store.connection.execute("SELECT COUNT(*) FROM profiles WHERE username = 'alice'").fetchone() == (1,)
+    store.close()
+    store = SqliteStore(db_path)
+    assert store.load(PROFILES_BY_COMM_DATA)["https://example.com/a"]["alice"] == updated
+    assert store.load(GENERAL_PROFILES_DATA)["alice"] == {**updated, "communities": ["https://example.com/a"]}
+
+    store.clear(MEMBERS_BY_COMM)
+    store.close()
+    assert SqliteStore(db_path).load(MEMBERS_BY_COMM) == {}
@@ -0,0 +1,82 @@
+import numpy as np
+
+from tag_resolver import TagResolver, build_centroids, add_tag_clusters
+
+TAG_TO_CLUSTER = {"Insomnia": "Sleep", "Sleep apnea": "Sleep", "Back pain": "Pain", "Arthritis": "Pain", "Misc": "N/A"}
+VOCABULARY = ["insomnia", "sleep", "apnea", "back", "pain", "arthritis", "misc"]
+
+
+# Helper: stub encoder (normalized bag of words over VOCABULARY; unknown words share one extra dimension)
+def encode(texts):
+    embeddings = np.zeros((len(texts), len(VOCABULARY) + 1), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.split():
+            embeddings[row, VOCABULARY.index(word) if word in VOCABULARY else len(VOCABULARY)] += 1
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def test_tags_resolve_exact_then_normalized_then_nearest(tmp_path):
+    centroids_path = str(tmp_path / "centroids.npy")
+    build_centroids(TAG_TO_CLUSTER, model="stub", path=centroids_path, lemmatize=False, encode=encode)
+
+    calls = []
+    resolver = TagResolver(TAG_TO_CLUSTER, centroids_path, encode=lambda texts: calls.append(list(texts)) or encode(texts),
+                           threshold=0.3, lemmatize=False)
+    assert resolver.centroid_clusters == ["Pain", "Sleep"]  # "N/A" tags get no centroid
+    assert resolver.resolve("Insomnia") == "Sleep"
+    assert resolver.resolve("  INSOMNIA! ") == "Sleep"
+    assert resolver.resolve("chronic pain") == "Pain"  # similarity 0.35 with the "Pain" centroid
+    assert resolver.resolve("knitting") == "N/A"  # below the threshold
+    assert resolver.resolve("?!") == "N/A"  # nothing left to embed
+    assert resolver.get("knitting", "Other") == "Other"
+    assert resolver.stats == {"exact": 1, "normalized": 1, "nearest": 1, "unknown": 2}
+
+    # Memoized: resolved tags are not embedded again
+    resolver.resolve("chronic pain")
+    assert calls == [["chronic pain"], ["knitting"]]
+
+
+def test_unknown_tags_are_embedded_in_one_batch(tmp_path):
+    centroids_path = str(tmp_path / "centroids.npy")
+    build_centroids(TAG_TO_CLUSTER, model="stub", path=centroids_path, lemmatize=False, encode=encode)
+    calls = []
+    resolver = TagResolver(TAG_TO_CLUSTER, centroids_path, encode=lambda texts: calls.append(list(texts)) or encode(texts),
+                           threshold=0.3, lemmatize=False)
+
+    profiles = {"alice": {"tags": ["Arthritis", "chronic pain", "SLEEP apnea"]}, "bob": {"tags": ["apnea", "chronic pain"]}}
+    add_tag_clusters(profiles, resolver)
+    assert profiles["alice"]["tag_clusters"] == ["Pain", "Pain", "Sleep"]
+    assert profiles["bob"]["tag_clusters"] == ["Sleep", "Pain"]
+    assert calls == [["chronic pain", "apnea"]]
+
+
+def test_without_centroids_unknown_tags_have_no_cluster(tmp_path):
+    resolver = TagResolver(TAG_TO_CLUSTER, str(tmp_path / "missing.npy"), lemmatize=False)
+    assert resolver.resolve("Back  pain") == "Pain"
+    assert resolver.resolve("chronic pain") == "N/A"
+
+
+def test_wordnet_is_downloaded_only_if_missing(monkeypatch):
+    import nltk
+    import nltk.stem
+    import tag_resolver
+
+    class Lemmatizer:
+        def lemmatize(self, word):
+            return word.rstrip("s")
+
+    downloads = []
+    monkeypatch.setattr(nltk.stem, "WordNetLemmatizer", Lemmatizer)
+    monkeypatch.setattr(nltk, "download", lambda *args, **kwargs: downloads.append(args))
+    monkeypatch.setattr(nltk.data, "find", lambda resource: resource)  # installed
+    monkeypatch.setattr(tag_resolver, "_lemmatizer", None)
+    assert tag_resolver.normalize_tag("Migraines", lemmatize=True) == "migraine"
+    assert downloads == []
+
+    def missing(resource):
+        raise LookupError(resource)
+
+    monkeypatch.setattr(nltk.data, "find", missing)
+    monkeypatch.setattr(tag_resolver, "_lemmatizer", None)
+    tag_resolver.normalize_tag("Migraines", lemmatize=True)
+    assert downloads == [("wordnet",)]
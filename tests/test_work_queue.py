@@ -0,0 +1,50 @@
+from work_queue import WorkQueue, PENDING, IN_FLIGHT, DONE, FAILED
+
+
+def test_items_move_from_pending_to_in_flight_to_done_or_failed(tmp_path):
+    queue = WorkQueue("usernames", queue_dir=str(tmp_path), max_attempts=2)
+    assert queue.select(["alice", "bob", "carol"], done=["carol"]) == ["alice", "bob"]
+    assert [queue.state(item) for item in ["alice", "bob", "carol"]] == [PENDING, PENDING, DONE]
+
+    tracked = queue.track(["alice", "bob"])
+    assert next(tracked) == "alice"
+    assert queue.state("alice") == IN_FLIGHT
+    assert queue.state("bob") == PENDING  # marked only when handed to the scrapers
+    queue.finish("alice")
+    assert next(tracked) == "bob"
+    queue.finish("bob", "timeout")
+
+    assert queue.counts() == {PENDING: 0, IN_FLIGHT: 0, DONE: 2, FAILED: 1}
+    assert queue.failed() == [{"item": "bob", "state": FAILED, "attempts": 1, "last_error": "timeout",
+                               "updated_at": queue.failed()[0]["updated_at"]}]
+    assert not queue.complete()
+
+
+def test_failed_items_are_selected_until_their_attempts_run_out(tmp_path):
+    queue = WorkQueue("usernames", queue_dir=str(tmp_path), max_attempts=2)
+    for expected in [["alice", "bob"], ["bob"]]:
+        selected = queue.select(["alice", "bob"])
+        assert selected == expected
+        for item in queue.track(selected):
+            queue.finish(item, "timeout" if item == "bob" else None)
+
+    assert queue.select(["alice", "bob"]) == []
+    assert queue.complete()
+    assert queue.select(["alice", "bob"], only_failed=True) == ["bob"]  # retry command: regardless of attempts
+
+
+def test_interrupted_items_resume_from_disk(tmp_path):
+    queue = WorkQueue("communities", queue_dir=str(tmp_path))
+    items = [["https://example.com/a", "alice"], ["https://example.com/a", "bob"]]
+    tracked = queue.track(queue.select(items))
+    queue.finish(next(tracked))
+    next(tracked)  # crash before the result of bob is committed
+    queue.store._close_log(queue.path)
+
+    queue = WorkQueue("communities", queue_dir=str(tmp_path))
+    assert queue.state(items[1]) == IN_FLIGHT
+    assert queue.select(items) == [items[1]]
+
+    queue.reset()
+    assert queue.complete()
+    assert queue.select(items) == items
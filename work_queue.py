@@ -0,0 +1,170 @@
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+from storage import JsonlStore
+from metrics import count_item
+from config import WORK_QUEUE_DIR, WORK_QUEUE_MAX_ATTEMPTS, STATS_LOG_FILE
+
+# Stages of the scraping pipeline with a work queue (items: [category, keyword], username, community URL, [community URL, member])
+STAGES = ["keywords", "usernames", "communities", "members"]
+
+# States of an item
+PENDING = "pending"  # registered, not processed yet
+IN_FLIGHT = "in_flight"  # handed to the scrapers, not committed yet (left over if a run crashed)
+DONE = "done"  # scraped and committed to the output files
+FAILED = "failed"  # all retries of the last attempt failed
+
+# Durable per-item state of a scraping stage
+class WorkQueue:
+    """
+    Keep the state of every item of a stage ({key: {"item", "state", "attempts", "last_error", "updated_at"}})
+    in '<WORK_QUEUE_DIR>/<stage>.json', persisted as an append-only log (see storage.JsonlStore).
+    The scrapers register their items with select(), mark them in flight with track() and
+    done / failed with finish() once the result is committed, so an interrupted or partly failed run
+    continues with the open items only. `attempts` counts the runs that processed an item.
+    """
+    def __init__(self, stage, queue_dir=WORK_QUEUE_DIR, max_attempts=WORK_QUEUE_MAX_ATTEMPTS):
+        os.makedirs(queue_dir, exist_ok=True)
+        self.stage = stage
+        self.path = os.path.join(queue_dir, f"{stage}.json")
+        self.max_attempts = max_attempts
+        self.store = JsonlStore()
+        self.entries = self.store.load(self.path)
+        self.lock = threading.Lock()
+
+    def _set(self, item, state, error_message=None, attempts=None):
+        key = json.dumps(item)
+        entry = self.entries.get(key, {"item": item, "attempts": 0})
+        self.store.put(self.path, [key], {
+            "item": item,
+            "state": state,
+            "attempts": entry["attempts"] if attempts is None else attempts,
+            "last_error": error_message if state == FAILED else entry.get("last_error"),
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def state(self, item):
+        """
+        Return the state of an item (None if it was never registered).
+        """
+        entry = self.entries.get(json.dumps(item))
+        return entry["state"] if entry is not None else None
+
+    def select(self, items, only_failed=False, done=()):
+        """
+        Register new items (as done if they are in `done`, e.g. found in the output of an earlier run; else pending)
+        and return the items to process in input order:
+        - only_failed (retry command): failed items, regardless of their attempts, and pending items
+          (e.g. usernames found by a retried keyword)
+        - otherwise: items not done yet, i.e. pending, in flight (interrupted run) or failed less than `max_attempts` times
+        """
+        selected = []
+        with self.lock:
+            for item in items:
+                entry = self.entries.get(json.dumps(item))
+                if entry is None:
+                    self._set(item, DONE if item in done else PENDING)
+                    entry = self.entries[json.dumps(item)]
+
+                if only_failed:
+                    if entry["state"] in (FAILED, PENDING):
+                        selected.append(item)
+                elif entry["state"] in (PENDING, IN_FLIGHT):
+                    selected.append(item)
+                elif entry["state"] == FAILED and entry["attempts"] < self.max_attempts:
+                    selected.append(item)
+        return selected
+
+    def track(self, items):
+        """
+        Yield the items and mark each one in flight (attempts + 1) when it is handed to the scrapers.
+        """
+        for item in items:
+            with self.lock:
+                entry = self.entries.get(json.dumps(item), {"attempts": 0})
+                self._set(item, IN_FLIGHT, attempts=entry["attempts"] + 1)
+            yield item
+
+    def finish(self, item, error_message=None):
+        """
+        Mark an item done (its result is committed) or failed with the last error message.
+        """
+        with self.lock:
+            self._set(item, DONE if error_message is None else FAILED, error_message)
+        count_item(self.stage, failed=error_message is not None)
+
+    def complete(self):
+        """
+        Return True if no item is left to process: every item is done or failed `max_attempts` times
+        (also True for a stage without items). A stage that is not complete resumes instead of starting over.
+        """
+        return all(entry["state"] == DONE or (entry["state"] == FAILED and entry["attempts"] >= self.max_attempts)
+                   for entry in self.entries.values())
+
+    def reset(self):
+        """
+        Forget all items (a stage that starts from scratch, e.g. a new keyword search).
+        """
+        with self.lock:
+            self.store.clear(self.path)
+
+    def counts(self):
+        """
+        Return the number of items per state.
+        """
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        for entry in self.entries.values():
+            counts[entry["state"]] += 1
+        return counts
+
+    def failed(self):
+        """
+        Return the failed entries (item, attempts, last error).
+        """
+        return [entry for entry in self.entries.values() if entry["state"] == FAILED]
+
+    def close(self):
+        with self.lock:
+            self.store.compact(self.path)
+
+# Work queues of this process {stage: WorkQueue}
+_queues = {}
+_queues_lock = threading.Lock()
+
+def get_work_queue(stage):
+    """
+    Return the work queue of a stage (see STAGES), loaded from disk on first use.
+    """
+    with _queues_lock:
+        if stage not in _queues:
+            _queues[stage] = WorkQueue(stage)
+        return _queues[stage]
+
+# Log statistics (end of a run)
+def log_work_queue_stats():
+    """
+    Append the number of items per state of every stage used in this run to STATS_LOG_FILE
+    and compact the queue files.
+    """
+    if not _queues:
+        return
+
+    with open(STATS_LOG_FILE, "a") as log_file:
+        log_file.write("\nWork queues:\n")
+        for stage, work_queue in _queues.items():
+            counts = work_queue.counts()
+            log_file.write(f"-{stage}: " + ", ".join(f"{state}: {count}" for state, count in counts.items()) + "\n")
+            work_queue.close()
+    print(f"Statistics logged in {STATS_LOG_FILE}")
+
+
+if __name__ == "__main__":
+    # python work_queue.py [stage ...]  (default: all stages) -> items per state and the failed items with their last error
+    for stage in sys.argv[1:] or STAGES:
+        work_queue = get_work_queue(stage)
+        print(f"{stage}: {work_queue.counts()}")
+        for entry in work_queue.failed():
+            print(f"  {entry['item']} (attempts: {entry['attempts']}): {entry['last_error']}")